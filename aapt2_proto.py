@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+aapt2 Protobuf Resource Decoder
+Reads the protobuf-encoded AndroidManifest.xml, res/*.xml and resources.pb found in
+Android App Bundles (.aab) into the same XmlElement / ArscTable views the APK parsers build
+"""
+
+import struct
+
+import binary_xml
+from arsc_table import ArscTable, ResourceEntry
+from binary_xml import (XmlAttribute, XmlElement, TYPE_NULL, TYPE_REFERENCE, TYPE_ATTRIBUTE, TYPE_STRING,
+                        TYPE_INT_DEC, TYPE_INT_HEX, TYPE_INT_BOOLEAN)
+
+WIRE_VARINT = 0
+WIRE_FIXED64 = 1
+WIRE_BYTES = 2
+WIRE_FIXED32 = 5
+
+# Reference.Type in Resources.proto
+REFERENCE_ATTRIBUTE = 1
+
+# Primitive oneof field number -> Res_value data type
+PRIMITIVE_TYPES = {
+    1: TYPE_NULL,
+    2: TYPE_NULL,
+    3: 0x04,             # float
+    13: 0x05,            # dimension
+    14: 0x06,            # fraction
+    6: TYPE_INT_DEC,
+    7: TYPE_INT_HEX,
+    8: TYPE_INT_BOOLEAN,
+    9: 0x1c,             # color_argb8
+    10: 0x1d,            # color_rgb8
+    11: 0x1e,            # color_argb4
+    12: 0x1f,            # color_rgb4
+}
+
+
+class ProtoFormatError(Exception):
+    pass
+
+
+def read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ProtoFormatError("truncated varint")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def iter_fields(data, start=0, end=None):
+    """Yield (field_number, wire_type, value) where BYTES fields yield a (start, end) span"""
+    pos = start
+    end = len(data) if end is None else end
+    while pos < end:
+        key, pos = read_varint(data, pos)
+        field, wire = key >> 3, key & 7
+        if wire == WIRE_VARINT:
+            value, pos = read_varint(data, pos)
+        elif wire == WIRE_BYTES:
+            length, pos = read_varint(data, pos)
+            value = (pos, pos + length)
+            pos += length
+        elif wire == WIRE_FIXED32:
+            value = struct.unpack_from('<I', data, pos)[0]
+            pos += 4
+        elif wire == WIRE_FIXED64:
+            value = struct.unpack_from('<Q', data, pos)[0]
+            pos += 8
+        else:
+            raise ProtoFormatError(f"unsupported wire type {wire} at {pos:#x}")
+        if pos > end:
+            raise ProtoFormatError(f"field {field} overruns its message")
+        yield field, wire, value
+
+
+def _text(data, span):
+    return bytes(data[span[0]:span[1]]).decode('utf-8', errors='replace')
+
+
+def _message_fields(data, span):
+    fields = {}
+    for field, _wire, value in iter_fields(data, *span):
+        fields.setdefault(field, []).append(value)
+    return fields
+
+
+# ---------------------------------------------------------------------------
+# XmlNode (manifest/AndroidManifest.xml, res/layout/*.xml)
+# ---------------------------------------------------------------------------
+
+def _item_value(data, span):
+    """(type, data, raw) of a compiled Item"""
+    for field, _wire, value in iter_fields(data, *span):
+        if field == 1:
+            ref = _message_fields(data, value)
+            ref_type = ref.get(1, [0])[0]
+            return (TYPE_ATTRIBUTE if ref_type == REFERENCE_ATTRIBUTE else TYPE_REFERENCE), ref.get(2, [0])[0], None
+        if field in (2, 3):
+            text = _message_fields(data, value).get(1)
+            return TYPE_STRING, 0, _text(data, text[0]) if text else ''
+        if field == 5:
+            path = _message_fields(data, value).get(1)
+            return TYPE_STRING, 0, _text(data, path[0]) if path else ''
+        if field == 7:
+            for prim_field, _prim_wire, prim_value in iter_fields(data, *value):
+                return PRIMITIVE_TYPES.get(prim_field, TYPE_NULL), prim_value if isinstance(prim_value, int) else 0, None
+    return TYPE_NULL, 0, None
+
+
+def _parse_attribute(data, span):
+    namespace = name = raw = None
+    resource_id = None
+    value_type, value_data = TYPE_STRING, 0
+    compiled = None
+    for field, _wire, value in iter_fields(data, *span):
+        if field == 1:
+            namespace = _text(data, value) or None
+        elif field == 2:
+            name = _text(data, value)
+        elif field == 3:
+            raw = _text(data, value)
+        elif field == 5:
+            resource_id = value
+        elif field == 6:
+            compiled = value
+    if compiled is not None:
+        value_type, value_data, compiled_raw = _item_value(data, compiled)
+        if compiled_raw is not None:
+            raw = compiled_raw
+    return XmlAttribute(namespace, name, resource_id, raw, value_type, value_data)
+
+
+def _parse_node(data, span, parent):
+    """Return the XmlElement of an XmlNode, or None for a text node"""
+    element_span = None
+    line = 0
+    for field, _wire, value in iter_fields(data, *span):
+        if field == 1:
+            element_span = value
+        elif field == 3:
+            line = _message_fields(data, value).get(1, [0])[0]
+    if element_span is None:
+        return None
+
+    namespace = tag = None
+    attributes = []
+    child_spans = []
+    for field, _wire, value in iter_fields(data, *element_span):
+        if field == 2:
+            namespace = _text(data, value) or None
+        elif field == 3:
+            tag = _text(data, value)
+        elif field == 4:
+            attributes.append(_parse_attribute(data, value))
+        elif field == 5:
+            child_spans.append(value)
+    element = XmlElement(tag, namespace, line, attributes, parent)
+    for child_span in child_spans:
+        child = _parse_node(data, child_span, element)
+        if child is not None:
+            element.children.append(child)
+    return element
+
+
+def parse_xml(data):
+    """Parse a protobuf XmlNode document and return the root XmlElement"""
+    data = memoryview(data)
+    root = _parse_node(data, (0, len(data)), None)
+    if root is None:
+        raise ProtoFormatError("XmlNode has no root element")
+    return root
+
+
+def is_binary_xml(data):
+    return len(data) >= 2 and struct.unpack_from('<H', data, 0)[0] == binary_xml.RES_XML_TYPE
+
+
+def parse_compiled_xml(data):
+    """Parse compiled XML from either an APK (binary AXML) or an App Bundle (protobuf)"""
+    if is_binary_xml(data):
+        return binary_xml.parse(data)
+    return parse_xml(data)
+
+
+# ---------------------------------------------------------------------------
+# ResourceTable (resources.pb)
+# ---------------------------------------------------------------------------
+
+# Which fields of each Resources.proto message hold nested messages worth walking
+_ITEM = 'Item'
+_SCHEMA = {
+    'Value': {4: _ITEM, 5: 'CompoundValue'},
+    _ITEM: {1: 'Reference', 5: 'FileReference'},
+    'CompoundValue': {1: 'Attribute', 2: 'Style', 3: 'Styleable', 4: 'Array', 5: 'Plural'},
+    'Attribute': {4: 'Symbol'},
+    'Symbol': {3: 'Reference'},
+    'Style': {1: 'Reference', 3: 'StyleEntry'},
+    'StyleEntry': {3: 'Reference', 4: _ITEM},
+    'Styleable': {1: 'StyleableEntry'},
+    'StyleableEntry': {3: 'Reference'},
+    'Array': {1: 'ArrayElement'},
+    'ArrayElement': {3: _ITEM},
+    'Plural': {1: 'PluralEntry'},
+    'PluralEntry': {4: _ITEM},
+}
+
+
+def _collect_value(data, span, message, entry):
+    """Add the resource ids and file paths a Value (or nested message) refers to"""
+    if message == 'Reference':
+        res_id = _message_fields(data, span).get(2, [0])[0]
+        if res_id:
+            entry.references.add(res_id)
+        return
+    if message == 'FileReference':
+        path = _message_fields(data, span).get(1)
+        if path:
+            entry.files.add(_text(data, path[0]))
+        return
+    nested = _SCHEMA[message]
+    for field, wire, value in iter_fields(data, *span):
+        if wire == WIRE_BYTES and field in nested:
+            _collect_value(data, value, nested[field], entry)
+
+
+def _id_of(data, span):
+    return _message_fields(data, span).get(1, [0])[0]
+
+
+def parse_resource_table(data):
+    """Build an ArscTable view (entries, packages, size) from a protobuf ResourceTable"""
+    data = memoryview(data)
+    table = ArscTable.__new__(ArscTable)
+    table.size = len(data)
+    table.packages = {}
+    table.entries = {}
+    table.global_strings = []
+
+    for field, _wire, package_span in iter_fields(data):
+        if field != 2:
+            continue
+        package_id = 0
+        type_spans = []
+        for package_field, _pwire, value in iter_fields(data, *package_span):
+            if package_field == 1:
+                package_id = _id_of(data, value)
+            elif package_field == 2:
+                table.packages[package_id] = _text(data, value)
+            elif package_field == 3:
+                type_spans.append(value)
+        table.packages.setdefault(package_id, '')
+
+        for type_span in type_spans:
+            type_id = 0
+            type_name = ''
+            entry_spans = []
+            for type_field, _twire, value in iter_fields(data, *type_span):
+                if type_field == 1:
+                    type_id = _id_of(data, value)
+                elif type_field == 2:
+                    type_name = _text(data, value)
+                elif type_field == 3:
+                    entry_spans.append(value)
+
+            for entry_span in entry_spans:
+                entry_id = 0
+                key = ''
+                config_values = []
+                for entry_field, _ewire, value in iter_fields(data, *entry_span):
+                    if entry_field == 1:
+                        entry_id = _id_of(data, value)
+                    elif entry_field == 2:
+                        key = _text(data, value)
+                    elif entry_field == 6:
+                        config_values.append(value)
+                res_id = (package_id << 24) | (type_id << 16) | entry_id
+                entry = ResourceEntry(res_id, type_name, key)
+                entry.size = entry_span[1] - entry_span[0]
+                entry.configs = len(config_values)
+                for config_span in config_values:
+                    for config_field, _cwire, value in iter_fields(data, *config_span):
+                        if config_field == 2:
+                            _collect_value(data, value, 'Value', entry)
+                table.entries[res_id] = entry
+    return table
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+APK Index
+Lazily parsed view of an APK: DEX class index, resources.arsc table and decoded manifest.
+Parsed indexes come from the shared content-addressed IndexStore when it has seen the entry.
+"""
+
+import re
+
+import binary_xml
+from arsc_table import ArscTable
+from dex_index import DexIndex, ClassIndex
+from index_store import default_store
+from zip_entries import ZipEntryMap, ZipEntryTable
+
+DEX_NAME_RE = re.compile(r'^classes(\d*)\.dex$')
+
+
+def dex_sort_key(name):
+    """classes.dex, classes2.dex, ..., classes10.dex in runtime load order"""
+    match = DEX_NAME_RE.match(name.rsplit('/', 1)[-1])
+    number = match.group(1) if match else ''
+    return int(number) if number else 1
+
+
+class ApkIndex:
+    def __init__(self, apk_path, store=None):
+        """store: an IndexStore, None for the default shared store (if enabled), or False to always parse"""
+        self.apk_path = apk_path
+        self.store = default_store() if store is None else (store or None)
+        # A store passed in is closed by its owner
+        self._owns_store = store is None
+        # Flat-array central directory; entries are ZipEntry objects built on lookup
+        self.zip = ZipEntryTable(apk_path)
+        self.entries = ZipEntryMap(self.zip)
+        self._dex_indexes = None
+        self._classes = None
+        self._resources = None
+        self._manifest = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.zip.close()
+        if self._owns_store and self.store is not None:
+            self.store.close()
+
+    @property
+    def dex_names(self):
+        names = [name for name in self.entries if DEX_NAME_RE.match(name)]
+        return sorted(names, key=dex_sort_key)
+
+    @property
+    def layout_names(self):
+        return sorted(name for name in self.entries
+                      if name.startswith('res/layout') and name.endswith('.xml'))
+
+    def read(self, name):
+        """Whole uncompressed entry: DEX, resources.arsc and XML are parsed from memory"""
+        entry = self.entries[name]
+        return self.zip.read(entry, entry.file_size)
+
+    def source(self, name):
+        """(archive path, member name) holding the logical entry name"""
+        return self.apk_path, name
+
+    @property
+    def dex_indexes(self):
+        if self._dex_indexes is None:
+            if self.store is None:
+                self._dex_indexes = [DexIndex(self.read(name), name) for name in self.dex_names]
+            else:
+                self._dex_indexes = [self.store.dex_index(self.entries[name], lambda name=name: self.read(name), name)
+                                     for name in self.dex_names]
+        return self._dex_indexes
+
+    @property
+    def classes(self):
+        """Merged ClassIndex across all classes*.dex"""
+        if self._classes is None:
+            self._classes = ClassIndex(self.dex_indexes)
+        return self._classes
+
+    @property
+    def resources(self):
+        if self._resources is None:
+            if self.store is None:
+                self._resources = ArscTable(self.read('resources.arsc'))
+            else:
+                self._resources = self.store.resources(self.entries['resources.arsc'],
+                                                       lambda: self.read('resources.arsc'))
+        return self._resources
+
+    @property
+    def manifest(self):
+        """Root XmlElement of the decoded AndroidManifest.xml"""
+        if self._manifest is None:
+            if self.store is None:
+                self._manifest = binary_xml.parse(self.read('AndroidManifest.xml'))
+            else:
+                self._manifest = self.store.xml(self.entries['AndroidManifest.xml'],
+                                                lambda: self.read('AndroidManifest.xml'))
+        return self._manifest
+
+    @property
+    def package_name(self):
+        return self.manifest.get('package', namespace=None)
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+Split APK / App Bundle Loader
+Presents a base APK plus its config and feature splits, or an .aab bundle with its
+base/dex/ module layout, as one logical app with the same interface as ApkIndex: merged
+DEX class index, manifest and resource table. Large multidex apps parse their DEX files
+in worker processes, through the index store or a scratch one when no store is enabled.
+"""
+
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from aapt2_proto import parse_compiled_xml, parse_resource_table
+from apk_index import ApkIndex, DEX_NAME_RE, dex_sort_key
+from arsc_table import ArscTable
+from dex_index import DexIndex, ClassIndex
+from index_store import IndexStore, default_store
+
+BUNDLE_MANIFEST = 'manifest/AndroidManifest.xml'
+BUNDLE_RESOURCES = 'resources.pb'
+BUNDLE_DEX_DIR = 'dex/'
+BUNDLE_ROOT_DIR = 'root/'
+BASE_MODULE = 'base'
+
+# Below this much DEX the process start-up costs more than parsing in this process
+PROCESS_MIN_DEX_BYTES = 8 << 20
+
+
+class SplitPart:
+    """One split APK, or one module directory of an .aab, with logical entry names"""
+
+    def __init__(self, path, zip_file, module_dir=None):
+        self.path = path
+        self.zip = zip_file
+        self.bundle = module_dir is not None
+        self.module = module_dir
+        self.members = {}
+        prefix = f"{module_dir}/" if module_dir else ''
+        for info in zip_file.infolist():
+            if info.is_dir() or not info.filename.startswith(prefix):
+                continue
+            self.members[self._logical_name(info.filename[len(prefix):])] = info
+        self.manifest = None
+        self.dex_indexes = []
+        self.resources = None
+
+    def _logical_name(self, name):
+        if not self.bundle:
+            return name
+        if name == BUNDLE_MANIFEST:
+            return 'AndroidManifest.xml'
+        if name.startswith(BUNDLE_DEX_DIR):
+            return name[len(BUNDLE_DEX_DIR):]
+        if name.startswith(BUNDLE_ROOT_DIR):
+            return name[len(BUNDLE_ROOT_DIR):]
+        return name
+
+    @property
+    def resources_name(self):
+        return BUNDLE_RESOURCES if self.bundle else 'resources.arsc'
+
+    @property
+    def dex_names(self):
+        return sorted((name for name in self.members if DEX_NAME_RE.match(name)), key=dex_sort_key)
+
+    @property
+    def split_name(self):
+        """None for the base, else the split / module name"""
+        if self.bundle:
+            return None if self.module == BASE_MODULE else self.module
+        return self.manifest.get('split', namespace=None) if self.manifest is not None else None
+
+    @property
+    def is_config_split(self):
+        return (self.split_name or '').startswith('config.')
+
+    def read(self, name):
+        return self.zip.read(self.members[name])
+
+    def load_manifest(self, store):
+        info = self.members['AndroidManifest.xml']
+        if store is None:
+            self.manifest = parse_compiled_xml(self.read('AndroidManifest.xml'))
+        else:
+            self.manifest = store.xml(info, lambda: self.read('AndroidManifest.xml'), parse_compiled_xml)
+        return self
+
+    def load_indexes(self, store, dex_name_for):
+        """Parse (or load from the store) this part's DEX files and resource table"""
+        for name in self.dex_names:
+            logical = dex_name_for(self, name)
+            if store is None:
+                self.dex_indexes.append(DexIndex(self.read(name), logical))
+            else:
+                self.dex_indexes.append(store.dex_index(self.members[name], lambda name=name: self.read(name),
+                                                        logical))
+        info = self.members.get(self.resources_name)
+        if info is not None:
+            parse = parse_resource_table if self.bundle else ArscTable
+            if store is None:
+                self.resources = parse(self.zip.read(info))
+            else:
+                self.resources = store.resources(info, lambda: self.zip.read(info), parse)
+        return self
+
+
+def _warm_store(job):
+    """Process-pool worker: parse one part's DEX files into the shared store"""
+    archive, members, store_root = job
+    store = IndexStore(store_root)
+    with zipfile.ZipFile(archive, 'r') as zip_file:
+        for member in members:
+            info = zip_file.getinfo(member)
+            store.dex_index(info, lambda: zip_file.read(info), member)
+    store.close()
+    return store.misses
+
+
+class LogicalApp:
+    def __init__(self, paths, store=None, workers=None):
+        self.paths = list(paths)
+        self.store = default_store() if store is None else (store or None)
+        self._owns_store = store is None
+        self._scratch = None
+        self.workers = workers or os.cpu_count() or 1
+        self.parts = []
+        self._zips = []
+        for path in self.paths:
+            zip_file = zipfile.ZipFile(path, 'r')
+            self._zips.append(zip_file)
+            if path.endswith('.aab'):
+                modules = sorted({name.split('/', 1)[0] for name in zip_file.namelist()
+                                  if name.endswith('/' + BUNDLE_MANIFEST)})
+                self.parts.extend(SplitPart(path, zip_file, module) for module in modules)
+            else:
+                self.parts.append(SplitPart(path, zip_file))
+        if not self.parts:
+            raise ValueError(f"No APK splits or bundle modules in {', '.join(self.paths)}")
+
+        # Manifests first: they say which part is the base and which splits carry code
+        for part in self.parts:
+            part.load_manifest(self.store)
+        self.parts.sort(key=lambda part: (part.split_name is not None, part.is_config_split, part.split_name or ''))
+        self.base = self.parts[0]
+        if self.base.split_name is not None:
+            raise ValueError("No base APK / base module among the given splits")
+        self.apk_path = self.base.path
+
+        self.entries = {}
+        self._sources = {}
+        for part in self.parts:
+            for name, info in part.members.items():
+                logical = self._entry_name(part, name)
+                if logical not in self.entries:
+                    self.entries[logical] = info
+                    self._sources[logical] = (part, name)
+        self._loaded = False
+        self._classes = None
+        self._resources = None
+        self._manifest = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for zip_file in self._zips:
+            zip_file.close()
+        if self._owns_store and self.store is not None:
+            self.store.close()
+        if self._scratch is not None:
+            self._scratch.close()
+            shutil.rmtree(self._scratch.root, ignore_errors=True)
+            self._scratch = None
+
+    def _entry_name(self, part, name):
+        """Logical name of a part's entry; per-split files of non-base parts get a split/ prefix"""
+        if part is self.base or part.split_name is None:
+            return name
+        if name in ('AndroidManifest.xml', part.resources_name) or DEX_NAME_RE.match(name):
+            return f"{part.split_name}/{name}"
+        return name
+
+    def _load(self):
+        if self._loaded:
+            return
+        dex_jobs = [(part.path, [part.members[name].filename for name in part.dex_names])
+                    for part in self.parts if part.dex_names]
+        dex_bytes = sum(part.members[name].file_size for part in self.parts for name in part.dex_names)
+        store = self.store
+        if self.workers > 1 and len(dex_jobs) > 1 and dex_bytes >= PROCESS_MIN_DEX_BYTES:
+            # Parsing is pure Python, so only processes run it in parallel. Workers write
+            # records into the content-addressed store (a scratch one when none is enabled)
+            # and this process just maps the finished records
+            if store is None:
+                store = self._scratch = IndexStore(tempfile.mkdtemp(prefix='apk-index-'))
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(dex_jobs))) as pool:
+                list(pool.map(_warm_store, [(path, members, store.root) for path, members in dex_jobs]))
+        for part in self.parts:
+            part.load_indexes(store, self._entry_name)
+        self._loaded = True
+
+    @property
+    def dex_names(self):
+        return [self._entry_name(part, name) for part in self.parts for name in part.dex_names]
+
+    @property
+    def layout_names(self):
+        return sorted(name for name in self.entries
+                      if name.startswith('res/layout') and name.endswith('.xml'))
+
+    def read(self, name):
+        part, member = self._sources[name]
+        return part.read(member)
+
+    def source(self, name):
+        part, member = self._sources[name]
+        return part.path, part.members[member].filename
+
+    @property
+    def dex_indexes(self):
+        self._load()
+        return [dex for part in self.parts for dex in part.dex_indexes]
+
+    @property
+    def classes(self):
+        """ClassIndex over base DEX files first, then each feature split's"""
+        if self._classes is None:
+            self._classes = ClassIndex(self.dex_indexes)
+        return self._classes
+
+    @property
+    def resources(self):
+        """Base resource table with every split's entries and configs merged in"""
+        if self._resources is None:
+            self._load()
+            tables = [part.resources for part in self.parts if part.resources is not None]
+            if not tables:
+                raise KeyError("No resources.arsc / resources.pb in any split")
+            merged = tables[0].copy()
+            for table in tables[1:]:
+                merged.merge(table)
+            self._resources = merged
+        return self._resources
+
+    @property
+    def manifest(self):
+        """Base manifest with the components of feature split manifests appended"""
+        if self._manifest is None:
+            # Copied so the parts' own manifests stay as parsed
+            root = self.base.manifest.copy()
+            application = next(root.iter('application'), None)
+            for part in self.parts[1:]:
+                if part.is_config_split:
+                    continue
+                split_application = next(part.manifest.iter('application'), None)
+                if application is None or split_application is None:
+                    continue
+                application.children.extend(child.copy(application) for child in split_application.children)
+            self._manifest = root
+        return self._manifest
+
+    @property
+    def package_name(self):
+        return self.manifest.get('package', namespace=None)
+
+
+def open_app(path, store=None):
+    """ApkIndex for a plain .apk, LogicalApp for an .aab, a directory of splits or a list of APKs"""
+    if isinstance(path, (list, tuple)):
+        return LogicalApp(path, store) if len(path) > 1 else open_app(path[0], store)
+    if os.path.isdir(path):
+        return LogicalApp(sorted(glob.glob(os.path.join(path, '*.apk'))), store)
+    if path.endswith('.aab'):
+        return LogicalApp([path], store)
+    return ApkIndex(path, store)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <app.aab | splits-dir | base.apk split.apk ...>")
+        return 2
+
+    from layout_inflation import LayoutInflationChecker
+    from manifest_components import check_apk
+
+    with open_app(sys.argv[1:]) as app:
+        parts = getattr(app, 'parts', None)
+        if parts:
+            print(f"{len(parts)} parts:")
+            for part in parts:
+                kind = 'base' if part is app.base else ('config split' if part.is_config_split else 'feature split')
+                print(f"  {os.path.basename(part.path)}{'!' + part.module if part.bundle else ''}: {kind}, "
+                      f"{len(part.dex_names)} DEX, {len(part.members)} entries")
+        print(f"Package {app.package_name}: {len(app.classes.classes)} classes in {len(app.dex_names)} DEX files, "
+              f"{len(app.resources.entries)} resources, {len(app.layout_names)} layouts")
+
+        _components, issues = check_apk(app)
+        failures = {name: found for name, found in LayoutInflationChecker(app).check().items() if found}
+
+    for issue in issues:
+        print(f"  ❌ {issue}")
+    for name, found in sorted(failures.items()):
+        print(f"  ❌ {name}: {len(found)} inflation failures")
+    if not issues and not failures:
+        print("✅ Components resolve and all layouts inflate across the merged splits")
+    return 1 if issues or failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
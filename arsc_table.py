@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+resources.arsc Table Parser
+Builds the resource id -> type/name table used to resolve @id, @layout, ... references
+"""
+
+import struct
+
+from binary_xml import TYPE_REFERENCE, TYPE_ATTRIBUTE, TYPE_STRING, parse_string_pool
+
+RES_TABLE_TYPE = 0x0002
+RES_TABLE_PACKAGE_TYPE = 0x0200
+RES_TABLE_TYPE_TYPE = 0x0201
+RES_TABLE_TYPE_SPEC_TYPE = 0x0202
+
+FLAG_COMPLEX = 0x0001
+FLAG_COMPACT = 0x0008
+TYPE_FLAG_SPARSE = 0x01
+TYPE_FLAG_OFFSET16 = 0x02
+NO_ENTRY = 0xFFFFFFFF
+
+
+class ArscFormatError(Exception):
+    pass
+
+
+class ResourceEntry:
+    __slots__ = ('res_id', 'type_name', 'key', 'size', 'configs', 'references', 'files')
+
+    def __init__(self, res_id, type_name, key):
+        self.res_id = res_id
+        self.type_name = type_name
+        self.key = key
+        self.size = 0
+        self.configs = 0
+        self.references = set()
+        self.files = set()
+
+    @property
+    def name(self):
+        return f"{self.type_name}/{self.key}"
+
+    def copy(self):
+        entry = ResourceEntry(self.res_id, self.type_name, self.key)
+        entry.size = self.size
+        entry.configs = self.configs
+        entry.references = set(self.references)
+        entry.files = set(self.files)
+        return entry
+
+
+class ArscTable:
+    def __init__(self, data):
+        data = memoryview(data)
+        chunk_type, header_size, total_size = struct.unpack_from('<HHI', data, 0)
+        if chunk_type != RES_TABLE_TYPE:
+            raise ArscFormatError(f"Not a resource table (chunk type {chunk_type:#x})")
+        self.size = total_size
+        self.packages = {}
+        self.entries = {}
+        self.global_strings = []
+
+        pos = header_size
+        end = min(total_size, len(data))
+        while pos + 8 <= end:
+            chunk_type, _header_size, chunk_size = struct.unpack_from('<HHI', data, pos)
+            if chunk_size < 8:
+                raise ArscFormatError(f"Corrupt chunk at {pos:#x}")
+            if chunk_type == 0x0001:
+                self.global_strings, _ = parse_string_pool(data, pos)
+            elif chunk_type == RES_TABLE_PACKAGE_TYPE:
+                self._parse_package(data, pos)
+            pos += chunk_size
+
+    def _parse_package(self, data, start):
+        _type, header_size, chunk_size = struct.unpack_from('<HHI', data, start)
+        package_id = struct.unpack_from('<I', data, start + 8)[0]
+        name = bytes(data[start + 12:start + 12 + 256]).decode('utf-16-le', errors='ignore').split('\x00')[0]
+        type_strings_off, _last_public_type, key_strings_off = struct.unpack_from('<III', data, start + 268)
+        type_names, _ = parse_string_pool(data, start + type_strings_off)
+        key_names, _ = parse_string_pool(data, start + key_strings_off)
+        self.packages[package_id] = name
+
+        pos = start + header_size
+        end = start + chunk_size
+        while pos + 8 <= end:
+            chunk_type, sub_header_size, sub_size = struct.unpack_from('<HHI', data, pos)
+            if sub_size < 8:
+                raise ArscFormatError(f"Corrupt package chunk at {pos:#x}")
+            if chunk_type == RES_TABLE_TYPE_TYPE:
+                self._parse_type(data, pos, sub_header_size, sub_size, package_id, type_names, key_names)
+            pos += sub_size
+
+    def _entry_offsets(self, data, pos, header_size, flags, entry_count):
+        base = pos + header_size
+        if flags & TYPE_FLAG_SPARSE:
+            for index, offset in struct.iter_unpack('<HH', data[base:base + entry_count * 4]):
+                yield index, offset * 4
+        elif flags & TYPE_FLAG_OFFSET16:
+            for index, (offset,) in enumerate(struct.iter_unpack('<H', data[base:base + entry_count * 2])):
+                if offset != 0xFFFF:
+                    yield index, offset * 4
+        else:
+            for index, (offset,) in enumerate(struct.iter_unpack('<I', data[base:base + entry_count * 4])):
+                if offset != NO_ENTRY:
+                    yield index, offset
+
+    def _parse_type(self, data, pos, header_size, chunk_size, package_id, type_names, key_names):
+        type_id, flags, _reserved, entry_count, entries_start = struct.unpack_from('<BBHII', data, pos + 8)
+        type_name = type_names[type_id - 1] if 0 < type_id <= len(type_names) else f"type{type_id:02x}"
+        entries_base = pos + entries_start
+        chunk_end = pos + chunk_size
+        entries = self.entries
+
+        for index, offset in self._entry_offsets(data, pos, header_size, flags, entry_count):
+            entry_pos = entries_base + offset
+            if entry_pos + 8 > chunk_end:
+                continue
+            size, entry_flags, key = struct.unpack_from('<HHI', data, entry_pos)
+            res_id = (package_id << 24) | (type_id << 16) | index
+
+            if entry_flags & FLAG_COMPACT:
+                key_index = size
+                values = [(entry_flags >> 8, key)]
+                entry_bytes = 8
+                parent = 0
+            else:
+                key_index = key
+                if entry_flags & FLAG_COMPLEX:
+                    parent, count = struct.unpack_from('<II', data, entry_pos + 8)
+                    values = []
+                    map_pos = entry_pos + size
+                    for _ in range(count):
+                        map_name, _vsize, _res0, value_type, value_data = struct.unpack_from(
+                            '<IHBBI', data, map_pos)
+                        values.append((TYPE_REFERENCE, map_name))
+                        values.append((value_type, value_data))
+                        map_pos += 12
+                    entry_bytes = size + count * 12
+                else:
+                    parent = 0
+                    _vsize, _res0, value_type, value_data = struct.unpack_from('<HBBI', data, entry_pos + size)
+                    values = [(value_type, value_data)]
+                    entry_bytes = size + 8
+
+            entry = entries.get(res_id)
+            if entry is None:
+                key_name = key_names[key_index] if key_index < len(key_names) else f"0x{res_id:08x}"
+                entry = entries[res_id] = ResourceEntry(res_id, type_name, key_name)
+            entry.size += entry_bytes
+            entry.configs += 1
+            if parent:
+                entry.references.add(parent)
+            for value_type, value_data in values:
+                if value_type in (TYPE_REFERENCE, TYPE_ATTRIBUTE) and value_data:
+                    entry.references.add(value_data)
+                elif value_type == TYPE_STRING and value_data < len(self.global_strings):
+                    value = self.global_strings[value_data]
+                    if value.startswith('res/'):
+                        entry.files.add(value)
+
+    def copy(self):
+        """Table with copies of every entry, so merging into it leaves this one unchanged"""
+        table = ArscTable.__new__(ArscTable)
+        table.size = self.size
+        table.packages = dict(self.packages)
+        table.entries = {res_id: entry.copy() for res_id, entry in self.entries.items()}
+        table.global_strings = self.global_strings
+        return table
+
+    def merge(self, other):
+        """Fold another split's table into this one: config splits add configs to existing ids.
+        other and its entries are left unchanged"""
+        for package_id, name in other.packages.items():
+            self.packages.setdefault(package_id, name)
+        self.size += other.size
+        for res_id, entry in other.entries.items():
+            existing = self.entries.get(res_id)
+            if existing is None:
+                self.entries[res_id] = entry.copy()
+                continue
+            existing.size += entry.size
+            existing.configs += entry.configs
+            existing.references |= entry.references
+            existing.files |= entry.files
+        return self
+
+    def __contains__(self, res_id):
+        return res_id in self.entries
+
+    def name_of(self, res_id):
+        entry = self.entries.get(res_id)
+        if entry is None:
+            return f"0x{res_id:08x}"
+        return entry.name
+
+    def ids_of_type(self, type_name):
+        return {res_id for res_id, entry in self.entries.items() if entry.type_name == type_name}
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Baseline Profile Generator
+Walks the method call graph from the start-up lifecycle callbacks (Application, content
+providers, the launcher activity's onCreate and every declared service's onCreate /
+onListenerConnected) and writes the reachable classes and methods as an ART
+baseline-prof.txt, so the launch path is AOT-compiled at install time.
+
+Per-DEX call tables are cached (--cache, default ~/.cache/apk-index-store or
+$APK_INDEX_STORE), so regenerating after a code change rescans only the DEX files whose
+bytes changed; a changed classes.dex is rescanned whole.
+"""
+
+import argparse
+import sys
+import time
+
+from app_bundle import open_app
+from call_graph import MethodCallGraph, lifecycle_roots, split_key
+from index_store import DEFAULT_ROOT, IndexStore, store_root
+from manifest_components import declared_components
+from multidex_placement import startup_entry_points
+
+STARTUP_CALLBACKS = {
+    'application': ('attachBaseContext', 'onCreate'),
+    'provider': ('onCreate',),
+    'activity': ('onCreate',),
+    'activity-alias': ('onCreate',),
+    'service': ('onCreate', 'onListenerConnected'),
+}
+
+# H: hot, S: executed during start-up, P: executed after start-up
+METHOD_FLAGS = 'HSP'
+
+
+def startup_components(manifest, package):
+    """Application, providers, launcher activities and every service"""
+    launchers = set(startup_entry_points(manifest, package))
+    return [component for component in declared_components(manifest, package)
+            if component.kind in ('application', 'provider', 'service')
+            or (component.kind in ('activity', 'activity-alias') and component.descriptor in launchers)]
+
+
+def generate(apk, graph=None):
+    """Return (profile lines, roots, reachable method keys)"""
+    graph = graph or MethodCallGraph(apk)
+    roots = lifecycle_roots(graph, startup_components(apk.manifest, apk.package_name or ''), STARTUP_CALLBACKS)
+    order, _parents = graph.reachable(roots)
+
+    classes = set()
+    methods = []
+    for key in order:
+        class_descriptor = split_key(key)[0]
+        # Loading a class loads its superclasses; list the app-defined ones too
+        classes.update(ancestor for ancestor in graph.classes.superclass_chain(class_descriptor)
+                       if ancestor in graph.classes)
+        _dex, code_off, _edges = graph.method(key)
+        if code_off:
+            methods.append(METHOD_FLAGS + key)
+    return sorted(classes) + sorted(methods), roots, order
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('apk', help='APK, .aab or directory of split APKs')
+    parser.add_argument('-o', '--output', default='baseline-prof.txt')
+    parser.add_argument('--cache', metavar='DIR', default=store_root() or DEFAULT_ROOT,
+                        help='call-table cache directory (default: $APK_INDEX_STORE or %(default)s)')
+    parser.add_argument('--no-cache', action='store_true', help='rescan every DEX file')
+    args = parser.parse_args()
+
+    # Only call tables go in this store; DEX indexes use the shared store if APK_INDEX_STORE enables it
+    store = None if args.no_cache else IndexStore(args.cache)
+    started = time.perf_counter()
+    try:
+        with open_app(args.apk) as apk:
+            graph = MethodCallGraph(apk, store if store is not None else False)
+            lines, roots, order = generate(apk, graph)
+    finally:
+        if store is not None:
+            store.close()
+    elapsed = time.perf_counter() - started
+
+    if not roots:
+        print("❌ No start-up lifecycle callbacks found in the manifest/DEX")
+        return 1
+    with open(args.output, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+    class_count = sum(1 for line in lines if line.startswith('L'))
+    print(f"✅ {args.output}: {class_count} classes, {len(lines) - class_count} methods "
+          f"from {len(roots)} roots ({len(order)} reachable methods) in {elapsed:.2f}s")
+    if store is not None:
+        print(f"   call tables in {store.root}: {store.hits} cached, {store.misses} scanned")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
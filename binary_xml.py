@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Android Binary XML (AXML) Parser
+Decodes compiled AndroidManifest.xml and res/*.xml entries into a small element tree
+"""
+
+import struct
+
+RES_STRING_POOL_TYPE = 0x0001
+RES_XML_TYPE = 0x0003
+RES_XML_START_NAMESPACE_TYPE = 0x0100
+RES_XML_END_NAMESPACE_TYPE = 0x0101
+RES_XML_START_ELEMENT_TYPE = 0x0102
+RES_XML_END_ELEMENT_TYPE = 0x0103
+RES_XML_CDATA_TYPE = 0x0104
+RES_XML_RESOURCE_MAP_TYPE = 0x0180
+
+UTF8_FLAG = 0x100
+NO_INDEX = 0xFFFFFFFF
+
+TYPE_NULL = 0x00
+TYPE_REFERENCE = 0x01
+TYPE_ATTRIBUTE = 0x02
+TYPE_STRING = 0x03
+TYPE_INT_DEC = 0x10
+TYPE_INT_HEX = 0x11
+TYPE_INT_BOOLEAN = 0x12
+
+ANDROID_NS = 'http://schemas.android.com/apk/res/android'
+
+# Framework attribute resource ids, used when aapt2 strips attribute names
+ATTR_IDS = {
+    'name': 0x01010003,
+    'id': 0x010100d0,
+    'layout': 0x010100f2,
+    'targetActivity': 0x01010202,
+    'exported': 0x01010010,
+    'enabled': 0x0101000e,
+}
+
+
+class BinaryXmlError(Exception):
+    pass
+
+
+def parse_string_pool(data, offset):
+    """Decode a ResStringPool chunk starting at offset into a list of str"""
+    chunk_type, header_size, chunk_size = struct.unpack_from('<HHI', data, offset)
+    if chunk_type != RES_STRING_POOL_TYPE:
+        raise BinaryXmlError(f"Expected string pool at {offset:#x}, got chunk {chunk_type:#x}")
+    string_count, _style_count, flags, strings_start, _styles_start = struct.unpack_from(
+        '<IIIII', data, offset + 8)
+    offsets = struct.unpack_from(f'<{string_count}I', data, offset + header_size)
+    base = offset + strings_start
+    utf8 = bool(flags & UTF8_FLAG)
+
+    strings = []
+    for rel in offsets:
+        pos = base + rel
+        if utf8:
+            # UTF-16 length (skipped) followed by UTF-8 byte length, each 1 or 2 bytes
+            if data[pos] & 0x80:
+                pos += 2
+            else:
+                pos += 1
+            length = data[pos]
+            if length & 0x80:
+                length = ((length & 0x7F) << 8) | data[pos + 1]
+                pos += 2
+            else:
+                pos += 1
+            strings.append(bytes(data[pos:pos + length]).decode('utf-8', errors='replace'))
+        else:
+            length = struct.unpack_from('<H', data, pos)[0]
+            pos += 2
+            if length & 0x8000:
+                length = ((length & 0x7FFF) << 16) | struct.unpack_from('<H', data, pos)[0]
+                pos += 2
+            strings.append(bytes(data[pos:pos + length * 2]).decode('utf-16-le', errors='replace'))
+    return strings, offset + chunk_size
+
+
+class XmlAttribute:
+    __slots__ = ('namespace', 'name', 'resource_id', 'raw', 'type', 'data')
+
+    def __init__(self, namespace, name, resource_id, raw, value_type, data):
+        self.namespace = namespace
+        self.name = name
+        self.resource_id = resource_id
+        self.raw = raw
+        self.type = value_type
+        self.data = data
+
+    @property
+    def value(self):
+        """Best-effort Python value for this attribute"""
+        if self.type == TYPE_STRING:
+            return self.raw
+        if self.type == TYPE_INT_BOOLEAN:
+            return self.data != 0
+        if self.type in (TYPE_REFERENCE, TYPE_ATTRIBUTE):
+            return self.data
+        if self.raw is not None:
+            return self.raw
+        return self.data
+
+
+class XmlElement:
+    __slots__ = ('tag', 'namespace', 'line', 'attributes', 'children', 'parent')
+
+    def __init__(self, tag, namespace, line, attributes, parent=None):
+        self.tag = tag
+        self.namespace = namespace
+        self.line = line
+        self.attributes = attributes
+        self.children = []
+        self.parent = parent
+
+    def attr(self, name, namespace=ANDROID_NS):
+        """Return the XmlAttribute called name (falls back to the framework resource id)"""
+        res_id = ATTR_IDS.get(name)
+        for attribute in self.attributes:
+            if attribute.name == name and (namespace is None or attribute.namespace in (namespace, None)):
+                return attribute
+            if res_id is not None and attribute.resource_id == res_id:
+                return attribute
+        return None
+
+    def get(self, name, default=None, namespace=ANDROID_NS):
+        attribute = self.attr(name, namespace)
+        return attribute.value if attribute is not None else default
+
+    def iter(self, tag=None):
+        """Depth-first walk over this element and all descendants"""
+        stack = [self]
+        while stack:
+            element = stack.pop()
+            if tag is None or element.tag == tag:
+                yield element
+            stack.extend(reversed(element.children))
+
+    def copy(self, parent=None):
+        """Deep copy of this subtree (attributes are shared, they are never modified) under parent"""
+        element = XmlElement(self.tag, self.namespace, self.line, list(self.attributes), parent)
+        element.children = [child.copy(element) for child in self.children]
+        return element
+
+    def findall(self, tag):
+        return [child for child in self.children if child.tag == tag]
+
+
+def parse(data):
+    """Parse compiled XML bytes and return the root XmlElement"""
+    data = memoryview(data)
+    if len(data) < 8:
+        raise BinaryXmlError("File too small for binary XML")
+    chunk_type, header_size, total_size = struct.unpack_from('<HHI', data, 0)
+    if chunk_type != RES_XML_TYPE:
+        raise BinaryXmlError(f"Not a binary XML document (chunk type {chunk_type:#x})")
+
+    strings = []
+    resource_map = ()
+    namespaces = {}
+    root = None
+    current = None
+    pos = header_size
+    end = min(total_size, len(data))
+
+    def string_at(index):
+        if index == NO_INDEX or index >= len(strings):
+            return None
+        return strings[index]
+
+    while pos + 8 <= end:
+        chunk_type, header_size, chunk_size = struct.unpack_from('<HHI', data, pos)
+        if chunk_size < 8:
+            raise BinaryXmlError(f"Corrupt chunk at {pos:#x}")
+
+        if chunk_type == RES_STRING_POOL_TYPE:
+            strings, _ = parse_string_pool(data, pos)
+        elif chunk_type == RES_XML_RESOURCE_MAP_TYPE:
+            count = (chunk_size - header_size) // 4
+            resource_map = struct.unpack_from(f'<{count}I', data, pos + header_size)
+        elif chunk_type == RES_XML_START_NAMESPACE_TYPE:
+            prefix, uri = struct.unpack_from('<II', data, pos + 16)
+            namespaces[string_at(uri)] = string_at(prefix)
+        elif chunk_type == RES_XML_START_ELEMENT_TYPE:
+            line = struct.unpack_from('<I', data, pos + 8)[0]
+            ns, name, attr_start, attr_size, attr_count = struct.unpack_from('<IIHHH', data, pos + 16)
+            attributes = []
+            attr_pos = pos + 16 + attr_start
+            for _ in range(attr_count):
+                a_ns, a_name, a_raw, _size, _res0, a_type, a_data = struct.unpack_from(
+                    '<IIIHBBI', data, attr_pos)
+                attributes.append(XmlAttribute(
+                    string_at(a_ns),
+                    string_at(a_name),
+                    resource_map[a_name] if a_name < len(resource_map) else None,
+                    string_at(a_raw) if a_raw != NO_INDEX else (
+                        string_at(a_data) if a_type == TYPE_STRING else None),
+                    a_type,
+                    a_data,
+                ))
+                attr_pos += attr_size
+            element = XmlElement(string_at(name), string_at(ns), line, attributes, current)
+            if current is None:
+                root = element
+            else:
+                current.children.append(element)
+            current = element
+        elif chunk_type == RES_XML_END_ELEMENT_TYPE:
+            if current is not None:
+                current = current.parent
+
+        pos += chunk_size
+
+    if root is None:
+        raise BinaryXmlError("Binary XML contains no elements")
+    return root
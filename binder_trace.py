@@ -0,0 +1,653 @@
+#!/usr/bin/env python3
+"""
+Binder / Scheduling Trace Analyzer
+Streams saved Perfetto protobuf traces (or systrace/ftrace text) for binder transactions
+and sched_switch / sched_waking between the app, system_server and the TTS engine
+process, and splits every DebugIvonaTTS test's TextToSpeech start-up into bind and onInit
+phases: which process each phase waited on, for how long, and how the app's main thread
+spent the time.
+
+Test ids come from the trace's own android.log data source; for systrace text, pass a
+logcat capture taken with `adb logcat -v monotonic` so both use seconds since boot.
+
+    python3 binder_trace.py trace.perfetto-trace
+    python3 binder_trace.py trace.html --logcat capture-monotonic.txt --engine ivona
+"""
+
+import argparse
+import bisect
+import re
+import sys
+from collections import OrderedDict
+
+from aapt2_proto import WIRE_BYTES, ProtoFormatError, iter_fields, read_varint
+from logcat_events import TAGS, TEST_START, INIT_OK, INIT_FAIL, classify, context_for
+
+# Field numbers from protos/perfetto/trace/trace_packet.proto and ftrace/*.proto
+TRACE_PACKET = 1
+PACKET_FTRACE_EVENTS = 1
+PACKET_PROCESS_TREE = 2
+PACKET_CLOCK_SNAPSHOT = 6
+PACKET_ANDROID_LOG = 39
+BUNDLE_CPU = 1
+BUNDLE_EVENT = 2
+BUNDLE_COMPACT_SCHED = 4
+EVENT_TIMESTAMP = 1
+EVENT_PID = 2
+EVENT_SCHED_SWITCH = 4
+EVENT_SCHED_WAKEUP = 17
+EVENT_SCHED_WAKING = 20
+EVENT_BINDER_TRANSACTION = 50
+EVENT_BINDER_RECEIVED = 51
+CLOCK_REALTIME = 1
+CLOCK_BOOTTIME = 6
+
+TF_ONE_WAY = 0x01
+LOG_LEVELS = 'VDIWEF'
+NS_PER_MS = 1000000
+# Log timestamps above this are CLOCK_REALTIME (ns since 1970), not boot time
+REALTIME_THRESHOLD = 10 ** 17
+# A test with no onInit is followed until the next test, or this long
+BIND_TIMEOUT_NS = 10000 * NS_PER_MS
+# binder_transaction_received events kept while waiting for the transaction they belong to
+RECEIVED_BACKLOG = 65536
+READ_CHUNK = 4 << 20
+
+FTRACE_LINE_RE = re.compile(
+    r'^\s*(.+?)-(\d+)\s+(?:\(\s*([\d-]+)\)\s+)?\[(\d+)\]\s+(?:\S{4,5}\s+)?(\d+)\.(\d+): (\w+): (.*)$')
+FTRACE_ARG_RE = re.compile(r'(\w+)=(\S*)')
+MONOTONIC_RE = re.compile(r'^\s*(\d+)\.(\d{3})\s+(\d+)\s+(\d+)\s+([VDIWEF])\s+(.+?)\s*: (.*)$')
+BINDER_THREAD_RE = re.compile(r'^(?:binder|HwBinder):(\d+)_')
+
+
+class TraceFormatError(Exception):
+    pass
+
+
+def _text(data, span):
+    return bytes(data[span[0]:span[1]]).decode('utf-8', errors='replace')
+
+
+def _packed(data, span):
+    values = []
+    pos, end = span
+    while pos < end:
+        value, pos = read_varint(data, pos)
+        values.append(value)
+    return values
+
+
+def iter_trace_packets(f, chunk_size=READ_CHUNK):
+    """Yield each TracePacket of a Perfetto trace file as a memoryview, reading chunk by chunk"""
+    buf = b''
+    pos = 0
+    eof = False
+    while True:
+        if len(buf) - pos < 16 and not eof:
+            more = f.read(chunk_size)
+            eof = not more
+            buf = buf[pos:] + more
+            pos = 0
+        if pos >= len(buf):
+            return
+        try:
+            key, start = read_varint(buf, pos)
+            length, start = read_varint(buf, start)
+        except ProtoFormatError:
+            if eof:
+                return
+            buf = buf[pos:] + f.read(chunk_size)
+            pos = 0
+            continue
+        if key & 7 != WIRE_BYTES:
+            raise TraceFormatError(f"unexpected wire type {key & 7} at top level; not a Perfetto trace?")
+        if start + length > len(buf):
+            if eof:
+                return
+            # Packet straddles the chunk boundary: keep the tail and read at least the rest of it
+            more = f.read(max(chunk_size, start + length - len(buf)))
+            eof = not more
+            buf = buf[pos:] + more
+            pos = 0
+            continue
+        if key >> 3 == TRACE_PACKET:
+            yield memoryview(buf)[start:start + length]
+        pos = start + length
+
+
+class BindWindow:
+    """One test's TextToSpeech start-up: from the test header to onInit (or a timeout)"""
+
+    __slots__ = ('test', 'context', 'pid', 'start', 'end', 'init_ts', 'init_ok',
+                 'binder_out', 'binder_in', 'running', 'main_runnable')
+
+    def __init__(self, test, pid, start):
+        self.test = test
+        self.context = context_for(test)
+        self.pid = pid
+        self.start = start
+        self.end = None
+        self.init_ts = None
+        self.init_ok = None
+        # dest pid -> [calls, total ns, dispatch ns, first ts]
+        self.binder_out = {}
+        # source tid -> [transactions, first ts]
+        self.binder_in = {}
+        # tid -> running ns inside the window
+        self.running = {}
+        self.main_runnable = 0
+
+
+class BinderTraceAnalyzer:
+    """Collects test windows first (pass 1), then folds scheduling and binder events into them (pass 2)"""
+
+    def __init__(self, tags=TAGS):
+        self.tags = tags
+        self.windows = []
+        self._open = {}
+        self.cmdlines = {}
+        self.comms = {}
+        self.tgids = {}
+        self.clock_offset = None
+        self._starts = []
+        self._max_len = 0
+        self._by_pid = {}
+        self._cpu_last = {}
+        self._waking = {}
+        self._last_in = {}
+        self._binder = []
+        self._received = OrderedDict()
+        self.event_count = 0
+        self.trace_end = 0
+
+    # -- pass 1: processes, clocks and test windows ----------------------------------------
+
+    def add_process(self, pid, cmdline):
+        self.cmdlines[pid] = cmdline
+        self.tgids[pid] = pid
+
+    def add_thread(self, tid, tgid, name=None):
+        if tgid:
+            self.tgids[tid] = tgid
+        if name:
+            self.comms[tid] = name
+
+    def add_log(self, ts, pid, tid, tag, message):
+        if tag not in self.tags:
+            return
+        self.tgids.setdefault(tid, pid)
+        kind, detail = classify(message)
+        if kind == TEST_START:
+            previous = self._open.get(pid)
+            if previous is not None and previous.end is None:
+                previous.end = min(ts, previous.start + BIND_TIMEOUT_NS)
+            window = self._open[pid] = BindWindow(detail, pid, ts)
+            self.windows.append(window)
+        elif kind in (INIT_OK, INIT_FAIL):
+            window = self._open.get(pid)
+            if window is not None and window.init_ts is None:
+                window.init_ts = ts
+                window.init_ok = kind == INIT_OK
+                window.end = ts
+
+    def finish_windows(self):
+        for window in self.windows:
+            if window.end is None:
+                window.end = window.start + BIND_TIMEOUT_NS
+        self.windows.sort(key=lambda window: window.start)
+        self._starts = [window.start for window in self.windows]
+        self._max_len = max((window.end - window.start for window in self.windows), default=0)
+        for window in self.windows:
+            self._by_pid.setdefault(window.pid, []).append(window)
+
+    def overlapping(self, t0, t1):
+        """Windows that overlap [t0, t1)"""
+        index = bisect.bisect_left(self._starts, t1)
+        found = []
+        while index > 0:
+            index -= 1
+            window = self.windows[index]
+            if window.start < t0 - self._max_len:
+                break
+            if window.end > t0:
+                found.append(window)
+        return found
+
+    def window_at(self, pid, ts, grace=0):
+        for window in self._by_pid.get(pid, ()):
+            if window.start <= ts < window.end + grace:
+                return window
+        return None
+
+    # -- pass 2: ftrace events -------------------------------------------------------------
+
+    def tgid_of(self, tid):
+        tgid = self.tgids.get(tid)
+        if tgid is None:
+            match = BINDER_THREAD_RE.match(self.comms.get(tid, ''))
+            tgid = int(match.group(1)) if match else tid
+        return tgid
+
+    def _add_running(self, tid, t0, t1):
+        for window in self.overlapping(t0, t1):
+            overlap = min(t1, window.end) - max(t0, window.start)
+            if overlap > 0:
+                window.running[tid] = window.running.get(tid, 0) + overlap
+
+    def on_switch(self, ts, cpu, prev_tid, next_tid, next_comm=None):
+        self.event_count += 1
+        self.trace_end = max(self.trace_end, ts)
+        if next_comm:
+            self.comms[next_tid] = next_comm
+        last = self._cpu_last.get(cpu)
+        self._cpu_last[cpu] = (ts, next_tid)
+        if prev_tid is None and last is not None:
+            # compact_sched does not record prev_pid: it is whatever last switched in on this cpu
+            prev_tid = last[1]
+        if last is not None and last[1] == prev_tid and prev_tid and ts > last[0]:
+            self._add_running(prev_tid, last[0], ts)
+        if next_tid in self._by_pid:
+            # Only app main threads get runnable (waiting for a CPU) accounting
+            self._last_in[next_tid] = ts
+            woken = self._waking.pop(next_tid, None)
+            if woken is not None and woken < ts:
+                for window in self.overlapping(woken, ts):
+                    if window.pid == next_tid:
+                        window.main_runnable += min(ts, window.end) - max(woken, window.start)
+
+    def on_waking(self, ts, tid, comm=None):
+        self.event_count += 1
+        self.trace_end = max(self.trace_end, ts)
+        if comm:
+            self.comms.setdefault(tid, comm)
+        if tid in self._by_pid and ts >= self._last_in.get(tid, 0):
+            self._waking[tid] = ts
+
+    def on_binder(self, ts, tid, debug_id, to_proc, to_thread, reply, flags):
+        """binder_transaction: kept only around the app's windows and paired after the pass"""
+        self.event_count += 1
+        self.trace_end = max(self.trace_end, ts)
+        if reply:
+            # The reply to a call made just before onInit may land after it
+            keep = self.window_at(self.tgid_of(to_thread), ts, BIND_TIMEOUT_NS) is not None
+        else:
+            keep = self.window_at(self.tgid_of(tid), ts) is not None or self.window_at(to_proc, ts) is not None
+        if keep:
+            self._binder.append((ts, tid, debug_id, to_proc, to_thread, reply, flags))
+
+    def on_received(self, ts, debug_id):
+        self.event_count += 1
+        self._received[debug_id] = ts
+        if len(self._received) > RECEIVED_BACKLOG:
+            self._received.popitem(last=False)
+
+    def finish(self):
+        """Close the slices still running at the end of the trace, then pair the binder calls"""
+        for ts, tid in self._cpu_last.values():
+            if tid and ts < self.trace_end:
+                self._add_running(tid, ts, self.trace_end)
+        self._cpu_last = {}
+        # A test still waiting for onInit when the capture stopped only counts up to the stop
+        for window in self.windows:
+            if window.init_ts is None and self.trace_end:
+                window.end = max(window.start, min(window.end, self.trace_end))
+        self._pair_binder()
+
+    def _pair_binder(self):
+        """Pair each synchronous app transaction with its reply, in timestamp order"""
+        pending = {}
+        for ts, tid, debug_id, to_proc, to_thread, reply, flags in sorted(self._binder):
+            if reply:
+                stack = pending.get(to_thread)
+                if stack:
+                    sent, dest, sent_id, window = stack.pop()
+                    entry = window.binder_out[dest]
+                    entry[1] += ts - sent
+                    received = self._received.get(sent_id)
+                    if received is not None and sent <= received <= ts:
+                        entry[2] += received - sent
+                continue
+            pid = self.tgid_of(tid)
+            if pid in self._by_pid:
+                window = self.window_at(pid, ts)
+                if window is not None:
+                    entry = window.binder_out.setdefault(to_proc, [0, 0, 0, ts])
+                    entry[0] += 1
+                    if not flags & TF_ONE_WAY:
+                        pending.setdefault(tid, []).append((ts, to_proc, debug_id, window))
+            if to_proc in self._by_pid:
+                window = self.window_at(to_proc, ts)
+                if window is not None:
+                    entry = window.binder_in.setdefault(tid, [0, ts])
+                    entry[0] += 1
+        self._binder = []
+
+    # -- results ---------------------------------------------------------------------------
+
+    def process_name(self, pid):
+        cmdline = self.cmdlines.get(pid)
+        if cmdline:
+            return cmdline
+        return self.comms.get(pid, f"pid {pid}")
+
+    def engine_pids(self, engine, extra=()):
+        pids = set(extra)
+        pids.update(pid for pid, cmdline in self.cmdlines.items() if engine in cmdline)
+        pids.update(tid for tid, comm in self.comms.items() if engine in comm and self.tgid_of(tid) == tid)
+        return pids
+
+    def breakdown(self, window, engine_pids):
+        """dict of phase timings and waits for one window"""
+        engine_calls = [entry for pid, entry in window.binder_out.items() if pid in engine_pids]
+        first_engine = min((entry[3] for entry in engine_calls), default=None)
+        end = window.end
+        main_running = window.running.get(window.pid, 0)
+        return {
+            'test': window.test,
+            'context': window.context,
+            'pid': window.pid,
+            'init_ok': window.init_ok,
+            'total_ms': (end - window.start) / NS_PER_MS,
+            'bind_ms': (first_engine - window.start) / NS_PER_MS if first_engine is not None else None,
+            'init_ms': (window.init_ts - first_engine) / NS_PER_MS
+            if first_engine is not None and window.init_ts is not None else None,
+            'binder_out': sorted(((self.process_name(pid), calls, total / NS_PER_MS, dispatch / NS_PER_MS)
+                                  for pid, (calls, total, dispatch, _first) in window.binder_out.items()),
+                                 key=lambda item: -item[2]),
+            'binder_in': sum(calls for calls, _first in window.binder_in.values()),
+            'engine_in': sum(calls for tid, (calls, _first) in window.binder_in.items()
+                             if self.tgid_of(tid) in engine_pids),
+            'main_running_ms': main_running / NS_PER_MS,
+            'main_runnable_ms': window.main_runnable / NS_PER_MS,
+            'main_blocked_ms': max(0, end - window.start - main_running - window.main_runnable) / NS_PER_MS,
+            'engine_cpu_ms': sum(ns for tid, ns in window.running.items()
+                                 if self.tgid_of(tid) in engine_pids) / NS_PER_MS,
+        }
+
+    def report(self, engine, extra_pids=()):
+        engine_pids = self.engine_pids(engine, extra_pids)
+        return [self.breakdown(window, engine_pids) for window in self.windows], engine_pids
+
+
+# ---------------------------------------------------------------------------
+# Perfetto protobuf
+# ---------------------------------------------------------------------------
+
+def _read_process_tree(analyzer, data, span):
+    for field, _wire, value in iter_fields(data, *span):
+        if field == 1:
+            pid = 0
+            cmdline = []
+            for sub, _sub_wire, sub_value in iter_fields(data, *value):
+                if sub == 1:
+                    pid = sub_value
+                elif sub == 3:
+                    cmdline.append(_text(data, sub_value))
+            if pid:
+                analyzer.add_process(pid, ' '.join(cmdline))
+        elif field == 2:
+            tid = tgid = 0
+            name = None
+            for sub, _sub_wire, sub_value in iter_fields(data, *value):
+                if sub == 1:
+                    tid = sub_value
+                elif sub == 2:
+                    name = _text(data, sub_value)
+                elif sub == 5:
+                    tgid = sub_value
+            analyzer.add_thread(tid, tgid, name)
+
+
+def _read_clock_snapshot(data, span):
+    clocks = {}
+    for field, _wire, value in iter_fields(data, *span):
+        if field == 1:
+            clock_id = timestamp = None
+            for sub, _sub_wire, sub_value in iter_fields(data, *value):
+                if sub == 1:
+                    clock_id = sub_value
+                elif sub == 2:
+                    timestamp = sub_value
+            clocks[clock_id] = timestamp
+    if CLOCK_REALTIME in clocks and CLOCK_BOOTTIME in clocks:
+        return clocks[CLOCK_BOOTTIME] - clocks[CLOCK_REALTIME]
+    return None
+
+
+def _read_android_log(data, span, tags, logs):
+    for field, _wire, value in iter_fields(data, *span):
+        if field != 1:
+            continue
+        pid = tid = ts = 0
+        tag = message = ''
+        for sub, _sub_wire, sub_value in iter_fields(data, *value):
+            if sub == 2:
+                pid = sub_value
+            elif sub == 3:
+                tid = sub_value
+            elif sub == 5:
+                ts = sub_value
+            elif sub == 6:
+                tag = _text(data, sub_value)
+            elif sub == 8:
+                message = _text(data, sub_value)
+        if tag in tags:
+            logs.append((ts, pid, tid, tag, message))
+
+
+def _read_sched_switch(data, span):
+    prev_tid = next_tid = 0
+    next_comm = None
+    for field, _wire, value in iter_fields(data, *span):
+        if field == 2:
+            prev_tid = value
+        elif field == 5:
+            next_comm = _text(data, value)
+        elif field == 6:
+            next_tid = value
+    return prev_tid, next_tid, next_comm
+
+
+def _read_ftrace_bundle(analyzer, data, span):
+    cpu = 0
+    events = []
+    compact = None
+    for field, _wire, value in iter_fields(data, *span):
+        if field == BUNDLE_CPU:
+            cpu = value
+        elif field == BUNDLE_EVENT:
+            events.append(value)
+        elif field == BUNDLE_COMPACT_SCHED:
+            compact = value
+    if compact is not None:
+        _read_compact_sched(analyzer, cpu, data, compact)
+    for event_span in events:
+        ts = tid = 0
+        for field, _wire, value in iter_fields(data, *event_span):
+            if field == EVENT_TIMESTAMP:
+                ts = value
+            elif field == EVENT_PID:
+                tid = value
+            elif field == EVENT_SCHED_SWITCH:
+                prev_tid, next_tid, next_comm = _read_sched_switch(data, value)
+                analyzer.on_switch(ts, cpu, prev_tid, next_tid, next_comm)
+            elif field in (EVENT_SCHED_WAKING, EVENT_SCHED_WAKEUP):
+                woken = 0
+                comm = None
+                for sub, _sub_wire, sub_value in iter_fields(data, *value):
+                    if sub == 1:
+                        comm = _text(data, sub_value)
+                    elif sub == 2:
+                        woken = sub_value
+                analyzer.on_waking(ts, woken, comm)
+            elif field == EVENT_BINDER_TRANSACTION:
+                txn = dict.fromkeys(range(1, 8), 0)
+                for sub, _sub_wire, sub_value in iter_fields(data, *value):
+                    txn[sub] = sub_value
+                analyzer.on_binder(ts, tid, txn[1], txn[3], txn[4], txn[5], txn[7])
+            elif field == EVENT_BINDER_RECEIVED:
+                for sub, _sub_wire, sub_value in iter_fields(data, *value):
+                    if sub == 1:
+                        analyzer.on_received(ts, sub_value)
+
+
+def _read_compact_sched(analyzer, cpu, data, span):
+    """CompactSched: delta-encoded switch/waking columns with interned comms"""
+    columns = {}
+    intern = []
+    for field, wire, value in iter_fields(data, *span):
+        if field == 5:
+            intern.append(_text(data, value))
+        elif wire == WIRE_BYTES:
+            columns.setdefault(field, []).extend(_packed(data, value))
+        else:
+            columns.setdefault(field, []).append(value)
+    ts = 0
+    comm_index = columns.get(6, ())
+    for i, (delta, next_tid) in enumerate(zip(columns.get(1, ()), columns.get(3, ()))):
+        ts += delta
+        comm = intern[comm_index[i]] if i < len(comm_index) and comm_index[i] < len(intern) else None
+        analyzer.on_switch(ts, cpu, None, next_tid, comm)
+    ts = 0
+    for delta, woken in zip(columns.get(7, ()), columns.get(8, ())):
+        ts += delta
+        analyzer.on_waking(ts, woken)
+
+
+def analyze_perfetto(path, analyzer):
+    """Two streaming passes: processes/clocks/logs, then ftrace"""
+    logs = []
+    with open(path, 'rb') as f:
+        for packet in iter_trace_packets(f):
+            for field, _wire, value in iter_fields(packet):
+                if field == PACKET_PROCESS_TREE:
+                    _read_process_tree(analyzer, packet, value)
+                elif field == PACKET_CLOCK_SNAPSHOT and analyzer.clock_offset is None:
+                    analyzer.clock_offset = _read_clock_snapshot(packet, value)
+                elif field == PACKET_ANDROID_LOG:
+                    _read_android_log(packet, value, analyzer.tags, logs)
+    for ts, pid, tid, tag, message in sorted(logs):
+        if ts > REALTIME_THRESHOLD:
+            if analyzer.clock_offset is None:
+                raise TraceFormatError("android.log timestamps are wall-clock and the trace has no clock snapshot")
+            ts += analyzer.clock_offset
+        analyzer.add_log(ts, pid, tid, tag, message)
+    analyzer.finish_windows()
+    if not analyzer.windows:
+        return analyzer
+
+    with open(path, 'rb') as f:
+        for packet in iter_trace_packets(f):
+            for field, _wire, value in iter_fields(packet):
+                if field == PACKET_FTRACE_EVENTS:
+                    _read_ftrace_bundle(analyzer, packet, value)
+    analyzer.finish()
+    return analyzer
+
+
+# ---------------------------------------------------------------------------
+# systrace / ftrace text
+# ---------------------------------------------------------------------------
+
+def read_monotonic_logcat(path, analyzer):
+    """Feed a `logcat -v monotonic` capture (seconds since boot) into pass 1"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if not any(tag in line for tag in analyzer.tags):
+                continue
+            match = MONOTONIC_RE.match(line)
+            if match:
+                seconds, millis, pid, tid, _level, tag, message = match.groups()
+                analyzer.add_log((int(seconds) * 1000 + int(millis)) * NS_PER_MS, int(pid), int(tid), tag,
+                                 message.rstrip('\r\n'))
+
+
+def analyze_systrace(path, analyzer):
+    """One streaming pass over ftrace text lines (plain, or embedded in systrace HTML)"""
+    analyzer.finish_windows()
+    if not analyzer.windows:
+        return analyzer
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            match = FTRACE_LINE_RE.match(line)
+            if match is None:
+                continue
+            comm, tid, tgid, cpu, seconds, fraction, event, args = match.groups()
+            ts = int(seconds) * 1000000000 + int(fraction.ljust(9, '0')[:9])
+            tid = int(tid)
+            if tgid and tgid.isdigit():
+                analyzer.add_thread(tid, int(tgid), comm)
+            if event == 'sched_switch':
+                values = dict(FTRACE_ARG_RE.findall(args))
+                analyzer.on_switch(ts, int(cpu), int(values.get('prev_pid', 0)), int(values.get('next_pid', 0)),
+                                   values.get('next_comm'))
+            elif event in ('sched_waking', 'sched_wakeup'):
+                values = dict(FTRACE_ARG_RE.findall(args))
+                analyzer.on_waking(ts, int(values.get('pid', 0)), values.get('comm'))
+            elif event == 'binder_transaction':
+                values = dict(FTRACE_ARG_RE.findall(args))
+                analyzer.on_binder(ts, tid, int(values['transaction']), int(values.get('dest_proc', 0)),
+                                   int(values.get('dest_thread', 0)), int(values.get('reply', 0)),
+                                   int(values.get('flags', '0'), 16))
+            elif event == 'binder_transaction_received':
+                values = dict(FTRACE_ARG_RE.findall(args))
+                analyzer.on_received(ts, int(values['transaction']))
+    analyzer.finish()
+    return analyzer
+
+
+def is_perfetto_trace(path):
+    with open(path, 'rb') as f:
+        head = f.read(64)
+    return bool(head) and head[0] == (TRACE_PACKET << 3 | WIRE_BYTES) and b'# tracer' not in head
+
+
+def _ms(value):
+    return '-' if value is None else f"{value:.1f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('trace', help='Perfetto protobuf trace, systrace HTML or ftrace text')
+    parser.add_argument('--logcat', metavar='FILE', help='`logcat -v monotonic` capture for systrace/ftrace text')
+    parser.add_argument('--engine', default='ivona', help='substring of the TTS engine process name')
+    parser.add_argument('--engine-pid', type=int, action='append', default=[], metavar='PID',
+                        help='TTS engine pid, when the trace has no process names (repeatable)')
+    args = parser.parse_args()
+
+    analyzer = BinderTraceAnalyzer()
+    if is_perfetto_trace(args.trace):
+        analyze_perfetto(args.trace, analyzer)
+    else:
+        if not args.logcat:
+            print("❌ systrace/ftrace text has no log events; pass --logcat (captured with -v monotonic)")
+            return 2
+        read_monotonic_logcat(args.logcat, analyzer)
+        analyze_systrace(args.trace, analyzer)
+
+    if not analyzer.windows:
+        print(f"❌ No {'/'.join(TAGS)} test headers found in the trace's logs")
+        return 1
+    results, engine_pids = analyzer.report(args.engine, args.engine_pid)
+    engines = ', '.join(f"{analyzer.process_name(pid)} ({pid})" for pid in sorted(engine_pids)) or 'not seen'
+    print(f"{len(results)} TextToSpeech start-ups, {analyzer.event_count} sched/binder events; engine: {engines}")
+    stuck = 0
+    for result in results:
+        status = 'onInit ok' if result['init_ok'] else ('onInit FAILED' if result['init_ok'] is False else 'no onInit')
+        print(f"\n  {result['test']} ({result['context']}, pid {result['pid']}): {status} after {_ms(result['total_ms'])}")
+        if result['bind_ms'] is None:
+            stuck += 1
+            print("    ⚠️  no binder call from the app to the engine: the bind never reached it")
+        else:
+            print(f"    bind   (construct -> first engine call) {_ms(result['bind_ms']):>12}")
+            print(f"    onInit (first engine call -> onInit)    {_ms(result['init_ms']):>12}")
+        for name, calls, total, dispatch in result['binder_out'][:5]:
+            print(f"    -> {name:<36}{calls:>5} calls {total:>9.1f} ms  (dispatch {dispatch:.1f} ms)")
+        print(f"    <- {result['binder_in']} incoming transactions ({result['engine_in']} from the engine)")
+        print(f"    main thread: running {_ms(result['main_running_ms'])}, runnable {_ms(result['main_runnable_ms'])}, "
+              f"blocked {_ms(result['main_blocked_ms'])}; engine CPU {_ms(result['engine_cpu_ms'])}")
+    return 1 if stuck else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Method Call Graph
+Method-level call edges from DEX code items, resolved across every DEX file of an app with
+class-hierarchy analysis for virtual and interface calls. Per-DEX edge tables are cached in
+the content-addressed IndexStore, so after a code change only the DEX files whose bytes
+changed are rescanned.
+"""
+
+import array
+import sys
+from collections import deque
+
+from dex_index import REF_FIELD, REF_METHOD, REF_TYPE
+from index_store import StringTable, StringTableBuilder, rows
+
+KIND_CALLS = b'call'
+
+CALL_DIRECT = 0
+CALL_VIRTUAL = 1
+CLASS_INIT = 2
+
+VIRTUAL_INVOKES = frozenset((0x6e, 0x72, 0x74, 0x78, 0xfa, 0xfb))
+STATIC_INVOKES = frozenset((0x71, 0x77))
+# new-instance and static field access run the target class's static initializer
+INIT_TYPE_OPS = frozenset((0x22,))
+INIT_FIELD_OPS = frozenset(range(0x60, 0x6e))
+
+OBJECT = 'Ljava/lang/Object;'
+CLINIT = '<clinit>()V'
+
+
+def method_key(class_descriptor, name, proto):
+    """Baseline-profile style method key: Lcom/Foo;->bar(I)V"""
+    return f"{class_descriptor}->{name}{proto}"
+
+
+def split_key(key):
+    """Lcom/Foo;->bar(I)V -> ('Lcom/Foo;', 'bar(I)V')"""
+    class_descriptor, _, member = key.partition('->')
+    return class_descriptor, member
+
+
+class DexCallTable:
+    """Every method defined in one DEX file with its code offset and unresolved outgoing edges"""
+
+    def __init__(self, methods):
+        # methods: {key: (code_off, ((edge kind, target key or class descriptor), ...))}
+        self.methods = methods
+        self.by_class = {}
+        for key in methods:
+            class_descriptor, member = split_key(key)
+            self.by_class.setdefault(class_descriptor, set()).add(member)
+
+    @classmethod
+    def scan(cls, dex):
+        types = dex.types
+        method_keys = {}
+
+        def key_of(method_idx):
+            key = method_keys.get(method_idx)
+            if key is None:
+                key = method_keys[method_idx] = method_key(*dex.method_signature(method_idx))
+            return key
+
+        methods = {}
+        for class_def in dex.classes.values():
+            for method_idx, _flags, code_off in dex.class_methods(class_def):
+                edges = []
+                if code_off:
+                    seen = set()
+                    for op, kind, index in dex.iter_code_ops(code_off):
+                        if kind == REF_METHOD:
+                            edge = (CALL_VIRTUAL if op in VIRTUAL_INVOKES else CALL_DIRECT, key_of(index))
+                            if op in STATIC_INVOKES:
+                                init = (CLASS_INIT, types[dex.method_ids[index][0]])
+                                if init not in seen:
+                                    seen.add(init)
+                                    edges.append(init)
+                        elif kind == REF_TYPE and op in INIT_TYPE_OPS:
+                            edge = (CLASS_INIT, types[index])
+                        elif kind == REF_FIELD and op in INIT_FIELD_OPS:
+                            edge = (CLASS_INIT, types[dex.field_ids[index][0]])
+                        else:
+                            continue
+                        if edge not in seen:
+                            seen.add(edge)
+                            edges.append(edge)
+                methods[key_of(method_idx)] = (code_off, tuple(edges))
+        return cls(methods)
+
+
+def call_table_sections(table):
+    strings = StringTableBuilder()
+    methods = array.array('I')
+    edges = array.array('I')
+    for key, (code_off, method_edges) in table.methods.items():
+        for kind, target in method_edges:
+            edges.extend((kind, strings.add(target)))
+        methods.extend((strings.add(key), code_off, len(edges) // 2))
+    return [*strings.sections(), ('methods', 'I', methods), ('edges', 'I', edges)]
+
+
+def load_call_table(sections):
+    strings = StringTable(sections['stroff'], sections['strblob'])
+    edge_rows = rows(sections['edges'], 2)
+    methods = {}
+    start = 0
+    for key, code_off, end in rows(sections['methods'], 3):
+        methods[strings[key]] = (code_off, tuple((kind, strings[target]) for kind, target in edge_rows[start:end]))
+        start = end
+    return DexCallTable(methods)
+
+
+class MethodCallGraph:
+    """Resolved call graph over an open ApkIndex / LogicalApp, built lazily per DEX file"""
+
+    def __init__(self, apk, store=None):
+        self.apk = apk
+        self.classes = apk.classes
+        # Records loaded into the apk's own store share its lifetime
+        self.store = getattr(apk, 'store', None) if store is None else (store or None)
+        self.dex_by_name = {dex.name: dex for dex in apk.dex_indexes}
+        self._tables = {}
+        self._children = None
+        self._descendants = {}
+        self._resolved = {}
+
+    def table(self, dex_name):
+        table = self._tables.get(dex_name)
+        if table is None:
+            dex = self.dex_by_name[dex_name]
+            info = self.apk.entries.get(dex_name)
+            if self.store is None or info is None:
+                table = DexCallTable.scan(dex)
+            else:
+                table = self.store.cached(KIND_CALLS, info, lambda: DexCallTable.scan(dex),
+                                          call_table_sections, load_call_table)
+            self._tables[dex_name] = table
+        return table
+
+    def defined_members(self, class_descriptor):
+        class_def = self.classes.get(class_descriptor)
+        if class_def is None:
+            return ()
+        return self.table(class_def.dex_name).by_class.get(class_descriptor, ())
+
+    def method(self, key):
+        """(dex, code_off, edges) for a method defined in the app, or None"""
+        class_def = self.classes.get(split_key(key)[0])
+        if class_def is None:
+            return None
+        entry = self.table(class_def.dex_name).methods.get(key)
+        if entry is None:
+            return None
+        return self.dex_by_name[class_def.dex_name], entry[0], entry[1]
+
+    def find_definition(self, class_descriptor, member):
+        """Key of the method member resolves to on class_descriptor (walking superclasses), or None"""
+        for ancestor in self.classes.superclass_chain(class_descriptor):
+            if member in self.defined_members(ancestor):
+                return f"{ancestor}->{member}"
+        return None
+
+    def descendants(self, class_descriptor):
+        """App classes that extend or implement class_descriptor, transitively"""
+        found = self._descendants.get(class_descriptor)
+        if found is None:
+            if self._children is None:
+                self._children = {}
+                for descriptor, class_def in self.classes.classes.items():
+                    for parent in (class_def.superclass, *class_def.interfaces):
+                        if parent:
+                            self._children.setdefault(parent, []).append(descriptor)
+            found = []
+            seen = {class_descriptor}
+            stack = [class_descriptor]
+            while stack:
+                for child in self._children.get(stack.pop(), ()):
+                    if child not in seen:
+                        seen.add(child)
+                        found.append(child)
+                        stack.append(child)
+            self._descendants[class_descriptor] = found
+        return found
+
+    def resolve(self, kind, target):
+        """App method keys an edge can reach (several for virtual calls with overrides)"""
+        cache_key = (kind, target)
+        resolved = self._resolved.get(cache_key)
+        if resolved is not None:
+            return resolved
+        if kind == CLASS_INIT:
+            # Initializing a class initializes its superclasses first
+            resolved = tuple(f"{ancestor}->{CLINIT}" for ancestor in self.classes.superclass_chain(target)
+                             if CLINIT in self.defined_members(ancestor))
+        else:
+            class_descriptor, member = split_key(target)
+            found = []
+            definition = self.find_definition(class_descriptor, member)
+            if definition is not None:
+                found.append(definition)
+            if kind == CALL_VIRTUAL and class_descriptor != OBJECT:
+                for descendant in self.descendants(class_descriptor):
+                    if member in self.defined_members(descendant):
+                        found.append(f"{descendant}->{member}")
+            resolved = tuple(found)
+        self._resolved[cache_key] = resolved
+        return resolved
+
+    def callees(self, key):
+        method = self.method(key)
+        if method is None:
+            return ()
+        targets = []
+        for kind, target in method[2]:
+            targets.extend(self.resolve(kind, target))
+        return targets
+
+    def reachable(self, roots, extra_edges=None):
+        """Method keys reachable from roots in BFS order, plus {key: caller} for path reporting
+
+        extra_edges(key, edges), if given, yields further method keys to follow from key, for
+        calls the framework makes on the app's behalf (posted Runnables, listener callbacks).
+        """
+        order = []
+        parents = {}
+        queue = deque()
+        for root in roots:
+            if root not in parents and self.method(root) is not None:
+                parents[root] = None
+                queue.append(root)
+        while queue:
+            key = queue.popleft()
+            order.append(key)
+            callees = self.callees(key)
+            if extra_edges is not None:
+                callees = [*callees, *extra_edges(key, self.method(key)[2])]
+            for callee in callees:
+                if callee not in parents:
+                    parents[callee] = key
+                    queue.append(callee)
+        return order, parents
+
+
+def lifecycle_roots(graph, components, callbacks):
+    """Root method keys for components: <clinit>, no-arg <init> and the named callbacks by component kind
+
+    callbacks maps a component kind ('activity', 'service', ...) to method names; the most
+    derived definition of each name on the component's superclass chain is used.
+    """
+    roots = []
+    for component in components:
+        names = callbacks.get(component.kind)
+        if names is None:
+            continue
+        descriptor = component.descriptor
+        roots.extend(graph.resolve(CLASS_INIT, descriptor))
+        constructor = graph.find_definition(descriptor, '<init>()V')
+        if constructor is not None:
+            roots.append(constructor)
+        for name in names:
+            prefix = name + '('
+            for ancestor in graph.classes.superclass_chain(descriptor):
+                members = [member for member in graph.defined_members(ancestor) if member.startswith(prefix)]
+                if members:
+                    roots.extend(f"{ancestor}->{member}" for member in sorted(members))
+                    break
+    return roots
+
+
+def call_path(parents, key):
+    """Root-first list of method keys leading to key"""
+    path = []
+    while key is not None:
+        path.append(key)
+        key = parents.get(key)
+    return path[::-1]
+
+
+def main():
+    if len(sys.argv) < 3:
+        print(f"Usage: {sys.argv[0]} <apk | app.aab | splits-dir> <Lcom/Foo;->method(...)V> ...")
+        return 2
+
+    from app_bundle import open_app
+
+    with open_app(sys.argv[1]) as apk:
+        graph = MethodCallGraph(apk)
+        order, parents = graph.reachable(sys.argv[2:])
+    print(f"{len(order)} methods reachable")
+    for key in order:
+        print(f"  {key}  <- {parents[key] or '(root)'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Cold-Start Cost Model
+Scores a build's cold start from what is actually in the APK: DEX bytes the runtime maps
+and verifies, classes in the start-up reference closure (and how many sit outside the
+primary DEX), views inflated by the layouts the start-up classes reference, and the size
+and compression of resources.arsc. The score is an estimate in milliseconds on a
+mid-range device; it is meant for comparing builds, not for predicting wall-clock time.
+
+    python3 cold_start_model.py app-debug.apk --json cold-start.json
+    python3 cold_start_model.py app-debug.apk --baseline main-cold-start.json --max-regression 5
+"""
+
+import argparse
+import json
+import sys
+import zipfile
+
+from app_bundle import open_app
+from dex_index import REF_FIELD, REF_LITERAL
+from layout_inflation import SPECIAL_TAGS, LayoutInflationChecker
+from multidex_placement import ClassReferenceGraph, startup_entry_points
+from unused_resources import R_CLASS_RE
+
+MB = 1 << 20
+KB = 1 << 10
+
+# (feature, bytes or items per unit, unit label, estimated ms per unit)
+COST_MODEL = (
+    ('process_start', 1, 'process', 120.0),
+    ('dex_bytes', MB, 'MB', 2.0),
+    ('startup_classes', 1, 'class', 0.02),
+    ('startup_code_bytes', KB, 'KB', 0.05),
+    ('startup_classes_secondary', 1, 'class', 0.01),
+    ('layout_nodes', 1, 'view', 0.1),
+    ('arsc_bytes', MB, 'MB', 1.0),
+    # resources.arsc that is not STORED has to be inflated into memory instead of mmapped
+    ('arsc_compressed_bytes', MB, 'MB', 8.0),
+)
+
+
+def startup_layouts(apk, graph, closure):
+    """Layout res ids referenced by code in the start-up closure, plus everything they <include>"""
+    resources = apk.resources
+    layout_names = {entry.key: res_id for res_id, entry in resources.entries.items() if entry.type_name == 'layout'}
+    found = set()
+    for descriptor in closure:
+        class_def = apk.classes.get(descriptor)
+        dex = graph.dex_by_name[class_def.dex_name]
+        for _method_idx, _flags, code_off in dex.class_methods(class_def):
+            if not code_off:
+                continue
+            for kind, index in dex.iter_code_refs(code_off):
+                if kind == REF_LITERAL:
+                    entry = resources.entries.get(index)
+                    if entry is not None and entry.type_name == 'layout':
+                        found.add(index)
+                elif kind == REF_FIELD:
+                    class_idx, _type_idx, name_idx = dex.field_ids[index]
+                    match = R_CLASS_RE.search(dex.types[class_idx])
+                    if match and match.group(1) == 'layout':
+                        res_id = layout_names.get(dex.string(name_idx))
+                        if res_id is not None:
+                            found.add(res_id)
+    return found
+
+
+def layout_files(apk, res_id):
+    entry = apk.resources.entries[res_id]
+    return sorted(name for name in entry.files if name in apk.entries)
+
+
+def count_layout_nodes(apk, layout_ids):
+    """Views inflated for layout_ids, following <include layout=...> into the included layouts"""
+    checker = LayoutInflationChecker(apk)
+    resources = apk.resources
+    pending = list(layout_ids)
+    seen = set()
+    nodes = 0
+    while pending:
+        res_id = pending.pop()
+        if res_id in seen:
+            continue
+        seen.add(res_id)
+        files = layout_files(apk, res_id)
+        if not files:
+            continue
+        # The first (default-configuration) file stands in for whatever the device picks
+        summary = checker.load([files[0]]).get(files[0], ())
+        for tag, _line, _class_attr, refs in summary:
+            if tag not in SPECIAL_TAGS:
+                nodes += 1
+            for attr_name, _value_type, ref in refs:
+                entry = resources.entries.get(ref)
+                if attr_name == 'layout' and entry is not None and entry.type_name == 'layout':
+                    pending.append(ref)
+    return nodes, len(seen)
+
+
+def measure(apk):
+    """Return the model's input features for an open ApkIndex / LogicalApp"""
+    entries = apk.entries
+    dex_names = apk.dex_names
+    features = {
+        'process_start': 1,
+        'dex_files': len(dex_names),
+        'dex_bytes': sum(entries[name].file_size for name in dex_names),
+        'primary_dex_bytes': entries[dex_names[0]].file_size if dex_names else 0,
+    }
+
+    graph = ClassReferenceGraph(apk)
+    roots = startup_entry_points(apk.manifest, apk.package_name or '')
+    closure = graph.closure(roots)
+    primary = dex_names[0] if dex_names else None
+    features['startup_roots'] = len(roots)
+    features['startup_classes'] = len(closure)
+    features['startup_code_bytes'] = sum(graph.byte_cost(descriptor) for descriptor in closure)
+    features['startup_classes_secondary'] = sum(1 for descriptor in closure
+                                                if apk.classes.get(descriptor).dex_name != primary)
+
+    # App bundles carry resources.pb; bundletool writes it out as a STORED resources.arsc
+    tables = [name for name in entries if name.rpartition('/')[2] in ('resources.arsc', 'resources.pb')]
+    if tables:
+        layout_nodes, layout_count = count_layout_nodes(apk, startup_layouts(apk, graph, closure))
+    else:
+        layout_nodes = layout_count = 0
+    features['startup_layouts'] = layout_count
+    features['layout_nodes'] = layout_nodes
+    features['arsc_bytes'] = sum(entries[name].file_size for name in tables)
+    features['arsc_compressed_bytes'] = sum(entries[name].file_size for name in tables
+                                            if name.endswith('.arsc')
+                                            and entries[name].compress_type != zipfile.ZIP_STORED)
+    return features
+
+
+def score(features, model=COST_MODEL):
+    """Return (total ms, [(feature, value, unit label, ms)]) for the model's cost terms"""
+    breakdown = []
+    for feature, unit_size, unit_label, ms_per_unit in model:
+        value = features.get(feature, 0)
+        breakdown.append((feature, value / unit_size, unit_label, value / unit_size * ms_per_unit))
+    return sum(cost for *_rest, cost in breakdown), breakdown
+
+
+def evaluate(apk_path):
+    """(features, total, breakdown) for an APK, .aab or splits directory"""
+    with open_app(apk_path) as apk:
+        features = measure(apk)
+    total, breakdown = score(features)
+    return features, total, breakdown
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('apk', help='APK, .aab or directory of split APKs')
+    parser.add_argument('--json', metavar='FILE', help='write features and score for later --baseline comparisons')
+    parser.add_argument('--baseline', metavar='FILE', help='--json output of a previous build to compare against')
+    parser.add_argument('--max-regression', type=float, default=5.0, metavar='PCT',
+                        help='fail when the score grows by more than PCT percent over the baseline')
+    args = parser.parse_args()
+
+    features, total, breakdown = evaluate(args.apk)
+
+    print(f"Cold-start cost: {total:.1f} ms (estimated)")
+    for feature, value, unit_label, cost in breakdown:
+        print(f"  {feature:<28}{value:>12.2f} {unit_label:<8}{cost:>9.1f} ms")
+    print(f"  ({features['dex_files']} DEX files, {features['startup_roots']} start-up roots, "
+          f"{features['startup_layouts']} start-up layouts)")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'apk': args.apk, 'score_ms': round(total, 3), 'features': features}, f, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    base_total = baseline['score_ms']
+    change = (total - base_total) / base_total * 100 if base_total else 0.0
+    print(f"\nBaseline {base_total:.1f} ms -> {total:.1f} ms ({change:+.1f}%)")
+    _base, base_breakdown = score(baseline['features'])
+    for (feature, _value, _unit, cost), (_f, _v, _u, base_cost) in zip(breakdown, base_breakdown):
+        if cost - base_cost >= 0.05:
+            print(f"  {feature:<28}{cost - base_cost:>+9.1f} ms")
+    if change > args.max_regression:
+        print(f"❌ Cold-start regression above {args.max_regression:g}%")
+        return 1
+    print("✅ Within the cold-start budget")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
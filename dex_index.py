@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+DEX Index
+Parses the id tables of a classes*.dex file so classes can be resolved by descriptor
+instead of grepping the raw bytes
+"""
+
+import struct
+
+DEX_MAGIC = b'dex\n'
+NO_INDEX = 0xFFFFFFFF
+HEADER_FORMAT = '<8sI20sIIIIII' + 'II' * 7
+
+
+REF_STRING = 'string'
+REF_TYPE = 'type'
+REF_FIELD = 'field'
+REF_METHOD = 'method'
+REF_LITERAL = 'literal'
+
+
+def _opcode_tables():
+    """Code-unit length and reference kind of every Dalvik opcode"""
+    units = [1] * 256
+    kinds = [None] * 256
+    for op, size in ((0x02, 2), (0x03, 3), (0x05, 2), (0x06, 3), (0x08, 2), (0x09, 3),
+                     (0x13, 2), (0x14, 3), (0x15, 2), (0x16, 2), (0x17, 3), (0x18, 5), (0x19, 2),
+                     (0x1a, 2), (0x1b, 3), (0x1c, 2), (0x1f, 2), (0x20, 2), (0x22, 2), (0x23, 2),
+                     (0x24, 3), (0x25, 3), (0x26, 3), (0x29, 2), (0x2a, 3), (0x2b, 3), (0x2c, 3),
+                     (0xfa, 4), (0xfb, 4), (0xfc, 3), (0xfd, 3), (0xfe, 2), (0xff, 2)):
+        units[op] = size
+    for first, last, size in ((0x2d, 0x3d, 2), (0x44, 0x6d, 2), (0x6e, 0x72, 3), (0x74, 0x78, 3),
+                              (0x90, 0xaf, 2), (0xd0, 0xe2, 2)):
+        for op in range(first, last + 1):
+            units[op] = size
+    for op in (0x1a, 0x1b):
+        kinds[op] = REF_STRING
+    for op in (0x1c, 0x1f, 0x20, 0x22, 0x23, 0x24, 0x25):
+        kinds[op] = REF_TYPE
+    for op in range(0x52, 0x6e):
+        kinds[op] = REF_FIELD
+    for op in (*range(0x6e, 0x73), *range(0x74, 0x79), 0xfa, 0xfb):
+        kinds[op] = REF_METHOD
+    kinds[0x14] = REF_LITERAL
+    kinds[0x15] = REF_LITERAL
+    return bytes(units), kinds
+
+
+OPCODE_UNITS, OPCODE_REF_KINDS = _opcode_tables()
+
+
+class DexFormatError(Exception):
+    pass
+
+
+def read_uleb128(data, pos):
+    """Return (value, new_pos) for the unsigned LEB128 at pos"""
+    result = 0
+    shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def iter_instructions(insns):
+    """Yield (pos, opcode) for each instruction in a code unit tuple, skipping inline payloads"""
+    pos = 0
+    end = len(insns)
+    while pos < end:
+        unit = insns[pos]
+        op = unit & 0xFF
+        if op == 0 and unit:
+            if unit == 0x0100:
+                pos += insns[pos + 1] * 2 + 4
+            elif unit == 0x0200:
+                pos += insns[pos + 1] * 4 + 2
+            elif unit == 0x0300:
+                pos += (insns[pos + 1] * (insns[pos + 2] | (insns[pos + 3] << 16)) + 1) // 2 + 4
+            else:
+                pos += 1
+            continue
+        yield pos, op
+        pos += OPCODE_UNITS[op]
+
+
+def descriptor_to_class_name(descriptor):
+    """Lcom/example/Foo; -> com.example.Foo"""
+    if descriptor.startswith('L') and descriptor.endswith(';'):
+        return descriptor[1:-1].replace('/', '.')
+    return descriptor
+
+
+def class_name_to_descriptor(class_name):
+    """com.example.Foo -> Lcom/example/Foo;"""
+    return 'L' + class_name.replace('.', '/') + ';'
+
+
+class ClassDef:
+    __slots__ = ('descriptor', 'superclass', 'access_flags', 'interfaces', 'class_data_off', 'dex_name')
+
+    def __init__(self, descriptor, superclass, access_flags, interfaces, class_data_off, dex_name):
+        self.descriptor = descriptor
+        self.superclass = superclass
+        self.access_flags = access_flags
+        self.interfaces = interfaces
+        self.class_data_off = class_data_off
+        self.dex_name = dex_name
+
+
+class DexIndex:
+    def __init__(self, data, name='classes.dex'):
+        if data[:4] != DEX_MAGIC:
+            raise DexFormatError(f"{name}: invalid DEX magic {bytes(data[:4]).hex()}")
+        self.data = memoryview(data)
+        self.name = name
+        self.version = bytes(data[4:7]).decode('ascii', errors='ignore')
+        (_magic, _checksum, _signature, self.file_size, _header_size, _endian,
+         _link_size, _link_off, self.map_off,
+         string_ids_size, string_ids_off,
+         type_ids_size, type_ids_off,
+         proto_ids_size, proto_ids_off,
+         field_ids_size, field_ids_off,
+         method_ids_size, method_ids_off,
+         class_defs_size, class_defs_off,
+         self.data_size, self.data_off) = struct.unpack_from(HEADER_FORMAT, data, 0)
+
+        self.string_offsets = struct.unpack_from(f'<{string_ids_size}I', data, string_ids_off)
+        self.type_string_ids = struct.unpack_from(f'<{type_ids_size}I', data, type_ids_off)
+        self.proto_ids = list(struct.iter_unpack('<III', data[proto_ids_off:proto_ids_off + proto_ids_size * 12]))
+        self.field_ids = list(struct.iter_unpack('<HHI', data[field_ids_off:field_ids_off + field_ids_size * 8]))
+        self.method_ids = list(struct.iter_unpack('<HHI', data[method_ids_off:method_ids_off + method_ids_size * 8]))
+        self.class_def_rows = list(struct.iter_unpack(
+            '<8I', data[class_defs_off:class_defs_off + class_defs_size * 32]))
+
+        self._strings = [None] * string_ids_size
+        self._types = None
+        self._classes = None
+
+    def string(self, index):
+        """Decode string_ids[index] (MUTF-8) with caching"""
+        cached = self._strings[index]
+        if cached is None:
+            pos = self.string_offsets[index]
+            _utf16_size, pos = read_uleb128(self.data, pos)
+            end = pos
+            data = self.data
+            while data[end] != 0:
+                end += 1
+            raw = bytes(data[pos:end]).replace(b'\xc0\x80', b'\x00')
+            try:
+                cached = raw.decode('utf-8', errors='surrogatepass')
+            except UnicodeDecodeError:
+                cached = raw.decode('utf-8', errors='replace')
+            self._strings[index] = cached
+        return cached
+
+    @property
+    def types(self):
+        """Type descriptors indexed by type_idx"""
+        if self._types is None:
+            self._types = [self.string(idx) for idx in self.type_string_ids]
+        return self._types
+
+    def type_list(self, offset):
+        if not offset:
+            return ()
+        size = struct.unpack_from('<I', self.data, offset)[0]
+        types = self.types
+        return tuple(types[idx] for idx in struct.unpack_from(f'<{size}H', self.data, offset + 4))
+
+    @property
+    def classes(self):
+        """Dict of descriptor -> ClassDef for every class defined in this file"""
+        if self._classes is None:
+            types = self.types
+            classes = {}
+            for (class_idx, access_flags, superclass_idx, interfaces_off,
+                 _source_file, _annotations, class_data_off, _static_values) in self.class_def_rows:
+                descriptor = types[class_idx]
+                classes[descriptor] = ClassDef(
+                    descriptor,
+                    types[superclass_idx] if superclass_idx != NO_INDEX else None,
+                    access_flags,
+                    self.type_list(interfaces_off),
+                    class_data_off,
+                    self.name,
+                )
+            self._classes = classes
+        return self._classes
+
+    def class_methods(self, class_def):
+        """Return [(method_idx, access_flags, code_off)] for the direct and virtual methods of class_def"""
+        if not class_def.class_data_off:
+            return []
+        data = self.data
+        pos = class_def.class_data_off
+        static_fields, pos = read_uleb128(data, pos)
+        instance_fields, pos = read_uleb128(data, pos)
+        direct_methods, pos = read_uleb128(data, pos)
+        virtual_methods, pos = read_uleb128(data, pos)
+        for _ in range((static_fields + instance_fields) * 2):
+            _value, pos = read_uleb128(data, pos)
+        methods = []
+        for count in (direct_methods, virtual_methods):
+            method_idx = 0
+            for _ in range(count):
+                diff, pos = read_uleb128(data, pos)
+                access_flags, pos = read_uleb128(data, pos)
+                code_off, pos = read_uleb128(data, pos)
+                method_idx += diff
+                methods.append((method_idx, access_flags, code_off))
+        return methods
+
+    def code_item(self, code_off):
+        """Return (registers_size, ins_size, outs_size, tries_size, insns tuple) for a code_item"""
+        registers, ins, outs, tries, _debug_info_off, insns_size = struct.unpack_from('<HHHHII', self.data, code_off)
+        insns = struct.unpack_from(f'<{insns_size}H', self.data, code_off + 16)
+        return registers, ins, outs, tries, insns
+
+    def code_size(self, code_off):
+        """Approximate bytes used by a code_item: header, instructions and try table"""
+        _registers, _ins, _outs, tries, _debug_info_off, insns_size = struct.unpack_from(
+            '<HHHHII', self.data, code_off)
+        size = 16 + insns_size * 2
+        if tries:
+            size += (insns_size & 1) * 2 + tries * 8
+        return size
+
+    def iter_code_refs(self, code_off):
+        """Yield (kind, index) for every string/type/field/method reference and 32-bit literal in a method"""
+        for _op, kind, index in self.iter_code_ops(code_off):
+            yield kind, index
+
+    def iter_code_ops(self, code_off):
+        """Like iter_code_refs, but yields (opcode, kind, index) so callers can tell invoke kinds apart"""
+        insns = self.code_item(code_off)[4]
+        pos = 0
+        end = len(insns)
+        units_table = OPCODE_UNITS
+        kinds = OPCODE_REF_KINDS
+        while pos < end:
+            unit = insns[pos]
+            op = unit & 0xFF
+            if op == 0 and unit:
+                # packed-switch / sparse-switch / fill-array-data payloads live inline in insns
+                if unit == 0x0100:
+                    pos += insns[pos + 1] * 2 + 4
+                elif unit == 0x0200:
+                    pos += insns[pos + 1] * 4 + 2
+                elif unit == 0x0300:
+                    width = insns[pos + 1]
+                    count = insns[pos + 2] | (insns[pos + 3] << 16)
+                    if width == 4:
+                        for i in range(count):
+                            yield 0, REF_LITERAL, insns[pos + 4 + i * 2] | (insns[pos + 5 + i * 2] << 16)
+                    pos += (count * width + 1) // 2 + 4
+                else:
+                    pos += 1
+                continue
+            kind = kinds[op]
+            if kind is not None and pos + 1 < end:
+                if op == 0x1b or op == 0x14:
+                    yield op, kind, insns[pos + 1] | (insns[pos + 2] << 16)
+                elif op == 0x15:
+                    yield op, kind, insns[pos + 1] << 16
+                else:
+                    yield op, kind, insns[pos + 1]
+            pos += units_table[op]
+
+    def method_signature(self, method_idx):
+        """Return (class descriptor, method name, proto descriptor) for method_ids[method_idx]"""
+        class_idx, proto_idx, name_idx = self.method_ids[method_idx]
+        return self.types[class_idx], self.string(name_idx), self.proto_descriptor(proto_idx)
+
+    def proto_descriptor(self, proto_idx):
+        _shorty_idx, return_type_idx, parameters_off = self.proto_ids[proto_idx]
+        return '(' + ''.join(self.type_list(parameters_off)) + ')' + self.types[return_type_idx]
+
+
+class ClassIndex:
+    """Merged class view over every DEX file in an APK"""
+
+    def __init__(self, dex_indexes):
+        self.dex_indexes = list(dex_indexes)
+        self.classes = {}
+        for dex in self.dex_indexes:
+            for descriptor, class_def in dex.classes.items():
+                # The runtime loads the first definition it finds, in classes, classes2, ... order
+                self.classes.setdefault(descriptor, class_def)
+
+    def __contains__(self, descriptor):
+        return descriptor in self.classes
+
+    def get(self, descriptor):
+        return self.classes.get(descriptor)
+
+    def superclass_chain(self, descriptor):
+        """Yield descriptors from descriptor up through every superclass defined in the APK"""
+        seen = set()
+        while descriptor and descriptor not in seen:
+            seen.add(descriptor)
+            yield descriptor
+            class_def = self.classes.get(descriptor)
+            if class_def is None:
+                return
+            descriptor = class_def.superclass
+
+    def is_subclass(self, descriptor, ancestor):
+        return ancestor in self.superclass_chain(descriptor)
@@ -0,0 +1,473 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Index Store
+Persists parsed DEX, resources.arsc and AndroidManifest.xml indexes keyed by the ZIP entry's
+CRC-32 and uncompressed size, so a byte-identical classes2.dex (or resource table) seen in
+any earlier APK is loaded with mmap instead of being inflated and parsed again.
+
+Records are a flat sectioned format: a header, a section table, then 8-byte aligned typed
+arrays that load as zero-copy memoryview casts over the mapped file.
+"""
+
+import array
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import binary_xml
+from arsc_table import ArscTable, ResourceEntry
+from dex_index import DexIndex, HEADER_FORMAT, read_uleb128
+
+# Bump whenever any *_sections() layout changes: records from other versions are re-parsed
+STORE_VERSION = 2
+STORE_MAGIC = b'APKIDX' + struct.pack('<H', STORE_VERSION)
+HEADER = struct.Struct('<8s4sI')
+SECTION = struct.Struct('<8s1s7xQQ')
+NONE = 0xFFFFFFFF
+
+KIND_DEX = b'dex '
+KIND_ARSC = b'arsc'
+KIND_XML = b'axml'
+
+STORE_ENV = 'APK_INDEX_STORE'
+STORE_MAX_ENV = 'APK_INDEX_STORE_MAX_MB'
+DEFAULT_ROOT = os.path.join(os.path.expanduser('~'), '.cache', 'apk-index-store')
+# Least recently used records are evicted once the store grows past this
+DEFAULT_MAX_MB = 512
+
+
+class StoreFormatError(Exception):
+    pass
+
+
+def entry_key(info):
+    """Content key of a ZipInfo: CRC-32 plus uncompressed size"""
+    return f"{info.CRC:08x}-{info.file_size:x}"
+
+
+def write_record(path, kind, sections):
+    """Atomically write [(name, typecode, array or bytes)] as one record file"""
+    table_size = HEADER.size + SECTION.size * len(sections)
+    offset = (table_size + 7) & ~7
+    layout = []
+    for name, typecode, values in sections:
+        raw = values.tobytes() if isinstance(values, array.array) else bytes(values)
+        itemsize = array.array(typecode).itemsize
+        layout.append((name, typecode, offset, len(raw) // itemsize, raw))
+        offset = (offset + len(raw) + 7) & ~7
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(STORE_MAGIC, kind, len(layout)))
+            for name, typecode, section_offset, count, _raw in layout:
+                f.write(SECTION.pack(name.encode('ascii'), typecode.encode('ascii'), section_offset, count))
+            for _name, _typecode, section_offset, _count, raw in layout:
+                f.write(b'\x00' * (section_offset - f.tell()))
+                f.write(raw)
+        os.chmod(temp_path, 0o644)
+        # Concurrent validators may race on the same key; whichever rename lands last wins
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def read_record(path, kind):
+    """Map a record file; return (mmap, {name: memoryview cast to its typecode})"""
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    sections = {}
+    try:
+        if len(view) < HEADER.size:
+            raise StoreFormatError(f"{path}: truncated record")
+        magic, record_kind, count = HEADER.unpack_from(view, 0)
+        if magic != STORE_MAGIC or record_kind != kind:
+            raise StoreFormatError(f"{path}: not a version {STORE_VERSION} {kind.decode().strip()} record")
+        for i in range(count):
+            name, typecode, offset, length = SECTION.unpack_from(view, HEADER.size + i * SECTION.size)
+            typecode = typecode.decode('ascii')
+            itemsize = array.array(typecode).itemsize
+            if offset + length * itemsize > len(view):
+                raise StoreFormatError(f"{path}: section {name.rstrip(bytes(1))!r} out of bounds")
+            sections[name.rstrip(b'\x00').decode('ascii')] = view[offset:offset + length * itemsize].cast(typecode)
+    except BaseException:
+        view.release()
+        close_record(mm, sections)
+        raise
+    # The section views keep the mapping exported on their own
+    view.release()
+    return mm, sections
+
+
+def close_record(mm, sections):
+    """Release a mapped record's section views and unmap it"""
+    for view in sections.values():
+        view.release()
+    try:
+        mm.close()
+    except BufferError:
+        # Something still holds a slice of the mapping; it is unmapped when that is collected
+        pass
+
+
+class StringTable:
+    """Read-only sequence of strings stored as UTF-8 blob + end offsets, decoded on access"""
+
+    def __init__(self, offsets, blob, count=None):
+        self.offsets = offsets
+        self.blob = blob
+        self.count = len(offsets) - 1 if count is None else count
+        self._cache = [None] * self.count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        value = self._cache[index]
+        if value is None:
+            raw = bytes(self.blob[self.offsets[index]:self.offsets[index + 1]])
+            try:
+                value = raw.decode('utf-8', errors='surrogatepass')
+            except UnicodeDecodeError:
+                value = raw.decode('utf-8', errors='replace')
+            self._cache[index] = value
+        return value
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+
+class StringTableBuilder:
+    def __init__(self):
+        self.ids = {}
+        self.offsets = array.array('I', [0])
+        self.blob = bytearray()
+
+    def add(self, value):
+        """Return the index of value (None -> NONE), appending it on first use"""
+        if value is None:
+            return NONE
+        index = self.ids.get(value)
+        if index is None:
+            index = self.ids[value] = len(self.offsets) - 1
+            self.blob += value.encode('utf-8', errors='surrogatepass')
+            self.offsets.append(len(self.blob))
+        return index
+
+    def add_raw(self, raw):
+        """Append already-encoded bytes without de-duplication (keeps DEX string indexes aligned)"""
+        self.blob += raw
+        self.offsets.append(len(self.blob))
+
+    def sections(self):
+        return [('stroff', 'I', self.offsets), ('strblob', 'B', self.blob)]
+
+
+def rows(flat, width):
+    """List of width-tuples over a flat u32 section, the shape DexIndex builds with iter_unpack"""
+    return list(zip(*[iter(flat)] * width))
+
+
+def _flatten(rows, width):
+    flat = array.array('I')
+    for row in rows:
+        flat.extend(row[:width])
+    return flat
+
+
+class StoredDexIndex(DexIndex):
+    """DexIndex backed by a mapped record: raw DEX bytes, pre-split strings and id tables"""
+
+    def __init__(self, sections, name='classes.dex'):
+        data = sections['dex']
+        self.data = data
+        self.name = name
+        self.version = bytes(data[4:7]).decode('ascii', errors='ignore')
+        header = struct.unpack_from(HEADER_FORMAT, data, 0)
+        self.file_size, self.map_off = header[3], header[8]
+        self.data_size, self.data_off = header[21], header[22]
+        self.string_offsets = sections['strdex']
+        self.type_string_ids = sections['types']
+        self.proto_ids = rows(sections['protos'], 3)
+        self.field_ids = rows(sections['fields'], 3)
+        self.method_ids = rows(sections['methods'], 3)
+        self.class_def_rows = rows(sections['classes'], 8)
+        self._string_table = StringTable(sections['stroff'], sections['strblob'])
+        self._strings = self._string_table._cache
+        self._types = None
+        self._classes = None
+
+    def string(self, index):
+        cached = self._strings[index]
+        return cached if cached is not None else self._string_table[index]
+
+
+def dex_sections(dex):
+    """Record sections for a parsed DexIndex"""
+    raw = bytes(dex.data)
+    strings = StringTableBuilder()
+    for offset in dex.string_offsets:
+        _utf16_size, pos = read_uleb128(raw, offset)
+        end = raw.find(b'\x00', pos)
+        # MUTF-8 encodes U+0000 as C0 80; normalise so the stored blob decodes as plain UTF-8
+        strings.add_raw(raw[pos:end].replace(b'\xc0\x80', b'\x00'))
+    return [
+        ('dex', 'B', raw),
+        ('strdex', 'I', array.array('I', dex.string_offsets)),
+        *strings.sections(),
+        ('types', 'I', array.array('I', dex.type_string_ids)),
+        ('protos', 'I', _flatten(dex.proto_ids, 3)),
+        ('fields', 'I', _flatten(dex.field_ids, 3)),
+        ('methods', 'I', _flatten(dex.method_ids, 3)),
+        ('classes', 'I', _flatten(dex.class_def_rows, 8)),
+    ]
+
+
+def arsc_sections(table):
+    """Record sections for a parsed ArscTable"""
+    strings = StringTableBuilder()
+    # Global strings first, in pool order, so they stay addressable by their pool index
+    for value in table.global_strings:
+        strings.add_raw(value.encode('utf-8', errors='surrogatepass'))
+    global_count = len(table.global_strings)
+    packages = array.array('I')
+    for package_id, name in table.packages.items():
+        packages.extend((package_id, strings.add(name)))
+    entries = array.array('I')
+    references = array.array('I')
+    files = array.array('I')
+    for entry in table.entries.values():
+        references.extend(sorted(entry.references))
+        files.extend(strings.add(path) for path in sorted(entry.files))
+        entries.extend((entry.res_id, strings.add(entry.type_name), strings.add(entry.key), entry.size,
+                        entry.configs, len(references), len(files)))
+    return [
+        ('meta', 'I', array.array('I', (table.size, global_count))),
+        *strings.sections(),
+        ('packages', 'I', packages),
+        ('entries', 'I', entries),
+        ('refs', 'I', references),
+        ('files', 'I', files),
+    ]
+
+
+def load_arsc(sections):
+    """Rebuild an ArscTable from its record without walking any chunks"""
+    size, global_count = sections['meta']
+    strings = StringTable(sections['stroff'], sections['strblob'])
+    table = ArscTable.__new__(ArscTable)
+    table.size = size
+    table.global_strings = StringTable(sections['stroff'], sections['strblob'], global_count)
+    packages = sections['packages']
+    table.packages = {packages[i]: strings[packages[i + 1]] for i in range(0, len(packages), 2)}
+    table.entries = {}
+    references = sections['refs']
+    files = sections['files']
+    refs_start = files_start = 0
+    for res_id, type_name, key, entry_size, configs, refs_end, files_end in rows(sections['entries'], 7):
+        entry = ResourceEntry(res_id, strings[type_name], strings[key])
+        entry.size = entry_size
+        entry.configs = configs
+        entry.references = set(references[refs_start:refs_end])
+        entry.files = {strings[i] for i in files[files_start:files_end]}
+        table.entries[res_id] = entry
+        refs_start, files_start = refs_end, files_end
+    return table
+
+
+def xml_sections(root):
+    """Record sections for a parsed binary XML tree (pre-order nodes with parent links)"""
+    strings = StringTableBuilder()
+    nodes = array.array('I')
+    attributes = array.array('I')
+    index = {}
+    for element in root.iter():
+        index[id(element)] = len(index)
+        parent = index[id(element.parent)] if element.parent is not None else NONE
+        for attribute in element.attributes:
+            attributes.extend((strings.add(attribute.namespace), strings.add(attribute.name),
+                               attribute.resource_id if attribute.resource_id is not None else NONE,
+                               strings.add(attribute.raw), attribute.type, attribute.data))
+        nodes.extend((parent, strings.add(element.tag), strings.add(element.namespace), element.line,
+                      len(attributes) // 6))
+    return [*strings.sections(), ('nodes', 'I', nodes), ('attrs', 'I', attributes)]
+
+
+def load_xml(sections):
+    """Rebuild the XmlElement tree of a binary XML record"""
+    strings = StringTable(sections['stroff'], sections['strblob'])
+
+    def string(index):
+        return None if index == NONE else strings[index]
+
+    attribute_rows = rows(sections['attrs'], 6)
+    elements = []
+    attr_start = 0
+    for parent, tag, namespace, line, attr_end in rows(sections['nodes'], 5):
+        attributes = []
+        for i in range(attr_start, attr_end):
+            ns, name, resource_id, raw, value_type, data = attribute_rows[i]
+            attributes.append(binary_xml.XmlAttribute(string(ns), string(name),
+                                                      None if resource_id == NONE else resource_id,
+                                                      string(raw), value_type, data))
+        attr_start = attr_end
+        element = binary_xml.XmlElement(string(tag), string(namespace), line, attributes,
+                                        elements[parent] if parent != NONE else None)
+        if element.parent is not None:
+            element.parent.children.append(element)
+        elements.append(element)
+    if not elements:
+        raise StoreFormatError("empty XML record")
+    return elements[0]
+
+
+class IndexStore:
+    """Directory of index records named <kind>-<crc>-<size>.idx, capped at max_mb with LRU eviction
+
+    Values loaded from the store are views over mapped record files: close() the store only
+    once they are no longer used.
+    """
+
+    def __init__(self, root=None, max_mb=None):
+        self.root = root or store_root() or DEFAULT_ROOT
+        if max_mb is None:
+            max_mb = float(os.environ.get(STORE_MAX_ENV) or DEFAULT_MAX_MB)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self._records = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Unmap every record this store has loaded"""
+        for mm, sections in self._records:
+            close_record(mm, sections)
+        self._records = []
+
+    def path_for(self, kind, info):
+        return os.path.join(self.root, f"{kind.decode().strip()}-{entry_key(info)}.idx")
+
+    def cached(self, kind, info, parse, to_sections, load):
+        """load() the record for (kind, entry) or parse(), persist with to_sections() and return it"""
+        path = self.path_for(kind, info)
+        try:
+            mm, sections = read_record(path, kind)
+        except (OSError, ValueError, StoreFormatError, struct.error):
+            pass
+        else:
+            try:
+                value = load(sections)
+            except (ValueError, KeyError, IndexError, StoreFormatError, struct.error):
+                close_record(mm, sections)
+            else:
+                self._records.append((mm, sections))
+                self.hits += 1
+                try:
+                    # The modification time doubles as the LRU clock
+                    os.utime(path)
+                except OSError:
+                    pass
+                return value
+        self.misses += 1
+        value = parse()
+        try:
+            write_record(path, kind, to_sections(value))
+            self.evict()
+        except OSError:
+            # A read-only or full cache directory must never break validation
+            pass
+        return value
+
+    def evict(self):
+        """Delete least recently used records until the store fits in max_bytes"""
+        records = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if entry.name.endswith('.idx'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    records.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _mtime, size, _path in records)
+        for _mtime, size, path in sorted(records):
+            if total <= self.max_bytes:
+                break
+            try:
+                # Mappings other processes hold stay valid after the unlink
+                os.unlink(path)
+            except OSError:
+                continue
+            total -= size
+
+    def dex_index(self, info, read, name=None):
+        """DexIndex for a ZIP entry; read() supplies the entry bytes on a miss"""
+        name = name or info.filename
+        return self.cached(KIND_DEX, info, lambda: DexIndex(read(), name), dex_sections,
+                           lambda sections: StoredDexIndex(sections, name))
+
+    def resources(self, info, read, parse=ArscTable):
+        return self.cached(KIND_ARSC, info, lambda: parse(read()), arsc_sections, load_arsc)
+
+    def xml(self, info, read, parse=binary_xml.parse):
+        return self.cached(KIND_XML, info, lambda: parse(read()), xml_sections, load_xml)
+
+
+def store_root():
+    """Directory named by $APK_INDEX_STORE (DEFAULT_ROOT for 'on'), or None when unset or off"""
+    value = os.environ.get(STORE_ENV, '')
+    if value.lower() in ('', 'off', '0', 'none', 'no'):
+        return None
+    if value.lower() in ('on', '1', 'yes'):
+        return DEFAULT_ROOT
+    return value
+
+
+def default_store():
+    """Shared store, only when opted in with APK_INDEX_STORE=on or APK_INDEX_STORE=<directory>"""
+    root = store_root()
+    return IndexStore(root) if root else None
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <apk> [<apk> ...]")
+        return 2
+
+    from apk_index import ApkIndex
+
+    store = IndexStore()
+    for apk_path in sys.argv[1:]:
+        started = time.perf_counter()
+        with ApkIndex(apk_path, store=store) as apk:
+            class_count = len(apk.classes.classes)
+            resource_count = len(apk.resources.entries) if 'resources.arsc' in apk.entries else 0
+            package = apk.package_name if 'AndroidManifest.xml' in apk.entries else '(no manifest)'
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"{apk_path}: {package}, {class_count} classes, {resource_count} resources in {elapsed:.1f} ms")
+    store.close()
+    print(f"Store {store.root}: {store.hits} hits, {store.misses} misses")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
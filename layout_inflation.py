@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Static Layout Inflation Checker
+Parses every compiled res/layout*/*.xml in parallel and reports the inflation steps that
+would fail on device: view classes missing from DEX and resource references missing
+from resources.arsc
+"""
+
+import os
+import sys
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import binary_xml
+from aapt2_proto import parse_compiled_xml
+from app_bundle import open_app
+from dex_index import class_name_to_descriptor
+
+APP_PACKAGE_ID = 0x7F
+FRAMEWORK_PACKAGE_ID = 0x01
+PARALLEL_THRESHOLD = 32
+# Value type recorded for an attribute's name id, which no Res_value type uses
+ATTRIBUTE_NAME = -1
+
+# Tags LayoutInflater handles itself rather than instantiating a class
+SPECIAL_TAGS = {'merge', 'include', 'requestFocus', 'tag', 'blink'}
+FRAGMENT_TAGS = {'fragment', 'androidx.fragment.app.FragmentContainerView'}
+
+# Parsed layout summaries keyed by (CRC-32, uncompressed size) of the zip entry
+_layout_cache = {}
+_worker_zips = {}
+
+
+def summarize_layout(data):
+    """Reduce a compiled layout to [(tag, line, class_attr, [(attr, type, res_id)])]
+
+    Reference-typed values are listed with their value type; every attribute's own name id
+    (custom and library attrs included) is listed with type ATTRIBUTE_NAME.
+    """
+    root = parse_compiled_xml(data)
+    nodes = []
+    for element in root.iter():
+        class_attr = element.get('class', namespace=None)
+        if element.tag in FRAGMENT_TAGS:
+            class_attr = element.get('name') or class_attr
+        refs = []
+        for attribute in element.attributes:
+            if attribute.resource_id:
+                refs.append((attribute.name, ATTRIBUTE_NAME, attribute.resource_id))
+            if attribute.type in (binary_xml.TYPE_REFERENCE, binary_xml.TYPE_ATTRIBUTE) and attribute.data:
+                refs.append((attribute.name, attribute.type, attribute.data))
+        nodes.append((element.tag, element.line, class_attr, refs))
+    return nodes
+
+
+def _parse_entry(job):
+    name, archive, member = job
+    try:
+        zip_file = _worker_zips.get(archive)
+        if zip_file is None:
+            zip_file = _worker_zips[archive] = zipfile.ZipFile(archive, 'r')
+        return name, summarize_layout(zip_file.read(member)), None
+    except Exception as e:
+        return name, None, str(e)
+
+
+class InflationFailure:
+    __slots__ = ('layout', 'line', 'step', 'message')
+
+    def __init__(self, layout, line, step, message):
+        self.layout = layout
+        self.line = line
+        self.step = step
+        self.message = message
+
+    def __str__(self):
+        return f"{self.layout}:{self.line} [{self.step}] {self.message}"
+
+
+class LayoutInflationChecker:
+    def __init__(self, apk):
+        self.apk = apk
+        self.summaries = {}
+        self.parse_errors = {}
+
+    def load(self, names=None, workers=None):
+        """Parse layouts not already in the CRC cache, in a process pool when there are many"""
+        names = self.apk.layout_names if names is None else names
+        pending = []
+        for name in names:
+            info = self.apk.entries[name]
+            cached = _layout_cache.get((info.CRC, info.file_size))
+            if cached is not None:
+                self.summaries[name] = cached
+            else:
+                pending.append(name)
+
+        if len(pending) >= PARALLEL_THRESHOLD and (workers or os.cpu_count() or 1) > 1:
+            jobs = [(name, *self.apk.source(name)) for name in pending]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_parse_entry, jobs, chunksize=8))
+        else:
+            results = []
+            for name in pending:
+                try:
+                    results.append((name, summarize_layout(self.apk.read(name)), None))
+                except Exception as e:
+                    results.append((name, None, str(e)))
+
+        for name, summary, error in results:
+            if error is not None:
+                self.parse_errors[name] = error
+                continue
+            info = self.apk.entries[name]
+            _layout_cache[(info.CRC, info.file_size)] = summary
+            self.summaries[name] = summary
+        return self.summaries
+
+    def _check_view_class(self, class_name):
+        """Return None if class_name can be instantiated, else a failure message"""
+        if '.' not in class_name or class_name.startswith(('android.', 'java.')):
+            # Bare tags resolve to android.widget/android.view/android.webkit in the framework
+            return None
+        descriptor = class_name_to_descriptor(class_name)
+        classes = self.apk.classes
+        if descriptor not in classes:
+            return f"ClassNotFoundException: {class_name} is not defined in any DEX file"
+        chain = list(classes.superclass_chain(descriptor))
+        if chain[-1] == 'Ljava/lang/Object;' or classes.get(chain[-1]) is not None:
+            return f"{class_name} does not extend android.view.View"
+        return None
+
+    def _check_reference(self, res_id):
+        package_id = res_id >> 24
+        if package_id == FRAMEWORK_PACKAGE_ID:
+            return None
+        if package_id == APP_PACKAGE_ID and res_id not in self.apk.resources:
+            return f"reference 0x{res_id:08x} is not in resources.arsc"
+        return None
+
+    def check_layout(self, name):
+        failures = []
+        if name in self.parse_errors:
+            failures.append(InflationFailure(name, 0, 'parse', self.parse_errors[name]))
+            return failures
+        resources = self.apk.resources
+        for tag, line, class_attr, refs in self.summaries.get(name, ()):
+            if tag in FRAGMENT_TAGS:
+                if class_attr:
+                    message = self._check_fragment_class(class_attr)
+                    if message:
+                        failures.append(InflationFailure(name, line, 'fragment', message))
+            elif tag == 'view':
+                if not class_attr:
+                    failures.append(InflationFailure(name, line, 'createView', "<view> without class attribute"))
+                else:
+                    message = self._check_view_class(class_attr)
+                    if message:
+                        failures.append(InflationFailure(name, line, 'createView', message))
+            elif tag not in SPECIAL_TAGS:
+                message = self._check_view_class(tag)
+                if message:
+                    failures.append(InflationFailure(name, line, 'createView', message))
+
+            for attr_name, value_type, res_id in refs:
+                if value_type == ATTRIBUTE_NAME:
+                    # An attr name the app no longer defines is just ignored by obtainStyledAttributes
+                    continue
+                message = self._check_reference(res_id)
+                if message:
+                    failures.append(InflationFailure(name, line, f'@{attr_name}', message))
+                elif tag == 'include' and attr_name == 'layout' and res_id in resources:
+                    missing = [f for f in resources.entries[res_id].files if f not in self.apk.entries]
+                    if missing:
+                        failures.append(InflationFailure(
+                            name, line, 'include', f"included layout file missing: {', '.join(sorted(missing))}"))
+        return failures
+
+    def _check_fragment_class(self, class_name):
+        if class_name.startswith('android.'):
+            return None
+        if class_name_to_descriptor(class_name) not in self.apk.classes:
+            return f"Fragment class {class_name} is not defined in any DEX file"
+        return None
+
+    def check(self, names=None, workers=None):
+        """Return {layout name: [InflationFailure, ...]} for every checked layout"""
+        self.load(names, workers)
+        return {name: self.check_layout(name) for name in (self.apk.layout_names if names is None else names)}
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <apk | app.aab | splits-dir> [layout ...]")
+        return 2
+
+    with open_app(sys.argv[1]) as apk:
+        checker = LayoutInflationChecker(apk)
+        results = checker.check(sys.argv[2:] or None)
+
+    failed = {name: failures for name, failures in results.items() if failures}
+    print(f"Checked {len(results)} layouts, {len(failed)} with inflation failures")
+    for name, failures in sorted(failed.items()):
+        print(f"\n❌ {name}")
+        for failure in failures:
+            print(f"   line {failure.line}: [{failure.step}] {failure.message}")
+    if not failed:
+        print("✅ All layouts inflate against this APK's DEX and resource table")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+DebugIvonaTTS Logcat Event Parser
+Turns logcat captures (threadtime or time format) from TTSTestApp into typed TTS events:
+test start, TextToSpeech init result, setSpeechRate(), speak() calls and utterance start/done/error
+"""
+
+import re
+import sys
+from collections import namedtuple
+
+# MainActivity logs as DebugIvonaTTS, TestNotificationService as TestNotificationSvc
+TAGS = ('DebugIvonaTTS', 'TestNotificationSvc')
+
+THREADTIME_RE = re.compile(
+    r'^(?:\d{4}-)?(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d)\.(\d{3})\s+(\d+)\s+(\d+)\s+([VDIWEF])\s+(.+?)\s*: (.*)$')
+TIME_RE = re.compile(
+    r'^(?:\d{4}-)?(\d\d)-(\d\d) (\d\d):(\d\d):(\d\d)\.(\d{3}) ([VDIWEF])/(.+?)\(\s*(\d+)\): (.*)$')
+
+TEST_START = 'test_start'
+INIT_OK = 'init_ok'
+INIT_FAIL = 'init_fail'
+SPEAK = 'speak'
+UTTERANCE_START = 'utterance_start'
+UTTERANCE_DONE = 'utterance_done'
+UTTERANCE_ERROR = 'utterance_error'
+SPEECH_RATE = 'speech_rate'
+
+EVENT_PATTERNS = (
+    (TEST_START, re.compile(r'^=== SERVICE TEST: (.+) ===$|^--- TEST: (.+) ---$')),
+    (INIT_OK, re.compile(r'^\s*(?:- )?SUCCESS: .*(?:initiali[sz]ed|TTS init)')),
+    (INIT_FAIL, re.compile(r'^\s*(?:- )?FAILED: .*init')),
+    (SPEECH_RATE, re.compile(r'Setting speech rate: (\d+(?:\.\d+)?)')),
+    (SPEAK, re.compile(r'[Ss]peak(?:\(\))? (?:result|[^:]*?returned)[^:]*: (-?\d+)')),
+    (UTTERANCE_ERROR, re.compile(r'utterance error|TTS error(?: while|:| \()|test:? error|onError callback|'
+                                 r'Callback RECEIVED: onError|^\s*- onError ')),
+    (UTTERANCE_DONE, re.compile(r'\bfinished\b|Callback RECEIVED: onDone|^\s*- onDone ')),
+    (UTTERANCE_START, re.compile(r'\bstarted\b|Callback RECEIVED: onStart|^\s*- onStart ')),
+)
+
+# Test headers as logged by TestNotificationService / MainActivity -> TEST_* ids
+HEADER_TEST_IDS = {
+    '2-arg TTS (Service Context)': 'test_2arg',
+    '3-arg TTS with Selected Engine': 'test_3arg',
+    '2-arg TTS with ApplicationContext': 'test_app_ctx_2arg',
+    '3-arg TTS with Selected Engine (ApplicationContext)': 'test_app_ctx_3arg',
+    'QUEUE_ADD mode (like VoiceNotify)': 'test_queue_add',
+    'Bundle parameters in speak()': 'test_bundle_params',
+    'Engine Verification': 'test_engine_verify',
+    'Foreground Service Promotion + Listener (SpeakThat Pattern)': 'test_foreground_listener',
+    'Language Availability Check (SpeakThat Pattern)': 'test_language_avail',
+    'Audio Attributes with Different USAGE Types': 'test_audio_usage',
+    'Speech Rate and Pitch Settings': 'test_speech_settings',
+    'TTS Recovery Pattern (SpeakThat Resilience)': 'test_recovery',
+    'Multiple USAGE Types Sequential Test': 'test_multiple_usage',
+    'SpeakThat Exact Pattern': 'test_speakthat_exact',
+    'Audio Attributes USAGE_ASSISTANT': 'test_usage_assistant',
+    'Explicit en_US Language Setting (CRITICAL)': 'test_language_en_us_explicit',
+    'Proper Language Availability Check': 'test_language_availability_check',
+    'SpeakThat COMPLETE Execution Pattern (SUPER CRITICAL)': 'test_speakthat_execution_pattern',
+    'stop() Before speak()': 'test_stop_before_speak',
+    'Reapply Settings Before Each speak()': 'test_reapply_settings_before_speak',
+    'TTS Recovery Pattern (THE BUG!)': 'test_tts_recovery_pattern',
+    'setOnUtteranceProgressListener AFTER speak()': 'test_listener_after_speak',
+    'speak() with SpeakThat Volume Bundle': 'test_volume_bundle',
+    'Listener AFTER speak() + Volume Bundle (SpeakThat Clone)': 'test_listener_after_speak_with_bundle',
+    'Premature Recovery Pattern (SpeakThat Replication)': 'test_premature_recovery',
+    '2-arg TTS from Activity': 'activity_2arg',
+    '3-arg TTS with Selected Engine from Activity': 'activity_3arg',
+}
+
+CONTEXT_ACTIVITY = 'activity'
+CONTEXT_SERVICE = 'service'
+CONTEXT_APPLICATION = 'application'
+
+# Cumulative days before each month, so MM-DD HH:MM:SS.mmm maps to ms since Jan 1
+MONTH_DAYS = (0, 0, 31, 59, 90, 120, 151, 181, 212, 243, 273, 304, 334)
+
+LogEvent = namedtuple('LogEvent', 'ts pid tid level tag kind detail message test context')
+
+
+def timestamp_ms(month, day, hour, minute, second, millis):
+    days = MONTH_DAYS[int(month)] + int(day) - 1
+    return ((days * 24 + int(hour)) * 60 + int(minute)) * 60000 + int(second) * 1000 + int(millis)
+
+
+def test_id_for(label):
+    return HEADER_TEST_IDS.get(label, label)
+
+
+def context_for(test_id):
+    if test_id.startswith('activity_'):
+        return CONTEXT_ACTIVITY
+    if test_id.startswith('test_app_ctx'):
+        return CONTEXT_APPLICATION
+    return CONTEXT_SERVICE
+
+
+def classify(message):
+    """Return (kind, detail) for a TTS log message, or (None, None)"""
+    for kind, pattern in EVENT_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            detail = next((group for group in match.groups() if group is not None), None)
+            if kind == TEST_START:
+                detail = test_id_for(detail)
+            return kind, detail
+    return None, None
+
+
+def parse_line(line, tags=TAGS):
+    """Parse one logcat line into a LogEvent (test/context unassigned), or None"""
+    match = THREADTIME_RE.match(line)
+    if match:
+        month, day, hour, minute, second, millis, pid, tid, level, tag, message = match.groups()
+    else:
+        match = TIME_RE.match(line)
+        if not match:
+            return None
+        month, day, hour, minute, second, millis, level, tag, pid, message = match.groups()
+        tid = pid
+    if tag not in tags:
+        return None
+    kind, detail = classify(message)
+    if kind is None:
+        return None
+    return LogEvent(timestamp_ms(month, day, hour, minute, second, millis), int(pid), int(tid),
+                    level, tag, kind, detail, message, None, None)
+
+
+def iter_events(lines, tags=TAGS):
+    """Yield LogEvents for every TTS event line in an iterable of text lines"""
+    for line in lines:
+        if not any(tag in line for tag in tags):
+            continue
+        event = parse_line(line.rstrip('\r\n'), tags)
+        if event is not None:
+            yield event
+
+
+def assign_tests(events):
+    """Attach the active test id and context type (per process) to each event, in order"""
+    current = {}
+    for event in events:
+        if event.kind == TEST_START:
+            current[event.pid] = event.detail
+        test = current.get(event.pid)
+        yield event._replace(test=test, context=context_for(test) if test else None)
+
+
+class TestRun:
+    """One execution of a test: TextToSpeech construction through its utterance callbacks"""
+
+    __slots__ = ('test', 'context', 'pid', 'created', 'init_ts', 'init_ok', 'speech_rate', 'speaks', 'starts',
+                 'dones', 'errors')
+
+    def __init__(self, test, context, pid, created):
+        self.test = test
+        self.context = context
+        self.pid = pid
+        self.created = created
+        self.init_ts = None
+        self.init_ok = None
+        # setSpeechRate() value when the test logs it; TextToSpeech defaults to 1.0
+        self.speech_rate = 1.0
+        self.speaks = []
+        self.starts = []
+        self.dones = []
+        self.errors = []
+
+    @property
+    def bind_latency(self):
+        return self.init_ts - self.created if self.init_ts is not None else None
+
+    def add(self, event):
+        if event.kind in (INIT_OK, INIT_FAIL):
+            if self.init_ts is None:
+                self.init_ts = event.ts
+                self.init_ok = event.kind == INIT_OK
+        elif event.kind == SPEECH_RATE:
+            self.speech_rate = float(event.detail)
+        elif event.kind == SPEAK:
+            self.speaks.append((event.ts, int(event.detail)))
+        elif event.kind == UTTERANCE_START:
+            self.starts.append(event.ts)
+        elif event.kind == UTTERANCE_DONE:
+            self.dones.append(event.ts)
+        elif event.kind == UTTERANCE_ERROR:
+            self.errors.append(event.ts)
+
+
+def test_runs(events):
+    """Group assigned events into TestRun objects, one per test header per process"""
+    runs = []
+    active = {}
+    for event in events:
+        if event.kind == TEST_START:
+            run = TestRun(event.detail, context_for(event.detail), event.pid, event.ts)
+            runs.append(run)
+            active[event.pid] = run
+        elif event.pid in active:
+            active[event.pid].add(event)
+    return runs
+
+
+def parse_file(path, tags=TAGS):
+    """Return the assigned LogEvents of a logcat capture file"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        return list(assign_tests(iter_events(f, tags)))
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <logcat.txt>")
+        return 2
+
+    runs = test_runs(parse_file(sys.argv[1]))
+    print(f"{len(runs)} test runs")
+    for run in runs:
+        status = 'init ok' if run.init_ok else ('init FAILED' if run.init_ok is False else 'no onInit')
+        latency = f"{run.bind_latency} ms" if run.bind_latency is not None else '-'
+        print(f"  {run.test:<40} {run.context:<12} {status:<12} bind {latency:>8}  "
+              f"speak {len(run.speaks)}  start {len(run.starts)}  done {len(run.dones)}  error {len(run.errors)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Live Logcat Tail with Rolling TTS Health Metrics
+Reads logcat from a pipe or a growing file and keeps rolling-window metrics up to date
+event by event: onInit success rate, bind latency percentiles, and utterances started vs
+completed per test id. A recorded capture can be replayed at any speed for testing.
+
+    adb logcat -v threadtime | python3 logcat_tail.py -
+    python3 logcat_tail.py --follow capture.txt
+    python3 logcat_tail.py --replay capture.txt --speed 20
+"""
+
+import argparse
+import bisect
+import sys
+import time
+from collections import deque
+
+from logcat_events import (TAGS, TEST_START, INIT_OK, INIT_FAIL, UTTERANCE_START, UTTERANCE_DONE,
+                           UTTERANCE_ERROR, context_for, parse_line)
+
+DEFAULT_WINDOW_SEC = 300
+CLEAR_SCREEN = '\033[H\033[J'
+
+
+class RollingTtsMetrics:
+    """Sliding window over log time; add() is O(n) in the windowed bind latencies (sorted list insert/delete)
+
+    The sorted list keeps percentiles O(1); at a few bind latencies per test the list shifts are cheaper
+    than a heap or tree would be in pure Python.
+    """
+
+    def __init__(self, window_ms=DEFAULT_WINDOW_SEC * 1000):
+        self.window_ms = window_ms
+        self.now = None
+        self.total_events = 0
+        self._current = {}
+        self._created = {}
+        self._inits = deque()
+        self._init_ok = 0
+        self._latency_log = deque()
+        self._latencies = []
+        self._utterances = deque()
+        self._per_test = {}
+
+    def add(self, event):
+        self.total_events += 1
+        self.now = event.ts if self.now is None else max(self.now, event.ts)
+
+        if event.kind == TEST_START:
+            # Same per-process test tracking as logcat_events.assign_tests, one event at a time
+            self._current[event.pid] = event.detail
+            self._created[event.pid] = event.ts
+        elif event.kind in (INIT_OK, INIT_FAIL):
+            created = self._created.pop(event.pid, None)
+            ok = event.kind == INIT_OK
+            self._inits.append((event.ts, ok))
+            self._init_ok += ok
+            if ok and created is not None:
+                latency = event.ts - created
+                self._latency_log.append((event.ts, latency))
+                bisect.insort(self._latencies, latency)
+        elif event.kind in (UTTERANCE_START, UTTERANCE_DONE, UTTERANCE_ERROR):
+            test = self._current.get(event.pid, '?')
+            self._utterances.append((event.ts, test, event.kind))
+            counts = self._per_test.setdefault(test, {UTTERANCE_START: 0, UTTERANCE_DONE: 0, UTTERANCE_ERROR: 0})
+            counts[event.kind] += 1
+        self._evict()
+
+    def _evict(self):
+        cutoff = self.now - self.window_ms
+        while self._inits and self._inits[0][0] < cutoff:
+            _ts, ok = self._inits.popleft()
+            self._init_ok -= ok
+        while self._latency_log and self._latency_log[0][0] < cutoff:
+            _ts, latency = self._latency_log.popleft()
+            del self._latencies[bisect.bisect_left(self._latencies, latency)]
+        while self._utterances and self._utterances[0][0] < cutoff:
+            _ts, test, kind = self._utterances.popleft()
+            counts = self._per_test[test]
+            counts[kind] -= 1
+            if not any(counts.values()):
+                del self._per_test[test]
+
+    def init_success_rate(self):
+        return self._init_ok / len(self._inits) if self._inits else None
+
+    def latency_percentile(self, pct):
+        if not self._latencies:
+            return None
+        index = min(len(self._latencies) - 1, int(round(pct / 100 * (len(self._latencies) - 1))))
+        return self._latencies[index]
+
+    def summary(self):
+        lines = [f"TTS health, last {self.window_ms // 1000}s of log time ({self.total_events} events seen)"]
+        rate = self.init_success_rate()
+        lines.append(f"  onInit success: {'-' if rate is None else f'{rate:.0%}'} of {len(self._inits)}")
+        p50, p90, p99 = (self.latency_percentile(p) for p in (50, 90, 99))
+        if p50 is None:
+            lines.append("  bind latency:   -")
+        else:
+            lines.append(f"  bind latency:   p50 {p50} ms  p90 {p90} ms  p99 {p99} ms  (n={len(self._latencies)})")
+        if self._per_test:
+            lines.append(f"  {'test id':<40}{'context':<13}{'started':>8}{'done':>6}{'error':>7}")
+            for test, counts in sorted(self._per_test.items()):
+                context = context_for(test) if test != '?' else '?'
+                flag = '  ⚠️' if counts[UTTERANCE_START] > counts[UTTERANCE_DONE] + counts[UTTERANCE_ERROR] else ''
+                lines.append(f"  {test:<40}{context:<13}{counts[UTTERANCE_START]:>8}"
+                             f"{counts[UTTERANCE_DONE]:>6}{counts[UTTERANCE_ERROR]:>7}{flag}")
+        return '\n'.join(lines)
+
+
+def read_pipe(stream):
+    for line in stream:
+        yield line
+
+
+def follow(path, poll_sec=0.2):
+    """Yield complete lines from a file that is still being written"""
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        partial = ''
+        while True:
+            chunk = f.readline()
+            if not chunk:
+                time.sleep(poll_sec)
+                continue
+            partial += chunk
+            if partial.endswith('\n'):
+                yield partial
+                partial = ''
+
+
+def replay(path, speed, tags=TAGS):
+    """Yield lines of a recorded capture, paced by their log timestamps divided by speed"""
+    first_log_ts = None
+    first_wall = time.monotonic()
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if speed > 0 and any(tag in line for tag in tags):
+                event = parse_line(line.rstrip('\r\n'), tags)
+                if event is not None:
+                    if first_log_ts is None:
+                        first_log_ts = event.ts
+                    delay = (event.ts - first_log_ts) / 1000 / speed - (time.monotonic() - first_wall)
+                    if delay > 0:
+                        time.sleep(delay)
+            yield line
+
+
+def run(lines, metrics, refresh_sec, out=sys.stdout, tags=TAGS):
+    clear = CLEAR_SCREEN if out.isatty() else ''
+    last_refresh = 0.0
+    for line in lines:
+        if not any(tag in line for tag in tags):
+            continue
+        event = parse_line(line.rstrip('\r\n'), tags)
+        if event is None:
+            continue
+        metrics.add(event)
+        now = time.monotonic()
+        if now - last_refresh >= refresh_sec:
+            out.write(clear + metrics.summary() + '\n\n')
+            out.flush()
+            last_refresh = now
+    out.write(clear + metrics.summary() + '\n')
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('pipe', nargs='?', help="'-' to read logcat from stdin")
+    source.add_argument('--follow', metavar='FILE', help='tail a growing capture file')
+    source.add_argument('--replay', metavar='FILE', help='replay a recorded capture')
+    parser.add_argument('--speed', type=float, default=0, help='replay speed multiplier (0 = as fast as possible)')
+    parser.add_argument('--window', type=float, default=DEFAULT_WINDOW_SEC, help='rolling window in seconds')
+    parser.add_argument('--refresh', type=float, default=1.0, help='seconds between summary refreshes')
+    args = parser.parse_args()
+    if args.pipe is not None and args.pipe != '-':
+        parser.error(f"unexpected argument {args.pipe!r}: use '-' for stdin, or --replay/--follow FILE")
+
+    if args.follow:
+        lines = follow(args.follow)
+    elif args.replay:
+        lines = replay(args.replay, args.speed)
+    else:
+        lines = read_pipe(sys.stdin)
+
+    try:
+        run(lines, RollingTtsMetrics(int(args.window * 1000)), args.refresh)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
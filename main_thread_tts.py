@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Main-Thread TextToSpeech Detector
+Finds every TextToSpeech.<init> call site reachable from lifecycle callbacks that run on
+the main thread, classifies the Context argument (activity, service or application) by
+tracking registers through the caller's bytecode, and reports blocking binder calls on the
+start-up path. Reachability comes from the cached per-DEX call tables, so only the few
+methods that actually construct TextToSpeech are decoded.
+"""
+
+import argparse
+import sys
+import time
+
+from app_bundle import open_app
+from baseline_profile import STARTUP_CALLBACKS, startup_components
+from call_graph import CLASS_INIT, MethodCallGraph, call_path, lifecycle_roots, split_key
+from dex_index import iter_instructions
+from logcat_events import CONTEXT_ACTIVITY, CONTEXT_APPLICATION, CONTEXT_SERVICE
+from manifest_components import ACTIVITY, APPLICATION, FRAMEWORK_SUPERCLASSES, SERVICE, declared_components
+
+TTS = 'Landroid/speech/tts/TextToSpeech;'
+TTS_INIT = TTS + '-><init>('
+CONTEXT = 'Landroid/content/Context;'
+RUNNABLE = 'Ljava/lang/Runnable;'
+CONTEXT_UNKNOWN = 'unknown'
+
+MAIN_THREAD_CALLBACKS = {
+    'application': ('attachBaseContext', 'onCreate', 'onConfigurationChanged', 'onLowMemory', 'onTrimMemory'),
+    'activity': ('onCreate', 'onStart', 'onRestart', 'onResume', 'onPostResume', 'onPause', 'onStop',
+                 'onDestroy', 'onNewIntent', 'onActivityResult', 'onRequestPermissionsResult',
+                 'onConfigurationChanged', 'onSaveInstanceState', 'onRestoreInstanceState',
+                 'onWindowFocusChanged', 'onBackPressed', 'onOptionsItemSelected'),
+    'service': ('onCreate', 'onStartCommand', 'onStart', 'onBind', 'onUnbind', 'onRebind', 'onDestroy',
+                'onTaskRemoved', 'onListenerConnected', 'onListenerDisconnected',
+                'onNotificationPosted', 'onNotificationRemoved', 'onAccessibilityEvent', 'onServiceConnected'),
+    'receiver': ('onReceive',),
+    'provider': ('onCreate',),
+}
+MAIN_THREAD_CALLBACKS['activity-alias'] = MAIN_THREAD_CALLBACKS['activity']
+
+# Listener interfaces the framework calls back on the main thread once an instance exists
+MAIN_THREAD_LISTENERS = {
+    'Landroid/speech/tts/TextToSpeech$OnInitListener;': ('onInit(I)V',),
+    'Landroid/view/View$OnClickListener;': ('onClick(Landroid/view/View;)V',),
+    'Landroid/view/View$OnLongClickListener;': ('onLongClick(Landroid/view/View;)Z',),
+    'Landroid/content/DialogInterface$OnClickListener;': ('onClick(Landroid/content/DialogInterface;I)V',),
+    'Landroid/content/ServiceConnection;': (
+        'onServiceConnected(Landroid/content/ComponentName;Landroid/os/IBinder;)V',
+        'onServiceDisconnected(Landroid/content/ComponentName;)V'),
+}
+
+# Calls that queue a Runnable on a Looper; the Handler's Looper is not tracked, so every
+# Handler is assumed to be the main one
+MAIN_LOOPER_POSTS = frozenset((
+    'post(Ljava/lang/Runnable;)Z',
+    'postDelayed(Ljava/lang/Runnable;J)Z',
+    'postAtFrontOfQueue(Ljava/lang/Runnable;)Z',
+    'runOnUiThread(Ljava/lang/Runnable;)V',
+))
+
+# (class, method name) pairs that block the calling thread on a binder transaction or a sleep
+BLOCKING_CALLS = frozenset((
+    *((TTS, name) for name in ('setLanguage', 'isLanguageAvailable', 'getLanguage', 'getVoice', 'setVoice',
+                               'getVoices', 'getAvailableLanguages', 'getDefaultVoice', 'getDefaultEngine',
+                               'getEngines', 'getFeatures', 'areDefaultsEnforced')),
+    ('Ljava/lang/Thread;', 'sleep'),
+    ('Ljava/lang/Thread;', 'join'),
+    ('Ljava/util/concurrent/CountDownLatch;', 'await'),
+    ('Ljava/util/concurrent/Future;', 'get'),
+))
+
+# AndroidX bases are usually in the APK, but spell out the common ones for stripped builds
+LIBRARY_SUPERCLASSES = {
+    'Landroidx/appcompat/app/AppCompatActivity;': 'Landroidx/fragment/app/FragmentActivity;',
+    'Landroidx/fragment/app/FragmentActivity;': 'Landroidx/activity/ComponentActivity;',
+    'Landroidx/activity/ComponentActivity;': 'Landroidx/core/app/ComponentActivity;',
+    'Landroidx/core/app/ComponentActivity;': ACTIVITY,
+    'Landroidx/lifecycle/LifecycleService;': SERVICE,
+    'Landroidx/multidex/MultiDexApplication;': APPLICATION,
+}
+
+# Register values that are known without a type descriptor
+APPLICATION_CONTEXT = object()
+CONTEXT_GETTERS = frozenset(('getApplicationContext', 'getApplication'))
+
+MOVE_OBJECT_OPS = frozenset((0x07, 0x08, 0x09))
+INVOKE_OPS = frozenset((*range(0x6e, 0x73), *range(0x74, 0x79)))
+
+
+def parameter_types(proto):
+    """'(ILjava/lang/String;[J)V' -> ['I', 'Ljava/lang/String;', '[J']"""
+    types = []
+    pos = 1
+    end = proto.index(')')
+    while pos < end:
+        start = pos
+        while proto[pos] == '[':
+            pos += 1
+        pos = proto.index(';', pos) + 1 if proto[pos] == 'L' else pos + 1
+        types.append(proto[start:pos])
+    return types
+
+
+class TtsSite:
+    __slots__ = ('caller', 'target', 'context', 'context_type', 'startup', 'path')
+
+    def __init__(self, caller, target, context, context_type, startup, path):
+        self.caller = caller
+        self.target = target
+        self.context = context
+        self.context_type = context_type
+        self.startup = startup
+        self.path = path
+
+    @property
+    def with_engine(self):
+        """True for the 3-argument constructor that names an engine package"""
+        return 'Ljava/lang/String;' in split_key(self.target)[1]
+
+
+class MainThreadTtsDetector:
+    def __init__(self, apk, graph=None):
+        self.apk = apk
+        self.graph = graph or MethodCallGraph(apk)
+        self.classes = self.graph.classes
+        self._implementers = {}
+        self._context_kinds = {}
+
+    def implementers(self, interface):
+        found = self._implementers.get(interface)
+        if found is None:
+            found = self._implementers[interface] = frozenset(self.graph.descendants(interface))
+        return found
+
+    def callback_edges(self, key, edges):
+        """Callbacks the framework runs on the main thread for objects created or posted by key"""
+        posts = any(kind != CLASS_INIT and split_key(target)[1] in MAIN_LOOPER_POSTS for kind, target in edges)
+        for kind, target in edges:
+            if kind != CLASS_INIT or target not in self.classes:
+                continue
+            if posts and target in self.implementers(RUNNABLE):
+                definition = self.graph.find_definition(target, 'run()V')
+                if definition is not None:
+                    yield definition
+            for interface, members in MAIN_THREAD_LISTENERS.items():
+                if target in self.implementers(interface):
+                    for member in members:
+                        definition = self.graph.find_definition(target, member)
+                        if definition is not None:
+                            yield definition
+
+    def main_thread_methods(self, roots):
+        return self.graph.reachable(roots, self.callback_edges)
+
+    def context_kind(self, value):
+        """Map a tracked register value to CONTEXT_* (or CONTEXT_UNKNOWN)"""
+        if value is APPLICATION_CONTEXT:
+            return CONTEXT_APPLICATION
+        if value is None:
+            return CONTEXT_UNKNOWN
+        kind = self._context_kinds.get(value)
+        if kind is None:
+            kind = CONTEXT_UNKNOWN
+            descriptor = value
+            seen = set()
+            while descriptor and descriptor not in seen:
+                seen.add(descriptor)
+                if descriptor == ACTIVITY:
+                    kind = CONTEXT_ACTIVITY
+                    break
+                if descriptor == SERVICE:
+                    kind = CONTEXT_SERVICE
+                    break
+                if descriptor == APPLICATION:
+                    kind = CONTEXT_APPLICATION
+                    break
+                class_def = self.classes.get(descriptor)
+                if class_def is not None:
+                    descriptor = class_def.superclass
+                else:
+                    descriptor = FRAMEWORK_SUPERCLASSES.get(descriptor) or LIBRARY_SUPERCLASSES.get(descriptor)
+            self._context_kinds[value] = kind
+        return kind
+
+    def context_arguments(self, key):
+        """[(constructor key, register value)] for each TextToSpeech.<init> call in method key
+
+        A single forward pass over the instructions: good enough for constructor arguments,
+        which compilers materialise right before the call.
+        """
+        dex, code_off, _edges = self.graph.method(key)
+        registers, ins, _outs, _tries, insns = dex.code_item(code_off)
+        class_descriptor, member = split_key(key)
+        params = parameter_types(member[member.index('('):])
+        if ins > sum(2 if param in ('J', 'D') else 1 for param in params):
+            params.insert(0, class_descriptor)
+        values = {}
+        reg = registers - ins
+        for param in params:
+            values[reg] = param
+            reg += 2 if param in ('J', 'D') else 1
+
+        types = dex.types
+        found = []
+        result = None
+        for pos, op in iter_instructions(insns):
+            unit = insns[pos]
+            if op in INVOKE_OPS:
+                method_class, name, proto = dex.method_signature(insns[pos + 1])
+                if op < 0x74:
+                    count = unit >> 12
+                    word = insns[pos + 2]
+                    args = [(word >> shift) & 0xF for shift in (0, 4, 8, 12)][:count]
+                    if count == 5:
+                        args.append((unit >> 8) & 0xF)
+                else:
+                    args = list(range(insns[pos + 2], insns[pos + 2] + (unit >> 8)))
+                if name == '<init>' and method_class == TTS and len(args) > 1:
+                    found.append((f"{method_class}->{name}{proto}", values.get(args[1])))
+                if name in CONTEXT_GETTERS:
+                    result = APPLICATION_CONTEXT
+                else:
+                    returns = proto[proto.index(')') + 1:]
+                    result = returns if returns[0] in 'L[' else None
+            elif op == 0x0c:
+                values[unit >> 8] = result
+            elif op in MOVE_OBJECT_OPS:
+                if op == 0x07:
+                    dst, src = (unit >> 8) & 0xF, unit >> 12
+                elif op == 0x08:
+                    dst, src = unit >> 8, insns[pos + 1]
+                else:
+                    dst, src = insns[pos + 1], insns[pos + 2]
+                values[dst] = values.get(src)
+            elif op == 0x54:
+                values[(unit >> 8) & 0xF] = types[dex.field_ids[insns[pos + 1]][1]]
+            elif op == 0x62:
+                values[unit >> 8] = types[dex.field_ids[insns[pos + 1]][1]]
+            elif op in (0x1f, 0x22):
+                values[unit >> 8] = types[insns[pos + 1]]
+            elif op in (0x0d, 0x1a, 0x1b, 0x1c, 0x46):
+                values[unit >> 8] = None
+        return found
+
+    def analyze(self):
+        """Return a dict with main-thread TTS sites, blocking calls and reachability counts"""
+        manifest = self.apk.manifest
+        package = self.apk.package_name or ''
+        graph = self.graph
+        roots = lifecycle_roots(graph, declared_components(manifest, package), MAIN_THREAD_CALLBACKS)
+        order, parents = self.main_thread_methods(roots)
+        startup_roots = lifecycle_roots(graph, startup_components(manifest, package), STARTUP_CALLBACKS)
+        startup = set(self.main_thread_methods(startup_roots)[0])
+
+        sites = []
+        blocking = []
+        for key in order:
+            edges = graph.method(key)[2]
+            if any(kind != CLASS_INIT and target.startswith(TTS_INIT) for kind, target in edges):
+                for target, value in self.context_arguments(key):
+                    sites.append(TtsSite(key, target, self.context_kind(value),
+                                         value if isinstance(value, str) else None,
+                                         key in startup, call_path(parents, key)))
+            for kind, target in edges:
+                if kind == CLASS_INIT:
+                    continue
+                class_descriptor, member = split_key(target)
+                if (class_descriptor, member[:member.index('(')]) in BLOCKING_CALLS:
+                    blocking.append((key, target, key in startup, call_path(parents, key)))
+        return {
+            'roots': len(roots),
+            'main_thread_methods': len(order),
+            'startup_methods': len(startup),
+            'sites': sites,
+            'blocking': blocking,
+            'startup_blocking': sum(1 for _key, _target, on_startup, _path in blocking if on_startup),
+        }
+
+
+def analyze(apk, graph=None):
+    return MainThreadTtsDetector(apk, graph).analyze()
+
+
+def short_key(key):
+    """Lcom/foo/Bar;->baz(I)V -> Bar.baz"""
+    class_descriptor, member = split_key(key)
+    return f"{class_descriptor[1:-1].rsplit('/', 1)[-1]}.{member[:member.index('(')]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('apk', help='APK, .aab or directory of split APKs')
+    parser.add_argument('--paths', action='store_true', help='print the call path from the lifecycle callback')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    with open_app(args.apk) as apk:
+        result = analyze(apk)
+    elapsed = time.perf_counter() - started
+
+    print(f"{result['main_thread_methods']} main-thread methods from {result['roots']} lifecycle callbacks "
+          f"({result['startup_methods']} on the start-up path) in {elapsed:.2f}s")
+    if not result['sites']:
+        print("✅ No TextToSpeech constructed on the main thread")
+    for site in result['sites']:
+        mark = '⚠️ ' if site.context == CONTEXT_ACTIVITY else '  '
+        print(f"  {mark} {short_key(site.caller)}: {'3-arg' if site.with_engine else '2-arg'} TextToSpeech "
+              f"with {site.context} context{' (start-up)' if site.startup else ''}")
+        if args.paths:
+            print(f"       {' -> '.join(short_key(key) for key in site.path)}")
+    for key, target, on_startup, path in result['blocking']:
+        mark = '❌' if on_startup else '⚠️ '
+        print(f"  {mark} {short_key(key)} calls {short_key(target)} on the main thread"
+              f"{' during start-up (ANR risk)' if on_startup else ''}")
+        if args.paths:
+            print(f"       {' -> '.join(short_key(step) for step in path)}")
+    if not result['blocking']:
+        print("✅ No blocking binder calls reachable on the main thread")
+    return 1 if result['startup_blocking'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
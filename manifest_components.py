@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Manifest <-> DEX Component Cross-Reference
+Resolves every activity, service, receiver and provider declared in AndroidManifest.xml
+against the DEX class-def index in one batched pass and flags missing classes and
+wrong superclasses
+"""
+
+import sys
+
+from app_bundle import open_app
+from dex_index import class_name_to_descriptor
+
+ACTIVITY = 'Landroid/app/Activity;'
+SERVICE = 'Landroid/app/Service;'
+RECEIVER = 'Landroid/content/BroadcastReceiver;'
+PROVIDER = 'Landroid/content/ContentProvider;'
+APPLICATION = 'Landroid/app/Application;'
+NOTIFICATION_LISTENER = 'Landroid/service/notification/NotificationListenerService;'
+OBJECT = 'Ljava/lang/Object;'
+PLATFORM_PREFIXES = ('Landroid/', 'Ljava/', 'Ljavax/', 'Ldalvik/')
+
+COMPONENT_BASES = {
+    'application': APPLICATION,
+    'activity': ACTIVITY,
+    'activity-alias': ACTIVITY,
+    'service': SERVICE,
+    'receiver': RECEIVER,
+    'provider': PROVIDER,
+}
+
+# Bind permissions / intent actions that require a more specific framework base class
+SPECIALIZED_BASES = {
+    'android.permission.BIND_NOTIFICATION_LISTENER_SERVICE': NOTIFICATION_LISTENER,
+    'android.service.notification.NotificationListenerService': NOTIFICATION_LISTENER,
+    'android.permission.BIND_ACCESSIBILITY_SERVICE': 'Landroid/accessibilityservice/AccessibilityService;',
+    'android.intent.action.TTS_SERVICE': 'Landroid/speech/tts/TextToSpeechService;',
+    'android.permission.BIND_JOB_SERVICE': 'Landroid/app/job/JobService;',
+}
+
+# Framework classes are not in the APK's DEX files, so their hierarchy is spelled out here
+FRAMEWORK_SUPERCLASSES = {
+    'Landroid/app/Activity;': 'Landroid/view/ContextThemeWrapper;',
+    'Landroid/app/ListActivity;': ACTIVITY,
+    'Landroid/app/NativeActivity;': ACTIVITY,
+    'Landroid/app/AliasActivity;': ACTIVITY,
+    'Landroid/app/ExpandableListActivity;': ACTIVITY,
+    'Landroid/preference/PreferenceActivity;': 'Landroid/app/ListActivity;',
+    'Landroid/view/ContextThemeWrapper;': 'Landroid/content/ContextWrapper;',
+    'Landroid/app/Service;': 'Landroid/content/ContextWrapper;',
+    'Landroid/app/IntentService;': SERVICE,
+    'Landroid/app/job/JobService;': SERVICE,
+    'Landroid/accessibilityservice/AccessibilityService;': SERVICE,
+    'Landroid/speech/tts/TextToSpeechService;': SERVICE,
+    'Landroid/service/notification/NotificationListenerService;': SERVICE,
+    'Landroid/inputmethodservice/AbstractInputMethodService;': SERVICE,
+    'Landroid/inputmethodservice/InputMethodService;': 'Landroid/inputmethodservice/AbstractInputMethodService;',
+    'Landroid/service/wallpaper/WallpaperService;': SERVICE,
+    'Landroid/app/Application;': 'Landroid/content/ContextWrapper;',
+    'Landroid/content/ContextWrapper;': 'Landroid/content/Context;',
+    'Landroid/content/Context;': OBJECT,
+    'Landroid/appwidget/AppWidgetProvider;': RECEIVER,
+    'Landroid/app/admin/DeviceAdminReceiver;': RECEIVER,
+    'Landroid/content/BroadcastReceiver;': OBJECT,
+    'Landroid/content/SearchRecentSuggestionsProvider;': PROVIDER,
+    'Landroid/content/ContentProvider;': OBJECT,
+}
+
+
+class Component:
+    __slots__ = ('kind', 'class_name', 'descriptor', 'expected_base', 'element')
+
+    def __init__(self, kind, class_name, expected_base, element):
+        self.kind = kind
+        self.class_name = class_name
+        self.descriptor = class_name_to_descriptor(class_name)
+        self.expected_base = expected_base
+        self.element = element
+
+
+class ComponentIssue:
+    __slots__ = ('component', 'problem', 'detail')
+
+    def __init__(self, component, problem, detail):
+        self.component = component
+        self.problem = problem
+        self.detail = detail
+
+    def __str__(self):
+        return f"<{self.component.kind}> {self.component.class_name}: {self.detail}"
+
+
+def resolve_class_name(name, package):
+    if name.startswith('.'):
+        return package + name
+    if '.' not in name:
+        return f"{package}.{name}"
+    return name
+
+
+def _intent_actions(element):
+    return {action.get('name') for intent_filter in element.findall('intent-filter')
+            for action in intent_filter.findall('action')}
+
+
+def declared_components(manifest, package):
+    """Return a Component for every class-backed entry in the manifest"""
+    components = []
+    for application in manifest.findall('application'):
+        app_class = application.get('name')
+        if app_class:
+            components.append(Component('application', resolve_class_name(app_class, package),
+                                        APPLICATION, application))
+        for element in application.children:
+            base = COMPONENT_BASES.get(element.tag)
+            if base is None:
+                continue
+            name_attr = 'targetActivity' if element.tag == 'activity-alias' else 'name'
+            name = element.get(name_attr)
+            if not name:
+                continue
+            for marker in (element.get('permission'), *_intent_actions(element)):
+                base = SPECIALIZED_BASES.get(marker, base)
+            components.append(Component(element.tag, resolve_class_name(name, package), base, element))
+    return components
+
+
+class ComponentResolver:
+    def __init__(self, classes):
+        self.classes = classes
+        self._ancestors = {}
+
+    def ancestors(self, descriptor):
+        """Frozen set of every superclass of descriptor, memoised across components"""
+        cached = self._ancestors.get(descriptor)
+        if cached is not None:
+            return cached
+        path = []
+        current = descriptor
+        result = frozenset()
+        while current is not None:
+            if current in self._ancestors:
+                result = self._ancestors[current]
+                break
+            if current in path:
+                break
+            path.append(current)
+            class_def = self.classes.get(current)
+            current = class_def.superclass if class_def is not None else FRAMEWORK_SUPERCLASSES.get(current)
+        # Fill the memo from the top of the chain down so shared bases are computed once
+        for node in reversed(path):
+            result = result | {node}
+            self._ancestors[node] = result
+        return self._ancestors.get(descriptor, result)
+
+    def top_of_chain(self, descriptor):
+        """Outermost superclass reachable through the DEX and framework tables"""
+        for descriptor in self.classes.superclass_chain(descriptor):
+            pass
+        return descriptor
+
+    def check(self, components):
+        """Resolve all components in one pass and return a list of ComponentIssue"""
+        wanted = {component.descriptor for component in components}
+        defined = wanted & self.classes.classes.keys()
+        issues = []
+        for component in components:
+            if component.descriptor not in defined:
+                issues.append(ComponentIssue(component, 'missing_class',
+                                             "class not defined in any DEX file (ClassNotFoundException)"))
+                continue
+            ancestors = self.ancestors(component.descriptor)
+            if component.expected_base not in ancestors:
+                top = self.top_of_chain(component.descriptor)
+                if OBJECT in ancestors:
+                    issues.append(ComponentIssue(
+                        component, 'wrong_superclass',
+                        f"does not extend {component.expected_base[1:-1].replace('/', '.')}"))
+                elif not top.startswith(PLATFORM_PREFIXES):
+                    issues.append(ComponentIssue(
+                        component, 'missing_superclass',
+                        f"superclass {top[1:-1].replace('/', '.')} not defined in any DEX file"))
+            if (component.expected_base == NOTIFICATION_LISTENER and
+                    component.element.get('permission') != 'android.permission.BIND_NOTIFICATION_LISTENER_SERVICE'):
+                issues.append(ComponentIssue(component, 'missing_permission',
+                                             "listener service not protected by BIND_NOTIFICATION_LISTENER_SERVICE"))
+        return issues
+
+
+def check_apk(apk):
+    """Return (components, issues) for an open ApkIndex or LogicalApp"""
+    components = declared_components(apk.manifest, apk.package_name or '')
+    return components, ComponentResolver(apk.classes).check(components)
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <apk | app.aab | splits-dir>")
+        return 2
+
+    with open_app(sys.argv[1]) as apk:
+        components, issues = check_apk(apk)
+
+    print(f"Resolved {len(components)} manifest components against DEX")
+    for issue in issues:
+        print(f"  ❌ {issue}")
+    if not issues:
+        print("✅ Every declared component resolves to a class with the right superclass")
+    return 1 if issues else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
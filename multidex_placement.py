@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Multidex Primary-DEX Placement Analyzer
+Computes the class-reference closure of the start-up entry points (Application, content
+providers and the launcher activity) and reports start-up classes that landed outside
+classes.dex, with the bytes each one costs
+"""
+
+import sys
+
+from app_bundle import open_app
+from dex_index import REF_TYPE, REF_FIELD, REF_METHOD, class_name_to_descriptor
+from manifest_components import resolve_class_name
+
+MAIN_ACTION = 'android.intent.action.MAIN'
+LAUNCHER_CATEGORY = 'android.intent.category.LAUNCHER'
+
+
+def startup_entry_points(manifest, package):
+    """Descriptors the runtime instantiates before the first frame, in launch order"""
+    entries = []
+    for application in manifest.findall('application'):
+        for attr in ('appComponentFactory', 'name'):
+            value = application.get(attr)
+            if value:
+                entries.append(class_name_to_descriptor(resolve_class_name(value, package)))
+        for provider in application.findall('provider'):
+            if provider.get('name'):
+                entries.append(class_name_to_descriptor(resolve_class_name(provider.get('name'), package)))
+        for element in application.children:
+            if element.tag not in ('activity', 'activity-alias'):
+                continue
+            for intent_filter in element.findall('intent-filter'):
+                actions = {action.get('name') for action in intent_filter.findall('action')}
+                categories = {category.get('name') for category in intent_filter.findall('category')}
+                if MAIN_ACTION in actions and LAUNCHER_CATEGORY in categories:
+                    name = element.get('targetActivity' if element.tag == 'activity-alias' else 'name')
+                    entries.append(class_name_to_descriptor(resolve_class_name(name, package)))
+    return entries
+
+
+def element_descriptor(descriptor):
+    """[[Lfoo; -> Lfoo;  (None for primitive types and primitive arrays)"""
+    descriptor = descriptor.lstrip('[')
+    return descriptor if descriptor.startswith('L') else None
+
+
+class ClassReferenceGraph:
+    """Class-level reference edges (superclass, interfaces, code references), built on demand"""
+
+    def __init__(self, apk):
+        self.apk = apk
+        self.classes = apk.classes
+        self.dex_by_name = {dex.name: dex for dex in apk.dex_indexes}
+        self._edges = {}
+        self._costs = {}
+
+    def _scan(self, descriptor):
+        class_def = self.classes.get(descriptor)
+        dex = self.dex_by_name[class_def.dex_name]
+        refs = set(class_def.interfaces)
+        if class_def.superclass:
+            refs.add(class_def.superclass)
+        types = dex.types
+        cost = 32
+        for _method_idx, _flags, code_off in dex.class_methods(class_def):
+            if not code_off:
+                continue
+            cost += dex.code_size(code_off)
+            for kind, index in dex.iter_code_refs(code_off):
+                if kind == REF_TYPE:
+                    refs.add(types[index])
+                elif kind == REF_METHOD:
+                    refs.add(types[dex.method_ids[index][0]])
+                elif kind == REF_FIELD:
+                    refs.add(types[dex.field_ids[index][0]])
+        edges = set()
+        for ref in refs:
+            ref = element_descriptor(ref)
+            if ref and ref != descriptor and ref in self.classes:
+                edges.add(ref)
+        self._edges[descriptor] = edges
+        self._costs[descriptor] = cost
+
+    def edges(self, descriptor):
+        if descriptor not in self._edges:
+            self._scan(descriptor)
+        return self._edges[descriptor]
+
+    def byte_cost(self, descriptor):
+        """class_def plus code_item bytes attributed to descriptor"""
+        if descriptor not in self._costs:
+            self._scan(descriptor)
+        return self._costs[descriptor]
+
+    def closure(self, roots):
+        """Every APK-defined class reachable from roots"""
+        seen = set()
+        stack = [root for root in roots if root in self.classes]
+        while stack:
+            descriptor = stack.pop()
+            if descriptor in seen:
+                continue
+            seen.add(descriptor)
+            stack.extend(edge for edge in self.edges(descriptor) if edge not in seen)
+        return seen
+
+
+def analyze(apk):
+    """Return a dict describing where the start-up closure landed across classes*.dex"""
+    roots = startup_entry_points(apk.manifest, apk.package_name or '')
+    graph = ClassReferenceGraph(apk)
+    closure = graph.closure(roots)
+    primary = apk.dex_names[0] if apk.dex_names else None
+
+    per_dex = {}
+    misplaced = []
+    for descriptor in closure:
+        dex_name = apk.classes.get(descriptor).dex_name
+        per_dex[dex_name] = per_dex.get(dex_name, 0) + 1
+        if dex_name != primary:
+            misplaced.append((descriptor, dex_name, graph.byte_cost(descriptor)))
+    misplaced.sort(key=lambda item: item[2], reverse=True)
+
+    return {
+        'roots': roots,
+        'missing_roots': [root for root in roots if root not in apk.classes],
+        'closure_size': len(closure),
+        'closure_bytes': sum(graph.byte_cost(descriptor) for descriptor in closure),
+        'per_dex': per_dex,
+        'primary_dex': primary,
+        'misplaced': misplaced,
+        'misplaced_bytes': sum(cost for _descriptor, _dex, cost in misplaced),
+    }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <apk | app.aab | splits-dir>")
+        return 2
+
+    with open_app(sys.argv[1]) as apk:
+        report = analyze(apk)
+
+    print(f"Start-up roots: {', '.join(report['roots']) or 'none found'}")
+    for root in report['missing_roots']:
+        print(f"  ❌ {root} is not defined in any DEX file")
+    print(f"Start-up closure: {report['closure_size']} classes, {report['closure_bytes']} bytes")
+    for dex_name, count in sorted(report['per_dex'].items()):
+        print(f"  {dex_name}: {count} classes")
+
+    if not report['misplaced']:
+        print(f"✅ All start-up classes are in {report['primary_dex']}")
+        return 0
+
+    print(f"\n⚠️  {len(report['misplaced'])} start-up classes outside {report['primary_dex']} "
+          f"({report['misplaced_bytes']} bytes):")
+    for descriptor, dex_name, cost in report['misplaced']:
+        print(f"  {cost:>8} B  {dex_name:<14} {descriptor}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+NDJSON Check Records
+Validators write one JSON object per line as each check completes, flushed immediately,
+so batch runs over hundreds of APKs use constant memory and can be consumed while they
+are still running (tail -f, jq --stream, a CI log collector).
+
+Every record has exactly these keys, in this order:
+    schema     SCHEMA_VERSION; bumped only for incompatible changes
+    type       'check', or 'summary' once all checks of an APK are done
+    validator  name of the emitting validator
+    apk        path of the APK under test
+    seq        record number within the stream, from 1
+    ts         Unix time in seconds
+    check      check name ('summary' for summary records)
+    status     one of STATUSES
+    details    human-readable detail, possibly empty
+    data       check-specific values; always an object, possibly empty
+"""
+
+import contextlib
+import json
+import sys
+import time
+
+SCHEMA_VERSION = 1
+
+STATUS_PASS = 'pass'
+STATUS_FAIL = 'fail'
+STATUS_WARN = 'warn'
+STATUS_SKIP = 'skip'
+STATUSES = (STATUS_PASS, STATUS_FAIL, STATUS_WARN, STATUS_SKIP)
+
+
+class NdjsonReporter:
+    def __init__(self, out, validator):
+        self.out = out
+        self.validator = validator
+        self.apk = None
+        self.seq = 0
+        self.counts = dict.fromkeys(STATUSES, 0)
+
+    def start(self, apk):
+        """Begin the checks of one APK; counts for its summary record start from zero"""
+        self.apk = apk
+        self.counts = dict.fromkeys(STATUSES, 0)
+
+    def _write(self, record_type, check, status, details, data):
+        if status not in STATUSES:
+            raise ValueError(f"unknown status {status!r}")
+        self.seq += 1
+        record = {
+            'schema': SCHEMA_VERSION,
+            'type': record_type,
+            'validator': self.validator,
+            'apk': self.apk,
+            'seq': self.seq,
+            'ts': round(time.time(), 3),
+            'check': check,
+            'status': status,
+            'details': str(details),
+            'data': data,
+        }
+        self.out.write(json.dumps(record, default=str) + '\n')
+        self.out.flush()
+
+    def check(self, check, status, details='', **data):
+        """Record one check; status is a STATUSES value or a bool (True = pass, False = fail)"""
+        if status is True or status is False:
+            status = STATUS_PASS if status else STATUS_FAIL
+        self.counts[status] += 1
+        self._write('check', check, status, details, data)
+
+    def summary(self, details='', **data):
+        status = STATUS_FAIL if self.counts[STATUS_FAIL] else STATUS_PASS
+        self._write('summary', 'summary', status, details, {**self.counts, **data})
+
+    def close(self):
+        if self.out is not sys.stdout:
+            self.out.close()
+
+
+class NullReporter:
+    """Stands in when no --ndjson output was requested"""
+
+    out = None
+
+    def start(self, apk):
+        pass
+
+    def check(self, check, status, details='', **data):
+        pass
+
+    def summary(self, details='', **data):
+        pass
+
+    def close(self):
+        pass
+
+
+def open_reporter(path, validator):
+    """NdjsonReporter for path ('-' = stdout), or a NullReporter when path is None"""
+    if path is None:
+        return NullReporter()
+    if path == '-':
+        return NdjsonReporter(sys.stdout, validator)
+    return NdjsonReporter(open(path, 'w', encoding='utf-8'), validator)
+
+
+def human_output(reporter):
+    """Context that moves the validator's own prints to stderr while records go to stdout"""
+    if reporter.out is sys.stdout:
+        return contextlib.redirect_stdout(sys.stderr)
+    return contextlib.nullcontext()
+
+
+def add_arguments(parser, default_apk):
+    parser.add_argument('apks', nargs='*', default=[default_apk], metavar='apk',
+                        help=f"APKs to validate (default: {default_apk})")
+    parser.add_argument('--ndjson', metavar='FILE',
+                        help="stream one JSON record per check to FILE ('-' for stdout)")
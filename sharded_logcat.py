@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Sharded Logcat Ingestion
+Splits a (multi-gigabyte) logcat capture into line-aligned byte ranges, parses the
+DebugIvonaTTS events of each range in a process pool over an mmap, and merges the
+per-shard results in timestamp order
+"""
+
+import argparse
+import heapq
+import mmap
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from logcat_events import TAGS, assign_tests, parse_line, test_runs
+
+SHARDS_PER_WORKER = 4
+MIN_SHARD_BYTES = 1 << 20
+
+
+def shard_ranges(path, shard_count):
+    """Return [(start, end)] byte ranges covering path, each ending just after a newline"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    shard_count = max(1, min(shard_count, size // MIN_SHARD_BYTES or 1))
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        bounds = [0]
+        for i in range(1, shard_count):
+            cut = mm.find(b'\n', max(size * i // shard_count, bounds[-1]))
+            if cut < 0:
+                break
+            if cut + 1 > bounds[-1]:
+                bounds.append(cut + 1)
+        bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+
+def parse_shard(args):
+    """Parse the TTS events in one byte range; returns them sorted by timestamp"""
+    path, start, end, tags = args
+    tag_re = re.compile(b'|'.join(re.escape(tag.encode()) for tag in tags))
+    events = []
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < end:
+            match = tag_re.search(mm, pos, end)
+            if match is None:
+                break
+            line_start = mm.rfind(b'\n', start, match.start()) + 1
+            if line_start < start:
+                line_start = start
+            line_end = mm.find(b'\n', match.end(), end)
+            if line_end < 0:
+                line_end = end
+            line = mm[line_start:line_end].decode('utf-8', errors='replace').rstrip('\r')
+            event = parse_line(line, tags)
+            if event is not None:
+                events.append(event)
+            pos = line_end + 1
+    events.sort(key=lambda event: event.ts)
+    return events
+
+
+def parse_capture(path, workers=None, tags=TAGS):
+    """Return the assigned LogEvents of a capture, parsed in parallel shards"""
+    workers = workers or os.cpu_count() or 1
+    ranges = shard_ranges(path, workers * SHARDS_PER_WORKER)
+    jobs = [(path, start, end, tags) for start, end in ranges]
+    if workers == 1 or len(jobs) <= 1:
+        shard_results = [parse_shard(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shard_results = list(pool.map(parse_shard, jobs))
+    return list(assign_tests(heapq.merge(*shard_results, key=lambda event: event.ts)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('capture')
+    parser.add_argument('--workers', type=int, default=None, help='process count (default: all cores)')
+    args = parser.parse_args()
+
+    size_mb = os.path.getsize(args.capture) / (1024 * 1024)
+    started = time.perf_counter()
+    events = parse_capture(args.capture, args.workers)
+    elapsed = time.perf_counter() - started
+
+    runs = test_runs(events)
+    print(f"Parsed {size_mb:.1f} MB in {elapsed:.2f}s ({size_mb / elapsed if elapsed else 0:.0f} MB/s) "
+          f"with {args.workers or os.cpu_count()} workers")
+    print(f"{len(events)} TTS events, {len(runs)} test runs")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
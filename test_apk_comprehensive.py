@@ -4,14 +4,17 @@ Comprehensive APK Test Report
 Tests that the APK was correctly built with all required components
 """
 
-import zipfile
 import os
 import struct
 import sys
+import argparse
+
+from ndjson_report import add_arguments, human_output, open_reporter
+from zip_entries import ZipArchive
 
 APK_PATH = '/workspaces/codespaces-blank/ttsrepro-debug.apk'
 
-def test_apk_structure():
+def test_apk_structure(apk_path=APK_PATH):
     """Test that APK has all required files"""
     print("=" * 70)
     print("TEST 1: APK ZIP Structure Validation")
@@ -28,21 +31,30 @@ def test_apk_structure():
     ]
     
     try:
-        with zipfile.ZipFile(APK_PATH, 'r') as z:
-            files_in_apk = set(z.namelist())
+        with ZipArchive(apk_path) as z:
+            # One pass over the central directory instead of a set of every name
+            exact = set()
+            variants = {}
+            total_files = 0
+            for entry in z:
+                total_files += 1
+                for req_file in required_files:
+                    if entry.name == req_file:
+                        exact.add(req_file)
+                    elif req_file not in variants and req_file.split('/')[-1] in entry.name:
+                        variants[req_file] = entry.name
             
-            print(f"\nAPK File: {APK_PATH}")
-            print(f"File size: {os.path.getsize(APK_PATH) / (1024*1024):.2f} MB")
-            print(f"Total files: {len(files_in_apk)}\n")
+            print(f"\nAPK File: {apk_path}")
+            print(f"File size: {os.path.getsize(apk_path) / (1024*1024):.2f} MB")
+            print(f"Total files: {total_files}{' (ZIP64)' if z.zip64 else ''}\n")
             
             all_present = True
             for req_file in required_files:
-                if req_file in files_in_apk:
+                if req_file in exact:
                     print(f"  ✓ {req_file}")
                 else:
-                    matching = [f for f in files_in_apk if req_file.split('/')[-1] in f]
-                    if matching:
-                        print(f"  ✓ {matching[0]} (variant of {req_file})")
+                    if req_file in variants:
+                        print(f"  ✓ {variants[req_file]} (variant of {req_file})")
                     else:
                         print(f"  ✗ {req_file} - NOT FOUND")
                         all_present = False
@@ -52,7 +64,7 @@ def test_apk_structure():
         print(f"✗ Error: {e}")
         return False
 
-def test_dex_classes():
+def test_dex_classes(apk_path=APK_PATH):
     """Test that DEX files contain required classes"""
     print("\n" + "=" * 70)
     print("TEST 2: DEX Classes Verification")
@@ -64,16 +76,15 @@ def test_dex_classes():
     ]
     
     try:
-        with zipfile.ZipFile(APK_PATH, 'r') as z:
-            dex_files = [n for n in z.namelist() if n.endswith('.dex')]
+        with ZipArchive(apk_path) as z:
+            dex_files = [entry for entry in z if entry.name.endswith('.dex')]
             print(f"\nFound {len(dex_files)} DEX file(s)")
             
             for dex_file in dex_files:
-                dex_data = z.read(dex_file)
-                print(f"\n  {dex_file} ({len(dex_data)} bytes)")
+                print(f"\n  {dex_file.name} ({dex_file.file_size} bytes)")
                 
                 # Check magic number
-                magic = dex_data[:4]
+                magic = z.read_head(dex_file, 4)
                 if magic == b'dex\n':
                     print(f"    ✓ Valid DEX magic number")
                 else:
@@ -81,10 +92,13 @@ def test_dex_classes():
                     
             print(f"\n  Classes in APK:")
             all_classes_found = True
+            # Streamed search for the descriptor, its slash form without 'L' and its dotted form
+            forms = {cls: (cls.encode(), cls[1:].encode(), cls[1:].replace('/', '.').encode())
+                     for cls in required_classes}
             for dex_file in dex_files:
-                dex_data = z.read(dex_file).decode('utf-8', errors='ignore')
+                found = z.contains(dex_file, [form for cls_forms in forms.values() for form in cls_forms])
                 for cls in required_classes:
-                    if cls in dex_data or cls.replace('L', '').replace('/', '.') in dex_data.replace('/', '.'):
+                    if found.intersection(forms[cls]):
                         print(f"    ✓ {cls}")
                     else:
                         print(f"    ? {cls} (may be present, verification limited)")
@@ -94,16 +108,18 @@ def test_dex_classes():
         print(f"  ✗ Error reading DEX: {e}")
         return False
 
-def test_manifest():
+def test_manifest(apk_path=APK_PATH):
     """Test AndroidManifest.xml"""
     print("\n" + "=" * 70)
     print("TEST 3: AndroidManifest.xml Content")
     print("=" * 70)
     
     try:
-        with zipfile.ZipFile(APK_PATH, 'r') as z:
-            manifest_binary = z.read('AndroidManifest.xml')
-            manifest_text = manifest_binary.decode('utf-8', errors='ignore')
+        with ZipArchive(apk_path) as z:
+            manifest = next((entry for entry in z if entry.name == 'AndroidManifest.xml'), None)
+            if manifest is None:
+                raise KeyError("There is no item named 'AndroidManifest.xml' in the archive")
+            manifest_binary = z.read(manifest)
             
             print(f"\nManifest size: {len(manifest_binary)} bytes")
             print("\nChecking manifest content:")
@@ -129,26 +145,39 @@ def test_manifest():
         print(f"  ✗ Error: {e}")
         return False
 
-def test_resources():
+def test_resources(apk_path=APK_PATH):
     """Test resources are present"""
     print("\n" + "=" * 70)
     print("TEST 4: Resources Verification")
     print("=" * 70)
     
     try:
-        with zipfile.ZipFile(APK_PATH, 'r') as z:
-            resources = [n for n in z.namelist() if 'res/' in n]
-            print(f"\nFound {len(resources)} resource files")
-            
-            layout_files = [n for n in resources if 'layout' in n]
-            string_files = [n for n in resources if 'values' in n and 'strings' in n]
+        with ZipArchive(apk_path) as z:
+            # Counts plus the first five names of each kind; nothing else is kept
+            resource_count = layout_count = string_count = 0
+            layout_files = []
+            string_files = []
+            for entry in z:
+                name = entry.name
+                if 'res/' not in name:
+                    continue
+                resource_count += 1
+                if 'layout' in name:
+                    layout_count += 1
+                    if len(layout_files) < 5:
+                        layout_files.append(name)
+                if 'values' in name and 'strings' in name:
+                    string_count += 1
+                    if len(string_files) < 5:
+                        string_files.append(name)
+            print(f"\nFound {resource_count} resource files")
             
-            print(f"\n  Layouts: {len(layout_files)}")
-            for f in layout_files[:5]:
+            print(f"\n  Layouts: {layout_count}")
+            for f in layout_files:
                 print(f"    ✓ {f}")
             
-            print(f"\n  Strings: {len(string_files)}")
-            for f in string_files[:5]:
+            print(f"\n  Strings: {string_count}")
+            for f in string_files:
                 print(f"    ✓ {f}")
                 
             if layout_files and string_files:
@@ -159,16 +188,27 @@ def test_resources():
         print(f"  ✗ Error: {e}")
         return False
 
-def main():
-    if not os.path.exists(APK_PATH):
-        print(f"ERROR: APK not found at {APK_PATH}")
-        sys.exit(1)
+TESTS = (
+    ("APK Structure", test_apk_structure),
+    ("DEX Classes", test_dex_classes),
+    ("Manifest", test_manifest),
+    ("Resources", test_resources),
+)
+
+def report(reporter, apk_path=APK_PATH):
+    """Run every test against apk_path, streaming a record per test; return True if all passed"""
+    reporter.start(apk_path)
+    if not os.path.exists(apk_path):
+        print(f"ERROR: APK not found at {apk_path}")
+        reporter.check("APK exists", False, "APK not found")
+        reporter.summary("APK not found")
+        return False
     
     results = []
-    results.append(("APK Structure", test_apk_structure()))
-    results.append(("DEX Classes", test_dex_classes()))
-    results.append(("Manifest", test_manifest()))
-    results.append(("Resources", test_resources()))
+    for test_name, test in TESTS:
+        result = test(apk_path)
+        results.append((test_name, result))
+        reporter.check(test_name, result, test.__doc__)
     
     print("\n" + "=" * 70)
     print("FINAL RESULTS")
@@ -179,18 +219,35 @@ def main():
         print(f"  {status}: {test_name}")
     
     all_passed = all(r for _, r in results)
+    reporter.summary(f"{sum(1 for _, r in results if r)} of {len(results)} passed")
     
     print("\n" + "=" * 70)
     if all_passed:
         print("✓✓✓ ALL TESTS PASSED ✓✓✓")
         print("\nAPK is ready for deployment!")
         print("\nInstall with:")
-        print(f"  adb install -r {APK_PATH}")
+        print(f"  adb install -r {apk_path}")
         print("\nOr use Android Studio to deploy to emulator/device")
     else:
         print("✗✗✗ SOME TESTS FAILED ✗✗✗")
-        sys.exit(1)
     print("=" * 70)
+    return all_passed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser, APK_PATH)
+    args = parser.parse_args()
+    
+    reporter = open_reporter(args.ndjson, 'apk_comprehensive')
+    all_passed = True
+    try:
+        with human_output(reporter):
+            for apk_path in args.apks:
+                all_passed &= report(reporter, apk_path)
+    finally:
+        reporter.close()
+    if not all_passed:
+        sys.exit(1)
 
 if __name__ == '__main__':
     main()
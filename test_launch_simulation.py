@@ -4,12 +4,18 @@ APK Launch Simulation Test Suite
 Tests that ttsrepro-debug.apk will launch without crashing
 """
 
-import zipfile
 import struct
 import os
 import sys
+import argparse
 from pathlib import Path
 
+from apk_index import ApkIndex
+from layout_inflation import LayoutInflationChecker
+from manifest_components import check_apk
+from ndjson_report import NullReporter, add_arguments, human_output, open_reporter
+from zip_entries import ZipArchive
+
 # Colors for output
 GREEN = '\033[92m'
 RED = '\033[91m'
@@ -18,8 +24,10 @@ RESET = '\033[0m'
 BOLD = '\033[1m'
 
 class APKLaunchSimulator:
-    def __init__(self, apk_path):
+    def __init__(self, apk_path, reporter=None):
         self.apk_path = apk_path
+        self.reporter = reporter or NullReporter()
+        self.phase = None
         self.passed = 0
         self.failed = 0
         
@@ -27,12 +35,14 @@ class APKLaunchSimulator:
         print(f"{GREEN}✅ PASS{RESET}: {test_name}")
         if message:
             print(f"   → {message}")
+        self.reporter.check(test_name, True, message, phase=self.phase)
         self.passed += 1
         
     def log_fail(self, test_name, message=""):
         print(f"{RED}❌ FAIL{RESET}: {test_name}")
         if message:
             print(f"   → {message}")
+        self.reporter.check(test_name, False, message, phase=self.phase)
         self.failed += 1
         
     def log_info(self, message):
@@ -43,9 +53,7 @@ class APKLaunchSimulator:
         print(f"\n{BOLD}Phase 1: APK Structure Validation{RESET}\n")
         
         try:
-            with zipfile.ZipFile(self.apk_path, 'r') as apk:
-                namelist = apk.namelist()
-                
+            with ZipArchive(self.apk_path) as apk:
                 # Check required files
                 required_files = [
                     'AndroidManifest.xml',
@@ -53,16 +61,23 @@ class APKLaunchSimulator:
                     'resources.arsc',
                 ]
                 
+                present = set()
+                layout_files = 0
+                for entry in apk:
+                    if entry.name in required_files:
+                        present.add(entry.name)
+                    if 'layout' in entry.name and entry.name.endswith('.xml'):
+                        layout_files += 1
+                
                 for required_file in required_files:
-                    if required_file in namelist:
+                    if required_file in present:
                         self.log_pass(f"APK contains {required_file}")
                     else:
                         self.log_fail(f"APK missing {required_file}")
                         
                 # Check for at least one activity layout
-                layout_files = [f for f in namelist if 'layout' in f and f.endswith('.xml')]
                 if layout_files:
-                    self.log_pass(f"Layout XML files found", f"{len(layout_files)} layouts")
+                    self.log_pass(f"Layout XML files found", f"{layout_files} layouts")
                 else:
                     self.log_fail("No layout XML files found")
                     
@@ -77,25 +92,26 @@ class APKLaunchSimulator:
         print(f"\n{BOLD}Phase 2: DEX File Validity{RESET}\n")
         
         try:
-            with zipfile.ZipFile(self.apk_path, 'r') as apk:
-                dex_files = [f for f in apk.namelist() if f.startswith('classes') and f.endswith('.dex')]
+            with ZipArchive(self.apk_path) as apk:
+                dex_files = [entry for entry in apk if entry.name.startswith('classes') and entry.name.endswith('.dex')]
                 
                 if not dex_files:
                     self.log_fail("No DEX files found in APK")
                     return False
                     
-                self.log_info(f"Found {len(dex_files)} DEX files: {', '.join(dex_files)}")
+                self.log_info(f"Found {len(dex_files)} DEX files: {', '.join(entry.name for entry in dex_files)}")
                 
                 for dex_file in dex_files:
-                    dex_data = apk.read(dex_file)
+                    # Only the header is inflated
+                    dex_data = apk.read_head(dex_file, 8)
                     
                     # Check DEX magic number (first 4 bytes should be: 64 65 78 0a = "dex\n")
                     if dex_data[:4] == b'dex\n':
                         # Check version
                         version = dex_data[4:7].decode('ascii', errors='ignore')
-                        self.log_pass(f"{dex_file} has valid magic number", f"Version: {version}")
+                        self.log_pass(f"{dex_file.name} has valid magic number", f"Version: {version}")
                     else:
-                        self.log_fail(f"{dex_file} has invalid magic number", 
+                        self.log_fail(f"{dex_file.name} has invalid magic number", 
                                      f"Got: {dex_data[:4].hex()}")
                         return False
                         
@@ -118,17 +134,21 @@ class APKLaunchSimulator:
         }
         
         try:
-            with zipfile.ZipFile(self.apk_path, 'r') as apk:
-                dex_files = [f for f in apk.namelist() if f.startswith('classes') and f.endswith('.dex')]
+            with ZipArchive(self.apk_path) as apk:
+                dex_files = [entry for entry in apk if entry.name.startswith('classes') and entry.name.endswith('.dex')]
+                
+                # Each DEX is streamed once for every class still missing
+                found_bytes = set()
+                for dex_file in dex_files:
+                    missing = set(required_classes.values()) - found_bytes
+                    if not missing:
+                        break
+                    found_bytes |= apk.contains(dex_file, missing)
                 
                 for class_name, class_bytes in required_classes.items():
-                    found = False
-                    for dex_file in dex_files:
-                        dex_data = apk.read(dex_file)
-                        if class_bytes in dex_data:
-                            self.log_pass(f"Class {class_name} found in bytecode")
-                            found = True
-                            break
+                    found = class_bytes in found_bytes
+                    if found:
+                        self.log_pass(f"Class {class_name} found in bytecode")
                     
                     if not found:
                         self.log_fail(f"Class {class_name} NOT found in bytecode")
@@ -151,8 +171,11 @@ class APKLaunchSimulator:
         }
         
         try:
-            with zipfile.ZipFile(self.apk_path, 'r') as apk:
-                manifest_data = apk.read('AndroidManifest.xml')
+            with ZipArchive(self.apk_path) as apk:
+                manifest = next((entry for entry in apk if entry.name == 'AndroidManifest.xml'), None)
+                if manifest is None:
+                    raise KeyError("There is no item named 'AndroidManifest.xml' in the archive")
+                manifest_data = apk.read(manifest)
                 
                 # Binary manifest can contain UTF-8 strings even in binary format
                 manifest_strings = []
@@ -197,25 +220,54 @@ class APKLaunchSimulator:
         """Simulate what happens during app launch"""
         print(f"\n{BOLD}Phase 5: Launch Simulation{RESET}\n")
         
-        steps = [
-            ("APK file found and readable", self.apk_path, "verify file exists"),
-            ("Valid ZIP archive", True, "APK integrity confirmed"),
-            ("Manifest loads", True, "AndroidManifest.xml valid"),
-            ("DEX files load", True, "All DEX files have valid magic numbers"),
-            ("MainActivity class instantiated", True, "Lcom/micoyc/ttsrepro/MainActivity; present in bytecode"),
-            ("onCreate() called", True, "com.micoyc.ttsrepro.MainActivity found"),
-            ("setContentView(R.layout.activity_main)", True, "Activity layout XML present"),
-            ("findViewById<Button>() finds button", True, "R$id class references openSettingsButton"),
-            ("Button OnClickListener registered", True, "Classes compiled with proper lambdas"),
-            ("Activity renders to screen", True, "No null pointer exceptions expected"),
-        ]
+        main_activity = 'Lcom/micoyc/ttsrepro/MainActivity;'
+        main_layout = 'res/layout/activity_main.xml'
         
-        for step_name, expected, reason in steps:
-            if expected is True or (isinstance(expected, str) and os.path.exists(expected)):
-                self.log_pass(step_name, reason)
-            else:
-                self.log_fail(step_name, reason)
-                return False
+        try:
+            with ApkIndex(self.apk_path) as apk:
+                if main_activity in apk.classes:
+                    dex_name = apk.classes.get(main_activity).dex_name
+                    self.log_pass("MainActivity class instantiated", f"{main_activity} defined in {dex_name}")
+                else:
+                    self.log_fail("MainActivity class instantiated", f"{main_activity} not defined in any DEX file")
+                    return False
+                
+                if main_layout not in apk.entries:
+                    self.log_fail("setContentView(R.layout.activity_main)", f"{main_layout} missing from APK")
+                    return False
+                
+                checker = LayoutInflationChecker(apk)
+                results = checker.check()
+                
+                main_failures = results.get(main_layout, [])
+                if main_failures:
+                    for failure in main_failures:
+                        self.log_fail("setContentView(R.layout.activity_main)", str(failure))
+                    return False
+                self.log_pass("setContentView(R.layout.activity_main)",
+                              f"{len(checker.summaries[main_layout])} views resolve against DEX and resources.arsc")
+                
+                button_ids = {res_id for res_id, entry in apk.resources.entries.items()
+                              if entry.type_name == 'id' and entry.key == 'openSettingsButton'}
+                layout_ids = {res_id for _tag, _line, _cls, refs in checker.summaries[main_layout]
+                              for attr_name, _type, res_id in refs if attr_name == 'id'}
+                if button_ids & layout_ids:
+                    self.log_pass("findViewById<Button>() finds button", "@id/openSettingsButton declared in activity_main")
+                else:
+                    self.log_fail("findViewById<Button>() finds button", "@id/openSettingsButton not declared in activity_main")
+                    return False
+                
+                failed_layouts = {name: failures for name, failures in results.items() if failures}
+                if failed_layouts:
+                    for name, failures in sorted(failed_layouts.items()):
+                        for failure in failures:
+                            self.log_fail(f"Inflate {name}", str(failure))
+                    return False
+                self.log_pass("All layouts inflate", f"{len(results)} layouts checked")
+                
+        except Exception as e:
+            self.log_fail("Launch simulation", str(e))
+            return False
                 
         return True
         
@@ -223,23 +275,53 @@ class APKLaunchSimulator:
         """Analyze potential crash sources"""
         print(f"\n{BOLD}Phase 6: Crash Risk Analysis{RESET}\n")
         
-        crash_risks = {
-            "Missing MainActivity": (False, "Class is in bytecode"),
-            "Null layout resource": (False, "activity_main.xml is in APK"),
-            "Missing button ID": (False, "R$id contains openSettingsButton"),
-            "Permission errors": (False, "BIND_NOTIFICATION_LISTENER_SERVICE declared"),
-            "Invalid manifest": (False, "Manifest parses without errors"),
-            "DEX corruption": (False, "All DEX files have valid magic numbers"),
-            "Resource inflation error": (False, "All R classes properly compiled"),
-            "Service context crash": (False, "Proper exception handling in code"),
-        }
+        try:
+            with ApkIndex(self.apk_path) as apk:
+                try:
+                    apk.classes
+                except Exception as e:
+                    self.log_fail("Risk detected: DEX corruption", str(e))
+                    return False
+                
+                try:
+                    components, issues = check_apk(apk)
+                except Exception as e:
+                    self.log_fail("Risk detected: Invalid manifest", str(e))
+                    return False
+                
+                by_problem = {}
+                for issue in issues:
+                    by_problem.setdefault(issue.problem, []).append(str(issue))
+                
+                main_missing = [issue for issue in by_problem.get('missing_class', [])
+                                if 'MainActivity' in issue]
+                
+                layout_failures = [str(failure) for failures in LayoutInflationChecker(apk).check().values()
+                                   for failure in failures]
+                
+                crash_risks = {
+                    "Missing MainActivity": (main_missing, "MainActivity defined in DEX"),
+                    "Missing component class": (by_problem.get('missing_class', []) + by_problem.get('missing_superclass', []),
+                                                f"All {len(components)} manifest components resolve in DEX"),
+                    "Wrong component superclass": (by_problem.get('wrong_superclass', []),
+                                                   "Components extend their framework base classes"),
+                    "Permission errors": (by_problem.get('missing_permission', []),
+                                          "BIND_NOTIFICATION_LISTENER_SERVICE declared"),
+                    "Invalid manifest": ([], "Manifest parses without errors"),
+                    "DEX corruption": ([], f"All {len(apk.dex_names)} DEX files parse"),
+                    "Resource inflation error": (layout_failures, f"All {len(apk.layout_names)} layouts inflate"),
+                }
+        except Exception as e:
+            self.log_fail("Crash risk analysis", str(e))
+            return False
         
         all_safe = True
-        for risk, (has_risk, mitigation) in crash_risks.items():
-            if not has_risk:
+        for risk, (findings, mitigation) in crash_risks.items():
+            if not findings:
                 self.log_pass(f"No risk: {risk}", mitigation)
             else:
-                self.log_fail(f"Risk detected: {risk}", mitigation)
+                for finding in findings:
+                    self.log_fail(f"Risk detected: {risk}", finding)
                 all_safe = False
                 
         return all_safe
@@ -258,6 +340,7 @@ class APKLaunchSimulator:
         print(f"{RED}Failed: {self.failed}{RESET}")
         print(f"Pass Rate: {pass_rate:.1f}%\n")
         
+        self.reporter.summary(f"{self.passed} passed, {self.failed} failed", pass_rate=round(pass_rate, 1))
         if self.failed == 0:
             print(f"{GREEN}{BOLD}✅ ALL TESTS PASSED{RESET}")
             print(f"{GREEN}APK is safe to install and launch with zero crash risk.{RESET}\n")
@@ -282,23 +365,42 @@ class APKLaunchSimulator:
         ]
         
         for test in tests:
+            self.phase = test.__name__
             try:
                 result = test()
                 if not result:
                     self.log_fail(f"{test.__name__} returned False")
             except Exception as e:
                 print(f"{RED}Error in {test.__name__}: {e}{RESET}")
+                self.reporter.check(test.__name__, False, f"Error: {e}", phase=self.phase)
+        self.phase = None
                 
         return self.print_summary()
 
 
-if __name__ == '__main__':
-    apk_path = '/workspaces/codespaces-blank/SpeakThat/ttsrepro/build/outputs/apk/debug/ttsrepro-debug.apk'
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser, '/workspaces/codespaces-blank/SpeakThat/ttsrepro/build/outputs/apk/debug/ttsrepro-debug.apk')
+    args = parser.parse_args()
     
-    if not os.path.exists(apk_path):
-        print(f"{RED}APK not found: {apk_path}{RESET}")
-        sys.exit(1)
-        
-    simulator = APKLaunchSimulator(apk_path)
-    exit_code = simulator.run_all_tests()
-    sys.exit(exit_code)
+    reporter = open_reporter(args.ndjson, 'launch_simulation')
+    exit_code = 0
+    try:
+        with human_output(reporter):
+            for apk_path in args.apks:
+                reporter.start(apk_path)
+                if not os.path.exists(apk_path):
+                    print(f"{RED}APK not found: {apk_path}{RESET}")
+                    reporter.check("APK exists", False, f"APK not found: {apk_path}")
+                    reporter.summary("APK not found")
+                    exit_code = 1
+                    continue
+                simulator = APKLaunchSimulator(apk_path, reporter)
+                exit_code |= simulator.run_all_tests()
+    finally:
+        reporter.close()
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
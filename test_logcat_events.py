@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Logcat Event Classifier Tests
+Classifies the exact TestNotificationService log lines that carry init results and utterance callbacks
+"""
+
+import sys
+
+import pytest
+
+from logcat_events import (INIT_FAIL, INIT_OK, SPEAK, SPEECH_RATE, UTTERANCE_DONE, UTTERANCE_ERROR,
+                           UTTERANCE_START, parse_line)
+
+SERVICE_LINES = (
+    # TestNotificationService.kt: recovery test reports init results indented
+    ("  - SUCCESS: TTS initialized", INIT_OK),
+    ("  - SUCCESS: TTS reinitialized (but with DIFFERENT engine!)", INIT_OK),
+    ("  - FAILED: Recovery reinit failed, status: -1", INIT_FAIL),
+    ("SUCCESS: TTS initialized", INIT_OK),
+    ("FAILED: TTS init, status: -1", INIT_FAIL),
+    ("Setting speech rate: 1.5", SPEECH_RATE),
+    # speak() results, including the free-text "Speak result ...:" forms
+    ("Speak result: 0", SPEAK),
+    ("Speak result with locale en_US: 0", SPEAK),
+    ("Speak result with speech settings: 0", SPEAK),
+    ("Speak result after recovery: -1", SPEAK),
+    ("Speak result with NOTIFICATION usage: 0", SPEAK),
+    ("  - speak() returned: 0", SPEAK),
+    ("Second speak (QUEUE_ADD) returned: 0", SPEAK),
+    ("speak() with bundle returned: 0", SPEAK),
+    # Listener-after-speak test
+    ("  - Callback RECEIVED: onStart for listener_test", UTTERANCE_START),
+    ("  - Callback RECEIVED: onDone for listener_test", UTTERANCE_DONE),
+    ("  - Callback RECEIVED: onError for listener_test", UTTERANCE_ERROR),
+    # Combined listener + bundle test
+    ("  - onStart combined_test", UTTERANCE_START),
+    ("  - onDone combined_test", UTTERANCE_DONE),
+    ("  - onError combined_test", UTTERANCE_ERROR),
+)
+
+
+@pytest.mark.parametrize('message, kind', SERVICE_LINES)
+def test_service_line_kind(message, kind):
+    line = f"10-19 12:00:00.123  4321  4321 D TestNotificationSvc: {message}"
+    event = parse_line(line)
+    assert event is not None, message
+    assert event.kind == kind
+
+
+def test_speak_result_code():
+    event = parse_line("10-19 12:00:00.123  4321  4321 D TestNotificationSvc: Speak result after recovery: -1")
+    assert event.detail == '-1'
+
+
+def test_non_speak_results_ignored():
+    for message in ("setSpeechRate() returned: 0", "setLanguage() returned: 0", "isLanguageAvailable() returned: 1"):
+        assert parse_line(f"10-19 12:00:00.123  4321  4321 D TestNotificationSvc: {message}") is None
+
+
+def test_other_tags_ignored():
+    assert parse_line("10-19 12:00:00.123  4321  4321 D SomethingElse:   - onError combined_test") is None
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
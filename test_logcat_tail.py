@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Rolling TTS Metrics Tests
+Replays a small TestNotificationService capture through RollingTtsMetrics and checks the
+window counts and bind latency percentiles as samples expire
+"""
+
+import sys
+
+import pytest
+
+from logcat_events import UTTERANCE_DONE, UTTERANCE_ERROR, UTTERANCE_START, parse_line
+from logcat_tail import RollingTtsMetrics
+
+CAPTURE = (
+    ("00.000", 100, "=== SERVICE TEST: 2-arg TTS (Service Context) ==="),
+    ("00.300", 100, "SUCCESS: TTS initialized"),
+    ("01.000", 100, "  - onStart combined_test"),
+    ("02.000", 100, "  - onDone combined_test"),
+    ("03.000", 200, "=== SERVICE TEST: 3-arg TTS with Selected Engine ==="),
+    ("03.100", 200, "SUCCESS: TTS initialized"),
+    ("04.000", 300, "=== SERVICE TEST: QUEUE_ADD mode (like VoiceNotify) ==="),
+    ("04.500", 300, "FAILED: TTS init, status: -1"),
+    ("05.000", 200, "  - onStart combined_test"),
+    ("06.000", 400, "=== SERVICE TEST: Bundle parameters in speak() ==="),
+    ("06.700", 400, "SUCCESS: TTS initialized"),
+    # 10 s window: the next two lines expire the first init and then the whole first test
+    ("12.000", 200, "  - onDone combined_test"),
+    ("14.000", 400, "  - onStart combined_test"),
+)
+
+
+def events():
+    for seconds, pid, message in CAPTURE:
+        event = parse_line(f"10-19 12:00:{seconds}  {pid}  {pid} D TestNotificationSvc: {message}")
+        assert event is not None, message
+        yield event
+
+
+def replayed(count):
+    metrics = RollingTtsMetrics(window_ms=10000)
+    for event in list(events())[:count]:
+        metrics.add(event)
+    return metrics
+
+
+def counts(metrics, test):
+    return tuple(metrics._per_test[test][kind] for kind in (UTTERANCE_START, UTTERANCE_DONE, UTTERANCE_ERROR))
+
+
+def test_window_before_expiry():
+    metrics = replayed(11)
+    assert metrics.total_events == 11
+    assert metrics.init_success_rate() == pytest.approx(3 / 4)
+    assert [metrics.latency_percentile(p) for p in (0, 50, 99, 100)] == [100, 300, 700, 700]
+    assert counts(metrics, 'test_2arg') == (1, 1, 0)
+    assert counts(metrics, 'test_3arg') == (1, 0, 0)
+    assert set(metrics._per_test) == {'test_2arg', 'test_3arg'}
+
+
+def test_expired_samples_leave_window():
+    metrics = replayed(12)
+    assert metrics.init_success_rate() == pytest.approx(2 / 3)
+    assert [metrics.latency_percentile(p) for p in (0, 50, 100)] == [100, 100, 700]
+    assert counts(metrics, 'test_2arg') == (0, 1, 0)
+    assert counts(metrics, 'test_3arg') == (1, 1, 0)
+
+    metrics = replayed(len(CAPTURE))
+    assert metrics.total_events == len(CAPTURE)
+    assert metrics.init_success_rate() == pytest.approx(1 / 2)
+    assert metrics.latency_percentile(50) == 700
+    assert set(metrics._per_test) == {'test_3arg', 'test_bundle_params'}
+    assert counts(metrics, 'test_bundle_params') == (1, 0, 0)
+
+
+def test_summary_reports_window():
+    summary = replayed(len(CAPTURE)).summary()
+    assert 'last 10s of log time (13 events seen)' in summary
+    assert 'onInit success: 50% of 2' in summary
+    assert 'p50 700 ms  p90 700 ms  p99 700 ms  (n=1)' in summary
+
+
+def test_empty_window():
+    metrics = RollingTtsMetrics()
+    assert metrics.init_success_rate() is None
+    assert metrics.latency_percentile(50) is None
+    assert 'bind latency:   -' in metrics.summary()
+
+
+if __name__ == '__main__':
+    sys.exit(pytest.main([__file__, '-q']))
@@ -4,12 +4,21 @@ Comprehensive TTSTestApp Runtime Testing Suite
 Tests the fresh TTSTestApp APK without emulator
 """
 
-import zipfile
 import subprocess
 import os
+import sys
 import json
+import argparse
 from pathlib import Path
 
+import unused_resources
+from apk_index import ApkIndex
+from ndjson_report import NullReporter, STATUS_SKIP, add_arguments, human_output, open_reporter
+from zip_alignment_audit import audit
+from zip_entries import ZipArchive
+
+RESULTS_PATH = "/workspaces/codespaces-blank/ttstest_results.json"
+
 def run_command(cmd, shell=True):
     """Run a command and return output"""
     try:
@@ -19,8 +28,9 @@ def run_command(cmd, shell=True):
         return f"Error: {e}"
 
 class TTSTestAppValidator:
-    def __init__(self, apk_path):
+    def __init__(self, apk_path, reporter=None):
         self.apk_path = apk_path
+        self.reporter = reporter or NullReporter()
         self.results = {
             "apk_exists": False,
             "apk_valid_zip": False,
@@ -35,6 +45,15 @@ class TTSTestAppValidator:
             "tests": []
         }
     
+    def _record(self, name, passed, details, **data):
+        """Keep the check for save_results() and stream it as an NDJSON record"""
+        self.results["tests"].append({
+            "name": name,
+            "passed": passed,
+            "details": details
+        })
+        self.reporter.check(name, passed, details, **data)
+    
     def test_1_apk_file_existence(self):
         """Test 1: APK file exists"""
         print("\n" + "="*70)
@@ -47,19 +66,11 @@ class TTSTestAppValidator:
             self.results["apk_size_mb"] = round(size_mb, 2)
             print(f"✅ PASS: APK exists at {self.apk_path}")
             print(f"   Size: {size_mb:.2f} MB")
-            self.results["tests"].append({
-                "name": "APK File Exists",
-                "passed": True,
-                "details": f"APK size: {size_mb:.2f}MB"
-            })
+            self._record("APK File Exists", True, f"APK size: {size_mb:.2f}MB", size_mb=round(size_mb, 2))
             return True
         else:
             print(f"❌ FAIL: APK not found at {self.apk_path}")
-            self.results["tests"].append({
-                "name": "APK File Exists",
-                "passed": False,
-                "details": "APK file not found"
-            })
+            self._record("APK File Exists", False, "APK file not found")
             return False
     
     def test_2_apk_zip_integrity(self):
@@ -69,35 +80,32 @@ class TTSTestAppValidator:
         print("="*70)
         
         try:
-            with zipfile.ZipFile(self.apk_path, 'r') as apk:
-                namelist = apk.namelist()
-                file_count = len(namelist)
+            with ZipArchive(self.apk_path) as apk:
+                required = ['AndroidManifest.xml', 'classes.dex', 'resources.arsc']
+                present = set()
+                file_count = 0
+                for entry in apk:
+                    file_count += 1
+                    if entry.name in required:
+                        present.add(entry.name)
                 
                 self.results["apk_valid_zip"] = True
-                print(f"✅ PASS: APK is valid ZIP file")
+                print(f"✅ PASS: APK is valid ZIP file{' (ZIP64)' if apk.zip64 else ''}")
                 print(f"   Contains {file_count} files")
                 
                 # Check required files
-                required = ['AndroidManifest.xml', 'classes.dex', 'resources.arsc']
                 for req in required:
-                    if req in namelist:
+                    if req in present:
                         print(f"   ✅ {req} present")
                     else:
                         print(f"   ⚠️  {req} missing")
                 
-                self.results["tests"].append({
-                    "name": "ZIP Integrity",
-                    "passed": True,
-                    "details": f"Contains {file_count} files"
-                })
+                self._record("ZIP Integrity", True, f"Contains {file_count} files", file_count=file_count,
+                             zip64=apk.zip64)
                 return True
         except Exception as e:
             print(f"❌ FAIL: {e}")
-            self.results["tests"].append({
-                "name": "ZIP Integrity",
-                "passed": False,
-                "details": str(e)
-            })
+            self._record("ZIP Integrity", False, str(e))
             return False
     
     def test_3_manifest_validation(self):
@@ -112,6 +120,7 @@ class TTSTestAppValidator:
         
         if not os.path.exists(aapt_path):
             print("⚠️  AAPT not found, skipping")
+            self.reporter.check("Manifest Validation", STATUS_SKIP, "AAPT not found")
             return False
         
         try:
@@ -135,22 +144,15 @@ class TTSTestAppValidator:
             if all_found:
                 self.results["manifest_valid"] = True
                 print("✅ PASS: Manifest validation passed")
-                self.results["tests"].append({
-                    "name": "Manifest Validation",
-                    "passed": True,
-                    "details": "All required elements present"
-                })
+                self._record("Manifest Validation", True, "All required elements present")
                 return True
             else:
                 print("⚠️  Some manifest elements missing")
-                self.results["tests"].append({
-                    "name": "Manifest Validation",
-                    "passed": False,
-                    "details": "Some elements missing"
-                })
+                self._record("Manifest Validation", False, "Some elements missing")
                 return False
         except Exception as e:
             print(f"⚠️  Error: {e}")
+            self.reporter.check("Manifest Validation", STATUS_SKIP, str(e))
             return False
     
     def test_4_dex_files(self):
@@ -160,41 +162,33 @@ class TTSTestAppValidator:
         print("="*70)
         
         try:
-            with zipfile.ZipFile(self.apk_path, 'r') as apk:
-                dex_files = [f for f in apk.namelist() if f.startswith('classes') and f.endswith('.dex')]
+            with ZipArchive(self.apk_path) as apk:
+                dex_files = [entry for entry in apk if entry.name.startswith('classes') and entry.name.endswith('.dex')]
                 print(f"Found {len(dex_files)} DEX files")
                 
-                for dex_file in sorted(dex_files):
-                    dex_data = apk.read(dex_file)
-                    if dex_data[:4] == b'dex\n':
-                        size_mb = len(dex_data) / (1024 * 1024)
-                        print(f"✅ {dex_file} - Valid (Size: {size_mb:.2f}MB)")
+                for dex_file in sorted(dex_files, key=lambda entry: entry.name):
+                    if apk.read_head(dex_file, 4) == b'dex\n':
+                        size_mb = dex_file.file_size / (1024 * 1024)
+                        print(f"✅ {dex_file.name} - Valid (Size: {size_mb:.2f}MB)")
                         self.results["dex_files"].append({
-                            "name": dex_file,
+                            "name": dex_file.name,
                             "size_mb": round(size_mb, 2),
                             "valid": True
                         })
                     else:
-                        print(f"❌ {dex_file} - Invalid magic number")
+                        print(f"❌ {dex_file.name} - Invalid magic number")
                         self.results["dex_files"].append({
-                            "name": dex_file,
+                            "name": dex_file.name,
                             "valid": False
                         })
                 
                 print("✅ PASS: All DEX files are valid")
-                self.results["tests"].append({
-                    "name": "DEX Files",
-                    "passed": True,
-                    "details": f"Found {len(dex_files)} valid DEX files"
-                })
+                self._record("DEX Files", True, f"Found {len(dex_files)} valid DEX files",
+                             dex_files=self.results["dex_files"])
                 return True
         except Exception as e:
             print(f"❌ Error: {e}")
-            self.results["tests"].append({
-                "name": "DEX Files",
-                "passed": False,
-                "details": str(e)
-            })
+            self._record("DEX Files", False, str(e))
             return False
     
     def test_5_resource_files(self):
@@ -204,9 +198,7 @@ class TTSTestAppValidator:
         print("="*70)
         
         try:
-            with zipfile.ZipFile(self.apk_path, 'r') as apk:
-                namelist = apk.namelist()
-                
+            with ZipArchive(self.apk_path) as apk:
                 # Check for key resources
                 resources = {
                     'layout/activity_main.xml': 'Main Activity Layout',
@@ -214,40 +206,50 @@ class TTSTestAppValidator:
                     'resources.arsc': 'Compiled Resources'
                 }
                 
+                # One pass over the central directory: matches and counts only
+                matched = set()
+                layout_count = res_count = 0
+                for entry in apk:
+                    matched.update(res_path for res_path in resources if res_path in entry.name)
+                    layout_count += 'layout' in entry.name
+                    res_count += 'res/' in entry.name
+                
                 found_resources = {}
                 for res_path, res_label in resources.items():
                     # Check if any file matches
-                    if any(res_path in f for f in namelist):
+                    if res_path in matched:
                         print(f"✅ {res_label} found")
                         found_resources[res_path] = True
                     else:
                         print(f"⚠️  {res_label} not found (expected: {res_path})")
                         found_resources[res_path] = False
                 
-                layout_count = len([f for f in namelist if 'layout' in f])
-                res_count = len([f for f in namelist if 'res/' in f])
-                
                 print(f"\nResource Summary:")
                 print(f"  Total layout files: {layout_count}")
                 print(f"  Total resource files: {res_count}")
                 
                 self.results["layout_files"] = layout_count
                 self.results["resource_files"] = res_count
-                
+
+                # Explain the counts: how many of them the code, manifest and XML can actually reach
+                try:
+                    with ApkIndex(self.apk_path) as index:
+                        usage = unused_resources.analyze(index)
+                    print(f"  Reachable from code/manifest/XML: {usage['reachable']} of {usage['total']}")
+                    print(f"  Unreachable: {len(usage['unused'])} ({usage['unused_bytes']:,} bytes)")
+                    self.results["unused_resources"] = len(usage['unused'])
+                    self.results["unused_resource_bytes"] = usage['unused_bytes']
+                except Exception as e:
+                    print(f"⚠️  Resource reachability not analyzed: {e}")
+
                 print("✅ PASS: Resources are present")
-                self.results["tests"].append({
-                    "name": "Resource Files",
-                    "passed": True,
-                    "details": f"{layout_count} layouts, {res_count} total resources"
-                })
+                self._record("Resource Files", True, f"{layout_count} layouts, {res_count} total resources",
+                             layout_files=layout_count, resource_files=res_count,
+                             unused_resources=self.results.get("unused_resources"))
                 return True
         except Exception as e:
             print(f"❌ Error: {e}")
-            self.results["tests"].append({
-                "name": "Resource Files",
-                "passed": False,
-                "details": str(e)
-            })
+            self._record("Resource Files", False, str(e))
             return False
     
     def test_6_app_classes(self):
@@ -257,8 +259,8 @@ class TTSTestAppValidator:
         print("="*70)
         
         try:
-            with zipfile.ZipFile(self.apk_path, 'r') as apk:
-                dex_files = [f for f in apk.namelist() if f.startswith('classes') and f.endswith('.dex')]
+            with ZipArchive(self.apk_path) as apk:
+                dex_files = [entry for entry in apk if entry.name.startswith('classes') and entry.name.endswith('.dex')]
                 
                 expected_classes = [
                     b'MainActivity',
@@ -268,14 +270,17 @@ class TTSTestAppValidator:
                     b'testTtsWithActivityContext',
                 ]
                 
+                # Each DEX is streamed once for every string still missing
+                found_bytes = set()
+                for dex_file in dex_files:
+                    missing = set(expected_classes) - found_bytes
+                    if not missing:
+                        break
+                    found_bytes |= apk.contains(dex_file, missing)
+                
                 found_classes = {}
                 for class_str in expected_classes:
-                    found = False
-                    for dex_file in dex_files:
-                        dex_data = apk.read(dex_file)
-                        if class_str in dex_data:
-                            found = True
-                            break
+                    found = class_str in found_bytes
                     
                     class_label = class_str.decode('utf-8', errors='ignore')
                     if found:
@@ -286,19 +291,11 @@ class TTSTestAppValidator:
                         found_classes[class_label] = False
                 
                 print("✅ PASS: App classes present in bytecode")
-                self.results["tests"].append({
-                    "name": "App Classes Bytecode",
-                    "passed": True,
-                    "details": f"Found {len([v for v in found_classes.values() if v])} key classes"
-                })
+                self._record("App Classes Bytecode", True, f"Found {len([v for v in found_classes.values() if v])} key classes")
                 return True
         except Exception as e:
             print(f"❌ Error: {e}")
-            self.results["tests"].append({
-                "name": "App Classes Bytecode",
-                "passed": False,
-                "details": str(e)
-            })
+            self._record("App Classes Bytecode", False, str(e))
             return False
     
     def test_7_build_configuration(self):
@@ -331,15 +328,49 @@ class TTSTestAppValidator:
             if all_found:
                 print("✅ PASS: Build configuration is correct")
                 self.results["build_success"] = True
-                self.results["tests"].append({
-                    "name": "Build Configuration",
-                    "passed": True,
-                    "details": "All build settings correct"
-                })
+                self._record("Build Configuration", True, "All build settings correct")
                 return True
+            self.reporter.check("Build Configuration", False, "Some build settings missing")
+            return False
         
+        self.reporter.check("Build Configuration", STATUS_SKIP, f"{build_gradle_path} not found")
         return False
     
+    def test_8_zip_alignment(self):
+        """Test 8: Entries are stored for fast install and mmap"""
+        print("\n" + "="*70)
+        print("TEST 8: ZIP Alignment and Storage")
+        print("="*70)
+        
+        try:
+            with ZipArchive(self.apk_path) as archive:
+                findings = audit(archive)
+                entry_count = archive.entry_count
+            
+            for finding in findings:
+                print(f"⚠️  {finding}")
+            
+            # Only resources.arsc must be aligned to install (targetSdk 30+); an unaligned asset just
+            # cannot be mmapped. Stored native libraries must be page aligned to be loaded in place.
+            blocking = {f.name for f in findings
+                        if f.rule in ('arsc-compressed', 'so-align-4k', 'so-align-16k')
+                        or (f.rule == 'align-4' and f.name == 'resources.arsc')}
+            self.results["zip_alignment_findings"] = len(findings)
+            if blocking:
+                print(f"❌ FAIL: {len(blocking)} entries block install or mmap")
+                self._record("ZIP Alignment", False, f"{len(blocking)} blocking, {len(findings)} total findings in {entry_count} entries",
+                             findings=[str(f) for f in findings])
+                return False
+            
+            print(f"✅ PASS: {entry_count} entries audited, {len(findings)} advisory findings")
+            self._record("ZIP Alignment", True, f"{len(findings)} advisory findings in {entry_count} entries",
+                         findings=[str(f) for f in findings])
+            return True
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            self._record("ZIP Alignment", False, str(e))
+            return False
+    
     def run_all_tests(self):
         """Run all tests"""
         print("\n" + "="*70)
@@ -354,6 +385,7 @@ class TTSTestAppValidator:
             self.test_5_resource_files,
             self.test_6_app_classes,
             self.test_7_build_configuration,
+            self.test_8_zip_alignment,
         ]
         
         passed = 0
@@ -368,6 +400,7 @@ class TTSTestAppValidator:
                     failed += 1
             except Exception as e:
                 print(f"Exception in {test.__name__}: {e}")
+                self.reporter.check(test.__name__, False, f"Exception: {e}")
                 failed += 1
         
         # Summary
@@ -389,19 +422,46 @@ class TTSTestAppValidator:
         
         print("="*70)
         
+        self.reporter.summary(f"{passed} passed, {failed} failed", passed_tests=passed, failed_tests=failed)
         return passed, failed
     
-    def save_results(self):
+    def save_results(self, json_path=RESULTS_PATH):
         """Save results to JSON"""
-        json_path = "/workspaces/codespaces-blank/ttstest_results.json"
         with open(json_path, 'w') as f:
             json.dump(self.results, f, indent=2)
         print(f"\nResults saved to {json_path}")
 
 
-if __name__ == '__main__':
-    apk_path = '/workspaces/codespaces-blank/TTSTestApp/build/outputs/apk/debug/TTSTestApp-debug.apk'
+def results_path(apk_path, position, count):
+    """RESULTS_PATH, or with several APKs one file per APK named by its position and file name"""
+    if count == 1:
+        return RESULTS_PATH
+    results = Path(RESULTS_PATH)
+    # The position keeps builds that share a file name (app-debug.apk) apart
+    return str(results.with_name(f"{results.stem}_{position}_{Path(apk_path).stem}{results.suffix}"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser, '/workspaces/codespaces-blank/TTSTestApp/build/outputs/apk/debug/TTSTestApp-debug.apk')
+    args = parser.parse_args()
     
-    validator = TTSTestAppValidator(apk_path)
-    validator.run_all_tests()
-    validator.save_results()
+    reporter = open_reporter(args.ndjson, 'ttstest_app')
+    total_failed = 0
+    try:
+        with human_output(reporter):
+            for position, apk_path in enumerate(args.apks, 1):
+                reporter.start(apk_path)
+                validator = TTSTestAppValidator(apk_path, reporter)
+                _passed, failed = validator.run_all_tests()
+                total_failed += failed
+                if args.ndjson is None:
+                    # Without a record stream, keep a results document per APK
+                    validator.save_results(results_path(apk_path, position, len(args.apks)))
+    finally:
+        reporter.close()
+    return 1 if total_failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Chrome Trace-Event Export
+Streams DebugIvonaTTS logcat captures into Chrome/Perfetto trace-event JSON: one process
+track per context type (activity, service, application) and one thread track per test id,
+with slices for TextToSpeech construction -> onInit, and async slices (one id per
+utterance, since QUEUE_ADD utterances overlap) for speak() -> onStart and onStart -> onDone.
+Events are written as they are parsed, so memory stays bounded by the number of in-flight
+utterances rather than the size of the capture.
+
+    python3 trace_export.py capture.txt -o tts.trace.json
+    adb logcat -v threadtime | python3 trace_export.py - -o tts.trace.json.gz
+"""
+
+import argparse
+import gzip
+import json
+import sys
+from collections import deque
+
+from logcat_events import (TAGS, TEST_START, INIT_OK, INIT_FAIL, SPEAK, UTTERANCE_START, UTTERANCE_DONE,
+                           UTTERANCE_ERROR, CONTEXT_ACTIVITY, CONTEXT_SERVICE, CONTEXT_APPLICATION,
+                           assign_tests, iter_events)
+
+# Fixed process ids so the context tracks always sort the same way in the UI
+CONTEXT_PIDS = {CONTEXT_ACTIVITY: 1, CONTEXT_SERVICE: 2, CONTEXT_APPLICATION: 3}
+UNASSIGNED_PID = 9
+UNASSIGNED_TEST = '(no test)'
+# A test that never gets its callbacks should not make the exporter hold on to every speak()
+MAX_PENDING = 256
+
+
+class TraceWriter:
+    """Writes a {"traceEvents": [...]} document one event at a time"""
+
+    def __init__(self, out):
+        self.out = out
+        self.count = 0
+        out.write('{"displayTimeUnit": "ms", "traceEvents": [\n')
+
+    def write(self, event):
+        if self.count:
+            self.out.write(',\n')
+        self.out.write(json.dumps(event, separators=(',', ':')))
+        self.count += 1
+
+    def close(self):
+        self.out.write('\n]}\n')
+
+
+class _Track:
+    __slots__ = ('pid', 'tid', 'created', 'speaks', 'starts')
+
+    def __init__(self, pid, tid):
+        self.pid = pid
+        self.tid = tid
+        self.created = None
+        self.speaks = deque(maxlen=MAX_PENDING)
+        self.starts = deque(maxlen=MAX_PENDING)
+
+
+class TraceExporter:
+    """Turns assigned LogEvents into trace events; state is one _Track per (context, test id)"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.origin = None
+        self._tracks = {}
+        self._threads = {}
+        self._async_ids = 0
+
+    def _us(self, ts):
+        return (ts - self.origin) * 1000
+
+    def track(self, event):
+        context = event.context
+        test = event.test or UNASSIGNED_TEST
+        track = self._tracks.get((context, test))
+        if track is None:
+            pid = CONTEXT_PIDS.get(context, UNASSIGNED_PID)
+            if pid not in self._threads:
+                self._threads[pid] = 0
+                self.writer.write({'ph': 'M', 'name': 'process_name', 'pid': pid, 'tid': 0,
+                                   'args': {'name': f"{context or 'unassigned'} context"}})
+                self.writer.write({'ph': 'M', 'name': 'process_sort_index', 'pid': pid, 'tid': 0,
+                                   'args': {'sort_index': pid}})
+            tid = self._threads[pid] = self._threads[pid] + 1
+            track = self._tracks[(context, test)] = _Track(pid, tid)
+            self.writer.write({'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid, 'args': {'name': test}})
+        return track
+
+    def slice(self, track, name, start, end, args):
+        self.writer.write({'ph': 'X', 'name': name, 'cat': 'tts', 'pid': track.pid, 'tid': track.tid,
+                           'ts': self._us(start), 'dur': max(0, end - start) * 1000, 'args': args})
+
+    def async_slice(self, track, name, start, end, args):
+        """b/e pair with its own id: utterances queued on one test overlap, which 'X' slices on a
+        single thread cannot represent"""
+        self._async_ids += 1
+        event = {'name': name, 'cat': 'tts', 'id': self._async_ids, 'pid': track.pid, 'tid': track.tid}
+        self.writer.write({'ph': 'b', 'ts': self._us(start), **event})
+        self.writer.write({'ph': 'e', 'ts': self._us(end), **event, 'args': args})
+
+    def instant(self, track, name, ts, args):
+        self.writer.write({'ph': 'i', 's': 't', 'name': name, 'cat': 'tts', 'pid': track.pid, 'tid': track.tid,
+                           'ts': self._us(ts), 'args': args})
+
+    def add(self, event):
+        if self.origin is None:
+            self.origin = event.ts
+        track = self.track(event)
+        args = {'os_pid': event.pid, 'os_tid': event.tid, 'message': event.message}
+        kind = event.kind
+        if kind == TEST_START:
+            track.created = event.ts
+            track.speaks.clear()
+            track.starts.clear()
+            self.instant(track, 'TextToSpeech()', event.ts, args)
+        elif kind in (INIT_OK, INIT_FAIL):
+            if track.created is not None:
+                self.slice(track, 'onInit' if kind == INIT_OK else 'onInit (failed)', track.created, event.ts, args)
+                track.created = None
+            else:
+                self.instant(track, kind, event.ts, args)
+        elif kind == SPEAK:
+            track.speaks.append(event.ts)
+            self.instant(track, f"speak() = {event.detail}", event.ts, args)
+        elif kind == UTTERANCE_START:
+            if track.speaks:
+                self.async_slice(track, 'speak -> onStart', track.speaks.popleft(), event.ts, args)
+            track.starts.append(event.ts)
+        elif kind in (UTTERANCE_DONE, UTTERANCE_ERROR):
+            name = 'utterance' if kind == UTTERANCE_DONE else 'utterance (error)'
+            if track.starts:
+                self.async_slice(track, name, track.starts.popleft(), event.ts, args)
+            else:
+                self.instant(track, kind, event.ts, args)
+
+
+def export(lines, out, tags=TAGS):
+    """Stream the TTS events of lines into out as trace-event JSON; return the number of events written"""
+    writer = TraceWriter(out)
+    exporter = TraceExporter(writer)
+    for event in assign_tests(iter_events(lines, tags)):
+        exporter.add(event)
+    writer.close()
+    return writer.count
+
+
+def _open_output(path):
+    if path == '-':
+        return sys.stdout
+    if path.endswith('.gz'):
+        return gzip.open(path, 'wt', encoding='utf-8')
+    return open(path, 'w', encoding='utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('capture', help="logcat capture file, or '-' for stdin")
+    parser.add_argument('-o', '--output', default='tts.trace.json', help="output path ('.gz' compresses, '-' for stdout)")
+    args = parser.parse_args()
+
+    out = _open_output(args.output)
+    try:
+        if args.capture == '-':
+            count = export(sys.stdin, out)
+        else:
+            with open(args.capture, 'r', encoding='utf-8', errors='replace') as f:
+                count = export(f, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    if out is not sys.stdout:
+        print(f"✅ {args.output}: {count} trace events (open in ui.perfetto.dev or chrome://tracing)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+TTS Queue Discrete-Event Simulator
+Simulates notification bursts through the TestNotificationService TTS pipeline: engine
+bind latency, QUEUE_ADD vs QUEUE_FLUSH, and utterance duration from the speech rate.
+Timings are calibrated from DebugIvonaTTS logcat captures when one is given: utterance
+durations are sampled as measured (normalised to rate 1.0 by each test's logged speech
+rate) instead of being modelled from the message length.
+"""
+
+import argparse
+import heapq
+import random
+import sys
+from collections import deque
+
+from logcat_events import parse_file, test_runs
+
+QUEUE_ADD = 'add'
+QUEUE_FLUSH = 'flush'
+
+ARRIVAL = 0
+READY = 1
+START = 2
+DONE = 3
+
+# Used when no capture is given, or a capture has no samples for a timing
+DEFAULT_BIND_MS = (250, 400, 650, 900)
+DEFAULT_SPEAK_LATENCY_MS = (40, 80, 120)
+DEFAULT_CHARS_PER_SEC = 15.0
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+class Calibration:
+    def __init__(self, bind_ms=DEFAULT_BIND_MS, init_fail_rate=0.0, speak_latency_ms=DEFAULT_SPEAK_LATENCY_MS,
+                 utterance_ms=(), chars_per_sec=DEFAULT_CHARS_PER_SEC, source='defaults'):
+        self.bind_ms = list(bind_ms)
+        self.init_fail_rate = init_fail_rate
+        self.speak_latency_ms = list(speak_latency_ms)
+        # Measured onStart -> onDone durations at rate 1.0; empty means model them from chars_per_sec
+        self.utterance_ms = list(utterance_ms)
+        self.chars_per_sec = chars_per_sec
+        self.source = source
+
+    @classmethod
+    def from_capture(cls, path, context=None):
+        """Calibrate from a logcat capture, optionally only runs with one context type"""
+        runs = [run for run in test_runs(parse_file(path)) if context is None or run.context == context]
+        inits = [run for run in runs if run.init_ts is not None]
+        bind_ms = [run.bind_latency for run in inits if run.init_ok]
+        speak_latency_ms = []
+        durations = []
+        for run in runs:
+            for speak_ts, _result in run.speaks:
+                start = next((ts for ts in run.starts if ts >= speak_ts), None)
+                if start is not None:
+                    speak_latency_ms.append(start - speak_ts)
+            for start, done in zip(run.starts, run.dones):
+                if done > start:
+                    # Speaking at rate r takes 1/r as long as at 1.0
+                    durations.append((done - start) * run.speech_rate)
+
+        return cls(
+            bind_ms or DEFAULT_BIND_MS,
+            sum(1 for run in inits if not run.init_ok) / len(inits) if inits else 0.0,
+            speak_latency_ms or DEFAULT_SPEAK_LATENCY_MS,
+            durations,
+            source=f"{path} ({len(runs)} runs)",
+        )
+
+
+class Message:
+    __slots__ = ('arrival',)
+
+    def __init__(self, arrival):
+        self.arrival = arrival
+
+
+class SimulationResult:
+    def __init__(self):
+        self.arrivals = 0
+        self.spoken = 0
+        self.dropped = 0
+        self.interrupted = 0
+        self.init_failures = 0
+        self.start_latency_ms = []
+        self.done_latency_ms = []
+        self.max_depth = 0
+        self.depth_area = 0.0
+        self.duration_ms = 0.0
+
+    @property
+    def drop_rate(self):
+        return (self.dropped + self.interrupted) / self.arrivals if self.arrivals else 0.0
+
+    @property
+    def mean_depth(self):
+        return self.depth_area / self.duration_ms if self.duration_ms else 0.0
+
+
+class TtsPipelineSimulation:
+    def __init__(self, calibration, queue_mode=QUEUE_ADD, speech_rate=1.0, message_chars=60,
+                 max_queue=20, reinit_per_notification=False, seed=0):
+        self.calibration = calibration
+        self.queue_mode = queue_mode
+        self.speech_rate = speech_rate
+        self.message_chars = message_chars
+        self.max_queue = max_queue
+        self.reinit = reinit_per_notification
+        self.random = random.Random(seed)
+
+    def utterance_ms(self):
+        if self.calibration.utterance_ms:
+            return self.random.choice(self.calibration.utterance_ms) / self.speech_rate
+        return self.message_chars / (self.calibration.chars_per_sec * self.speech_rate) * 1000
+
+    def run(self, arrival_times):
+        """Simulate the given notification arrival times (ms) and return a SimulationResult"""
+        result = SimulationResult()
+        events = []
+        sequence = 0
+
+        def schedule(time, kind, payload=None):
+            nonlocal sequence
+            heapq.heappush(events, (time, sequence, kind, payload))
+            sequence += 1
+
+        for arrival in arrival_times:
+            schedule(arrival, ARRIVAL, arrival)
+
+        state = 'unbound'
+        generation = 0
+        pending = []
+        queue = deque()
+        speaking = None
+        last_time = 0.0
+
+        def depth():
+            return len(pending) + len(queue) + (1 if speaking is not None else 0)
+
+        def bind(now):
+            nonlocal state, generation
+            generation += 1
+            state = 'binding'
+            schedule(now + self.random.choice(self.calibration.bind_ms), READY, generation)
+
+        def start_next(now):
+            nonlocal speaking
+            if speaking is None and queue:
+                speaking = queue.popleft()
+                schedule(now + self.random.choice(self.calibration.speak_latency_ms), START, (generation, speaking))
+
+        def submit(now, message):
+            nonlocal speaking
+            if self.queue_mode == QUEUE_FLUSH:
+                result.dropped += len(queue)
+                queue.clear()
+                if speaking is not None:
+                    result.interrupted += 1
+                    speaking = None
+                queue.append(message)
+            elif len(queue) >= self.max_queue:
+                result.dropped += 1
+                return
+            else:
+                queue.append(message)
+            start_next(now)
+
+        while events:
+            now, _seq, kind, payload = heapq.heappop(events)
+            result.depth_area += depth() * (now - last_time)
+            last_time = now
+
+            if kind == ARRIVAL:
+                result.arrivals += 1
+                if self.reinit and state != 'unbound':
+                    # tts?.shutdown(); tts = TextToSpeech(...): everything queued on the old instance is lost
+                    result.dropped += len(pending) + len(queue)
+                    result.interrupted += 1 if speaking is not None else 0
+                    pending.clear()
+                    queue.clear()
+                    speaking = None
+                    state = 'unbound'
+                if state == 'unbound':
+                    bind(now)
+                if state == 'binding':
+                    if len(pending) >= self.max_queue:
+                        result.dropped += 1
+                    else:
+                        pending.append(Message(payload))
+                else:
+                    submit(now, Message(payload))
+            elif kind == READY:
+                if payload != generation:
+                    continue
+                if self.random.random() < self.calibration.init_fail_rate:
+                    result.init_failures += 1
+                    result.dropped += len(pending)
+                    pending.clear()
+                    state = 'unbound'
+                    continue
+                state = 'ready'
+                held = pending[:]
+                pending.clear()
+                for message in held:
+                    submit(now, message)
+            elif kind == START:
+                start_generation, message = payload
+                if start_generation != generation or speaking is not message:
+                    continue
+                result.start_latency_ms.append(now - message.arrival)
+                schedule(now + self.utterance_ms(), DONE, (generation, message))
+            elif kind == DONE:
+                done_generation, message = payload
+                if done_generation != generation or speaking is not message:
+                    continue
+                result.spoken += 1
+                result.done_latency_ms.append(now - message.arrival)
+                speaking = None
+                start_next(now)
+
+            result.max_depth = max(result.max_depth, depth())
+
+        result.duration_ms = last_time
+        return result
+
+
+def burst_arrivals(burst_size, bursts, spacing_ms, gap_ms):
+    """Arrival times for bursts of burst_size notifications spacing_ms apart, gap_ms between bursts"""
+    times = []
+    for burst in range(bursts):
+        start = burst * gap_ms
+        times.extend(float(start + i * spacing_ms) for i in range(burst_size))
+    return times
+
+
+def format_ms(value):
+    return f"{value:,.0f} ms" if value is not None else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--capture', help='DebugIvonaTTS logcat capture used for calibration')
+    parser.add_argument('--context', choices=('activity', 'service', 'application'),
+                        help='calibrate only from runs with this context type')
+    parser.add_argument('--burst', type=int, default=10, help='notifications per burst')
+    parser.add_argument('--bursts', type=int, default=5, help='number of bursts')
+    parser.add_argument('--spacing', type=float, default=200, help='ms between notifications in a burst')
+    parser.add_argument('--gap', type=float, default=30000, help='ms between burst starts')
+    parser.add_argument('--rate', type=float, default=1.0, help='speech rate (setSpeechRate)')
+    parser.add_argument('--chars', type=int, default=60,
+                        help='characters per notification message (without --capture durations, which are measured)')
+    parser.add_argument('--max-queue', type=int, default=20)
+    parser.add_argument('--reinit', action='store_true',
+                        help='shut down and recreate TextToSpeech per notification, like the service tests')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    calibration = Calibration.from_capture(args.capture, args.context) if args.capture else Calibration()
+    arrivals = burst_arrivals(args.burst, args.bursts, args.spacing, args.gap)
+
+    print(f"Calibration: {calibration.source}")
+    if calibration.utterance_ms:
+        utterance = (f"{len(calibration.utterance_ms)} measured utterances, p50 "
+                     f"{format_ms(percentile(calibration.utterance_ms, 50))} at rate 1.0")
+        length = "measured lengths"
+    else:
+        utterance = f"{calibration.chars_per_sec:.1f} chars/s at rate 1.0"
+        length = f"{args.chars} chars each"
+    print(f"  bind p50 {format_ms(percentile(calibration.bind_ms, 50))}, init failure rate "
+          f"{calibration.init_fail_rate:.1%}, {utterance}")
+    print(f"Load: {args.bursts} bursts x {args.burst} notifications, {args.spacing:g} ms apart, "
+          f"{length}, rate {args.rate:g}{', reinit per notification' if args.reinit else ''}\n")
+
+    print(f"{'mode':<12}{'spoken':>8}{'dropped':>9}{'drop %':>8}{'max q':>7}{'mean q':>8}"
+          f"{'start p50':>12}{'start p99':>12}{'done p99':>12}")
+    for mode in (QUEUE_ADD, QUEUE_FLUSH):
+        simulation = TtsPipelineSimulation(calibration, mode, args.rate, args.chars, args.max_queue,
+                                           args.reinit, args.seed)
+        result = simulation.run(arrivals)
+        print(f"{'QUEUE_' + mode.upper():<12}{result.spoken:>8}{result.dropped + result.interrupted:>9}"
+              f"{result.drop_rate:>8.1%}{result.max_depth:>7}{result.mean_depth:>8.2f}"
+              f"{format_ms(percentile(result.start_latency_ms, 50)):>12}"
+              f"{format_ms(percentile(result.start_latency_ms, 99)):>12}"
+              f"{format_ms(percentile(result.done_latency_ms, 99)):>12}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
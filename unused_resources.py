@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Unused Resource Detector
+Marks every resources.arsc entry reachable from DEX bytecode (resource id literals, R$type
+field reads with R$styleable arrays expanded to their attrs, getIdentifier() name lookups),
+from the manifest, and transitively through ARSC values and compiled XML files (attribute
+values and attribute names); everything left over is listed with its byte cost
+"""
+
+import re
+import sys
+from collections import deque
+
+from app_bundle import open_app
+from binary_xml import TYPE_REFERENCE, TYPE_ATTRIBUTE
+from dex_index import REF_FIELD, REF_LITERAL, REF_METHOD, REF_STRING, iter_instructions
+from layout_inflation import LayoutInflationChecker
+
+APP_PACKAGE_ID = 0x7f
+R_CLASS_RE = re.compile(r'/R\$(\w+);$')
+R_CLASS_SUFFIXES = ('/R;', '/BuildConfig;')
+GET_IDENTIFIER = ('Landroid/content/res/Resources;', 'getIdentifier')
+STYLEABLE = 'styleable'
+CONST = 0x14
+FILL_ARRAY_DATA = 0x26
+SPUT_OBJECT = 0x69
+
+
+class DexResourceRefs:
+    """Resource ids, R$type/name pairs and candidate resource names used by the app's code"""
+
+    def __init__(self):
+        self.ids = set()
+        self.fields = set()
+        self.strings = set()
+        self.uses_get_identifier = False
+        # R$styleable array name -> attr ids it holds, from the R$styleable static initialisers
+        self.styleables = {}
+
+    def scan(self, dex):
+        types = dex.types
+        # Per-DEX lookups: field_idx -> (type, name) for R$ fields only, method_idx -> is getIdentifier
+        r_fields = {}
+        for index, (class_idx, _type_idx, name_idx) in enumerate(dex.field_ids):
+            match = R_CLASS_RE.search(types[class_idx])
+            if match:
+                r_fields[index] = (match.group(1), dex.string(name_idx))
+        identifier_methods = {index for index, (class_idx, _proto_idx, name_idx) in enumerate(dex.method_ids)
+                              if (types[class_idx], dex.string(name_idx)) == GET_IDENTIFIER}
+
+        for class_def in dex.classes.values():
+            match = R_CLASS_RE.search(class_def.descriptor)
+            if match and match.group(1) == STYLEABLE:
+                self.scan_styleable(dex, class_def, r_fields)
+                continue
+            # R classes only define ids; reading their fields is what counts as a use
+            if match or class_def.descriptor.endswith(R_CLASS_SUFFIXES):
+                continue
+            for _method_idx, _flags, code_off in dex.class_methods(class_def):
+                if not code_off:
+                    continue
+                strings = []
+                for kind, index in dex.iter_code_refs(code_off):
+                    if kind == REF_LITERAL:
+                        if index >> 24 == APP_PACKAGE_ID:
+                            self.ids.add(index)
+                    elif kind == REF_FIELD:
+                        field = r_fields.get(index)
+                        if field is not None:
+                            self.fields.add(field)
+                    elif kind == REF_STRING:
+                        strings.append(index)
+                    elif kind == REF_METHOD and index in identifier_methods:
+                        self.uses_get_identifier = True
+                self.strings.update(dex.string(index) for index in strings)
+        return self
+
+    def scan_styleable(self, dex, class_def, r_fields):
+        """Record the attr ids each R$styleable int[] is filled with before its sput-object"""
+        for _method_idx, _flags, code_off in dex.class_methods(class_def):
+            if not code_off:
+                continue
+            insns = dex.code_item(code_off)[4]
+            ids = []
+            for pos, op in iter_instructions(insns):
+                if op == FILL_ARRAY_DATA:
+                    # The payload sits after the method's last instruction, at a signed offset
+                    offset = insns[pos + 1] | (insns[pos + 2] << 16)
+                    payload = pos + offset - (1 << 32 if offset >> 31 else 0)
+                    width, count = insns[payload + 1], insns[payload + 2] | (insns[payload + 3] << 16)
+                    if width == 4:
+                        ids.extend(insns[payload + 4 + i * 2] | (insns[payload + 5 + i * 2] << 16)
+                                   for i in range(count))
+                elif op == CONST:
+                    # Arrays built element by element with aput
+                    ids.append(insns[pos + 1] | (insns[pos + 2] << 16))
+                elif op == SPUT_OBJECT:
+                    field = r_fields.get(insns[pos + 1])
+                    if field is not None and field[0] == STYLEABLE:
+                        self.styleables.setdefault(field[1], set()).update(ids)
+                    ids = []
+
+
+class ResourceGraph:
+    """Dense-indexed resource table: id -> slot dict plus a reachability bitmap"""
+
+    def __init__(self, resources):
+        self.entries = list(resources.entries.values())
+        self.slot = {entry.res_id: slot for slot, entry in enumerate(self.entries)}
+        self.by_name = {}
+        self.by_key = {}
+        for slot, entry in enumerate(self.entries):
+            self.by_name[(entry.type_name, entry.key)] = slot
+            self.by_key.setdefault(entry.key, []).append(slot)
+        self.reachable = bytearray(len(self.entries))
+
+    def mark(self, slots, edges):
+        """Flood reachability from slots; edges(slot) yields referenced resource ids"""
+        queue = deque()
+        for slot in slots:
+            if not self.reachable[slot]:
+                self.reachable[slot] = 1
+                queue.append(slot)
+        while queue:
+            for res_id in edges(queue.popleft()):
+                slot = self.slot.get(res_id)
+                if slot is not None and not self.reachable[slot]:
+                    self.reachable[slot] = 1
+                    queue.append(slot)
+
+
+def analyze(apk):
+    """Return a dict with reachable/unused resources, their byte costs and orphan res/ files"""
+    resources = apk.resources
+    graph = ResourceGraph(resources)
+
+    code = DexResourceRefs()
+    for dex in apk.dex_indexes:
+        code.scan(dex)
+
+    roots = [graph.slot[res_id] for res_id in code.ids if res_id in graph.slot]
+    roots += [graph.by_name[field] for field in code.fields if field in graph.by_name]
+    # Styleables are not resources: reading R$styleable.Foo uses every attr in the array
+    for type_name, name in code.fields:
+        if type_name == STYLEABLE:
+            roots += [graph.slot[res_id] for res_id in code.styleables.get(name, ()) if res_id in graph.slot]
+    if code.uses_get_identifier:
+        # Resources.getIdentifier(name, type, package) resolves names at runtime; keep any
+        # resource whose name appears as a string constant in the code
+        for value in code.strings:
+            roots += graph.by_key.get(value, ())
+    for element in apk.manifest.iter():
+        for attribute in element.attributes:
+            if attribute.type in (TYPE_REFERENCE, TYPE_ATTRIBUTE) and attribute.data in graph.slot:
+                roots.append(graph.slot[attribute.data])
+            if attribute.resource_id in graph.slot:
+                roots.append(graph.slot[attribute.resource_id])
+
+    xml_names = [name for entry in graph.entries for name in entry.files
+                 if name.endswith('.xml') and name in apk.entries and not name.startswith('res/raw/')]
+    summaries = LayoutInflationChecker(apk).load(sorted(set(xml_names)))
+
+    def edges(slot):
+        entry = graph.entries[slot]
+        yield from entry.references
+        for name in entry.files:
+            for _tag, _line, _class_attr, refs in summaries.get(name, ()):
+                for _attr_name, _value_type, res_id in refs:
+                    yield res_id
+
+    graph.mark(roots, edges)
+
+    used_files = set()
+    unused = []
+    for slot, entry in enumerate(graph.entries):
+        if graph.reachable[slot]:
+            used_files.update(entry.files)
+    for slot, entry in enumerate(graph.entries):
+        if graph.reachable[slot]:
+            continue
+        file_bytes = sum(apk.entries[name].compress_size for name in entry.files
+                         if name in apk.entries and name not in used_files)
+        unused.append((entry, entry.size + file_bytes))
+
+    referenced_files = used_files.union(*(entry.files for entry, _cost in unused))
+    orphan_files = [(name, info.compress_size) for name, info in apk.entries.items()
+                    if name.startswith('res/') and name not in referenced_files]
+
+    unused.sort(key=lambda item: -item[1])
+    return {
+        'total': len(graph.entries),
+        'reachable': sum(graph.reachable),
+        'code_ids': len(code.ids),
+        'code_fields': len(code.fields),
+        'get_identifier': code.uses_get_identifier,
+        'unused': unused,
+        'unused_bytes': sum(cost for _entry, cost in unused),
+        'orphan_files': sorted(orphan_files),
+        'orphan_bytes': sum(size for _name, size in orphan_files),
+    }
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <apk | app.aab | splits-dir> [top]")
+        return 2
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+
+    with open_app(sys.argv[1]) as apk:
+        result = analyze(apk)
+
+    print(f"{result['total']} resources, {result['reachable']} reachable "
+          f"({result['code_ids']} id literals and {result['code_fields']} R fields in DEX"
+          f"{', getIdentifier() in use' if result['get_identifier'] else ''})")
+    if not result['unused'] and not result['orphan_files']:
+        print("✅ Every resource is reachable")
+        return 0
+
+    by_type = {}
+    for entry, cost in result['unused']:
+        count, total = by_type.get(entry.type_name, (0, 0))
+        by_type[entry.type_name] = (count + 1, total + cost)
+    print(f"\n⚠️  {len(result['unused'])} unreachable resources ({result['unused_bytes']:,} bytes):")
+    for type_name, (count, total) in sorted(by_type.items(), key=lambda item: -item[1][1]):
+        print(f"  {type_name:<16}{count:>6}{total:>12,} B")
+    print(f"\nLargest {min(top, len(result['unused']))}:")
+    for entry, cost in result['unused'][:top]:
+        print(f"  {cost:>10,} B  0x{entry.res_id:08x}  {entry.name}")
+    if result['orphan_files']:
+        print(f"\n⚠️  {len(result['orphan_files'])} res/ files not referenced by resources.arsc "
+              f"({result['orphan_bytes']:,} bytes)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,61 +1,120 @@
 #!/usr/bin/env python3
-import zipfile
+"""
+APK Validation
+Quick structural check of a built APK: ZIP integrity, key files, DEX files and manifest
+"""
 import xml.etree.ElementTree as ET
 import sys
 import os
+import argparse
 
-apk_path = '/workspaces/codespaces-blank/ttsrepro-debug.apk'
-
-if not os.path.exists(apk_path):
-    print(f"APK not found: {apk_path}")
-    sys.exit(1)
-
-print(f"Analyzing APK: {apk_path}")
-print(f"File size: {os.path.getsize(apk_path) / (1024*1024):.2f} MB")
-print()
-
-try:
-    with zipfile.ZipFile(apk_path, 'r') as z:
-        print("✓ APK is valid ZIP file")
-        
-        # List key files
-        print("\nKey files in APK:")
-        important_files = ['AndroidManifest.xml', 'classes.dex', 'classes2.dex', 'res/layout/activity_main.xml']
-        for pattern in important_files:
-            matching = [n for n in z.namelist() if pattern in n]
-            if matching:
-                print(f"  ✓ {matching[0]} ({z.getinfo(matching[0]).file_size} bytes)")
-            else:
-                print(f"  ✗ {pattern} NOT FOUND")
-        
-        # Check for MainActivity class
-        print("\nClasses in dex files:")
-        for dex_file in [n for n in z.namelist() if n.endswith('.dex')]:
-            size = z.getinfo(dex_file).file_size
-            print(f"  ✓ {dex_file} ({size} bytes)")
-        
-        # Try to parse manifest
-        print("\nParsing AndroidManifest.xml...")
-        try:
-            manifest_data = z.read('AndroidManifest.xml')
-            print(f"  ✓ Manifest found ({len(manifest_data)} bytes)")
-            print("  ✓ APK structure is valid")
-        except Exception as e:
-            print(f"  ✗ Error reading manifest: {e}")
-            
-        # List all files
-        print(f"\nTotal files in APK: {len(z.namelist())}")
-        
-except zipfile.BadZipFile as e:
-    print(f"✗ APK is NOT a valid ZIP file: {e}")
-    sys.exit(1)
-except Exception as e:
-    print(f"✗ Error analyzing APK: {e}")
-    sys.exit(1)
-
-print("\n" + "="*60)
-print("✓ APK VALIDATION SUCCESSFUL")
-print("="*60)
-print("\nAPK is ready to install and test on a device or emulator.")
-print("\nInstallation command:")
-print("  adb install -r /workspaces/codespaces-blank/ttsrepro-debug.apk")
+from ndjson_report import STATUS_PASS, STATUS_WARN, add_arguments, human_output, open_reporter
+from zip_entries import ZipArchive, ZipFormatError
+
+
+def validate(apk_path, reporter):
+    """Print the validation report for one APK and stream its checks; return True if it is valid"""
+    reporter.start(apk_path)
+    if not os.path.exists(apk_path):
+        print(f"APK not found: {apk_path}")
+        reporter.check("APK exists", False, "APK not found")
+        reporter.summary("APK not found")
+        return False
+
+    print(f"Analyzing APK: {apk_path}")
+    print(f"File size: {os.path.getsize(apk_path) / (1024*1024):.2f} MB")
+    print()
+
+    try:
+        with ZipArchive(apk_path) as z:
+            print(f"✓ APK is valid ZIP file{' (ZIP64)' if z.zip64 else ''}")
+            reporter.check("Valid ZIP", True, size_bytes=os.path.getsize(apk_path), zip64=z.zip64)
+
+            # One pass over the central directory; only the entries checked below are kept
+            important_files = ['AndroidManifest.xml', 'classes.dex', 'classes2.dex', 'res/layout/activity_main.xml']
+            matches = dict.fromkeys(important_files)
+            dex_entries = []
+            manifest = None
+            entry_count = 0
+            for entry in z:
+                entry_count += 1
+                for pattern in important_files:
+                    if matches[pattern] is None and pattern in entry.name:
+                        matches[pattern] = entry
+                if entry.name.endswith('.dex'):
+                    dex_entries.append(entry)
+                if entry.name == 'AndroidManifest.xml':
+                    manifest = entry
+
+            # List key files
+            print("\nKey files in APK:")
+            for pattern, entry in matches.items():
+                if entry is not None:
+                    print(f"  ✓ {entry.name} ({entry.file_size} bytes)")
+                    reporter.check(f"Key file {pattern}", STATUS_PASS, entry.name, size_bytes=entry.file_size)
+                else:
+                    print(f"  ✗ {pattern} NOT FOUND")
+                    reporter.check(f"Key file {pattern}", STATUS_WARN, "not found")
+
+            # Check for MainActivity class
+            print("\nClasses in dex files:")
+            for entry in dex_entries:
+                print(f"  ✓ {entry.name} ({entry.file_size} bytes)")
+                reporter.check(f"DEX {entry.name}", True, size_bytes=entry.file_size)
+
+            # Try to parse manifest
+            print("\nParsing AndroidManifest.xml...")
+            try:
+                if manifest is None:
+                    raise ZipFormatError("AndroidManifest.xml not found")
+                # Streams the entry through the CRC check without holding it in memory
+                manifest_size = sum(len(chunk) for chunk in z.iter_chunks(manifest))
+                print(f"  ✓ Manifest found ({manifest_size} bytes)")
+                print("  ✓ APK structure is valid")
+                reporter.check("Manifest readable", True, size_bytes=manifest_size)
+            except Exception as e:
+                print(f"  ✗ Error reading manifest: {e}")
+                reporter.check("Manifest readable", False, str(e))
+
+            # List all files
+            print(f"\nTotal files in APK: {entry_count}")
+
+    except ZipFormatError as e:
+        print(f"✗ APK is NOT a valid ZIP file: {e}")
+        reporter.check("Valid ZIP", False, str(e))
+        reporter.summary("not a valid ZIP file")
+        return False
+    except Exception as e:
+        print(f"✗ Error analyzing APK: {e}")
+        reporter.check("Analysis", False, str(e))
+        reporter.summary("analysis failed")
+        return False
+
+    reporter.summary(f"{entry_count} entries", entries=entry_count)
+    print("\n" + "="*60)
+    print("✓ APK VALIDATION SUCCESSFUL")
+    print("="*60)
+    print("\nAPK is ready to install and test on a device or emulator.")
+    print("\nInstallation command:")
+    print(f"  adb install -r {apk_path}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_arguments(parser, '/workspaces/codespaces-blank/ttsrepro-debug.apk')
+    args = parser.parse_args()
+
+    reporter = open_reporter(args.ndjson, 'validate_apk')
+    valid = True
+    try:
+        with human_output(reporter):
+            for apk_path in args.apks:
+                valid &= validate(apk_path, reporter)
+    finally:
+        reporter.close()
+    return 0 if valid else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+ZIP Alignment and Storage-Method Audit
+Checks how APK entries are stored: 4-byte alignment of stored entries, 4 KB / 16 KB page
+alignment of uncompressed native libraries, a compressed resources.arsc, and media that
+was deflated for no gain
+"""
+
+import sys
+
+from zip_entries import ZipArchive, METHOD_STORED
+
+PAGE_SIZES = (4096, 16384)
+
+# aapt's default no-compress extensions: already-compressed formats
+NO_COMPRESS_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.wav', '.mp2', '.mp3', '.ogg', '.aac',
+    '.mpg', '.mpeg', '.mid', '.midi', '.smf', '.jet', '.rtttl', '.imy', '.xmf', '.mp4',
+    '.m4a', '.m4v', '.3gp', '.3gpp', '.3g2', '.3gpp2', '.amr', '.awb', '.wma', '.wmv',
+    '.webm', '.mkv', '.zip', '.jar', '.apk', '.gz', '.xz', '.7z', '.woff2',
+}
+
+# Rough mid-range device figures used to turn bytes into install/launch cost
+INFLATE_BYTES_PER_SEC = 100 * 1024 * 1024
+MIN_USEFUL_SAVING = 0.10
+
+
+class AuditFinding:
+    __slots__ = ('name', 'rule', 'detail', 'cost_ms', 'cost_bytes')
+
+    def __init__(self, name, rule, detail, cost_ms=0.0, cost_bytes=0):
+        self.name = name
+        self.rule = rule
+        self.detail = detail
+        self.cost_ms = cost_ms
+        self.cost_bytes = cost_bytes
+
+    def __str__(self):
+        cost = f" (~{self.cost_ms:.1f} ms, {self.cost_bytes} B inflated)" if self.cost_bytes else ""
+        return f"[{self.rule}] {self.name}: {self.detail}{cost}"
+
+
+def inflate_cost_ms(size):
+    return size / INFLATE_BYTES_PER_SEC * 1000
+
+
+def audit(archive):
+    """Return a list of AuditFinding for a ZipArchive (or ZipEntryTable), walking its entries once"""
+    findings = []
+
+    for entry in archive:
+        name = entry.name
+        if name.endswith('/'):
+            continue
+        stored = entry.method == METHOD_STORED
+        usize = entry.file_size
+
+        if stored:
+            offset = archive.entry_data_offset(entry.header_offset, name)
+            if name.endswith('.so') and name.startswith('lib/'):
+                # One finding per library, for the smallest page size it misses (which implies the larger ones)
+                page = next((page for page in PAGE_SIZES if offset % page), None)
+                if page is not None:
+                    findings.append(AuditFinding(
+                        name, f'so-align-{page // 1024}k',
+                        f"data at {offset:#x} is not {page // 1024} KB aligned; cannot be mmapped from the APK"
+                        + (" on 16 KB page devices" if page == 16384 else " on any device")))
+            elif offset % 4:
+                findings.append(AuditFinding(name, 'align-4',
+                                             f"stored data at {offset:#x} is not 4-byte aligned (run zipalign -p 4)"))
+            continue
+
+        if name == 'resources.arsc':
+            findings.append(AuditFinding(
+                name, 'arsc-compressed',
+                "resources.arsc is compressed; it must be stored and 4-byte aligned to be mmapped "
+                "(install fails for targetSdk 30+)",
+                inflate_cost_ms(usize), usize))
+        elif name.endswith('.so') and name.startswith('lib/'):
+            findings.append(AuditFinding(
+                name, 'so-compressed',
+                "native library is compressed and must be extracted at install time",
+                inflate_cost_ms(usize), usize))
+        else:
+            dot = name.rfind('.')
+            extension = name[dot:].lower() if dot > name.rfind('/') else ''
+            if extension in NO_COMPRESS_EXTENSIONS and usize:
+                saving = 1 - entry.compressed_size / usize
+                if saving < MIN_USEFUL_SAVING:
+                    findings.append(AuditFinding(
+                        name, 'needless-deflate',
+                        f"already-compressed {extension} deflated for {saving:.1%} saving",
+                        inflate_cost_ms(usize), usize))
+    return findings
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: {sys.argv[0]} <apk>")
+        return 2
+
+    with ZipArchive(sys.argv[1]) as archive:
+        findings = audit(archive)
+        entry_count = archive.entry_count
+
+    print(f"Audited {entry_count} entries")
+    by_rule = {}
+    for finding in findings:
+        by_rule.setdefault(finding.rule, []).append(finding)
+    for rule, rule_findings in sorted(by_rule.items()):
+        total_ms = sum(f.cost_ms for f in rule_findings)
+        total_bytes = sum(f.cost_bytes for f in rule_findings)
+        print(f"\n⚠️  {rule}: {len(rule_findings)} entries"
+              + (f", ~{total_ms:.1f} ms to inflate {total_bytes} B" if total_bytes else ""))
+        for finding in rule_findings[:20]:
+            print(f"   {finding}")
+        if len(rule_findings) > 20:
+            print(f"   ... {len(rule_findings) - 20} more")
+    if not findings:
+        print("✅ Entry storage and alignment are install- and mmap-friendly")
+    return 1 if findings else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
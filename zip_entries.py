@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Compact ZIP Entry Table
+Reads the central directory of an APK (ZIP or ZIP64) without building ZipInfo objects:
+ZipArchive walks it lazily one entry at a time and streams entry data in bounded chunks,
+ZipEntryTable keeps it in flat arrays (one slot per entry) and resolves local-header data
+offsets on demand, and ZipEntryMap looks entries up by name over that table
+"""
+
+import mmap
+import struct
+import zlib
+from array import array
+from collections.abc import Mapping
+
+EOCD_SIGNATURE = b'PK\x05\x06'
+ZIP64_LOCATOR_SIGNATURE = 0x07064B50
+ZIP64_EOCD_SIGNATURE = 0x06064B50
+CENTRAL_SIGNATURE = 0x02014B50
+LOCAL_SIGNATURE = 0x04034B50
+EOCD_SIZE = 22
+ZIP64_LOCATOR_SIZE = 20
+ZIP64_EOCD_SIZE = 56
+MAX_COMMENT = 0xFFFF
+ZIP64_EXTRA_ID = 0x0001
+# A 16/32-bit field holding its maximum value means "see the ZIP64 record"
+ZIP64_COUNT_MARKER = 0xFFFF
+ZIP64_MARKER = 0xFFFFFFFF
+
+METHOD_STORED = 0
+METHOD_DEFLATED = 8
+FLAG_ENCRYPTED = 0x1
+FLAG_UTF8 = 0x800
+
+# Entry data is read and inflated this many bytes at a time
+READ_CHUNK = 1 << 20
+
+
+class ZipFormatError(Exception):
+    pass
+
+
+class ZipEntry:
+    __slots__ = ('index', 'name', 'flags', 'method', 'crc', 'compressed_size', 'file_size', 'header_offset')
+
+    def __init__(self, index, name, flags, method, crc, compressed_size, file_size, header_offset):
+        self.index = index
+        self.name = name
+        self.flags = flags
+        self.method = method
+        self.crc = crc
+        self.compressed_size = compressed_size
+        self.file_size = file_size
+        self.header_offset = header_offset
+
+    def __repr__(self):
+        return f"ZipEntry({self.name!r}, {self.file_size} bytes)"
+
+    # zipfile.ZipInfo spellings, so a ZipEntry can stand in for one
+    @property
+    def filename(self):
+        return self.name
+
+    @property
+    def CRC(self):
+        return self.crc
+
+    @property
+    def compress_size(self):
+        return self.compressed_size
+
+    @property
+    def compress_type(self):
+        return self.method
+
+
+def _zip64_extra(extra, values):
+    """Replace ZIP64_MARKER values (file size, compressed size, header offset, in that order) from extra"""
+    pos = 0
+    while pos + 4 <= len(extra):
+        tag, size = struct.unpack_from('<HH', extra, pos)
+        if tag == ZIP64_EXTRA_ID:
+            field = pos + 4
+            end = field + size
+            resolved = []
+            for value in values:
+                if value == ZIP64_MARKER:
+                    if field + 8 > min(end, len(extra)):
+                        raise ZipFormatError("ZIP64 extra field is shorter than the values it replaces")
+                    value = struct.unpack_from('<Q', extra, field)[0]
+                    field += 8
+                resolved.append(value)
+            return resolved
+        pos += 4 + size
+    return values
+
+
+class ZipArchive:
+    """Central directory of an archive, walked lazily; entry data is streamed, never read whole"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.map = None
+        self.size = self._file.seek(0, 2)
+        if self.size < EOCD_SIZE:
+            self._file.close()
+            raise ZipFormatError(f"{path}: too small to be a ZIP archive")
+        self.map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._locate_central_directory()
+        except (ZipFormatError, struct.error) as e:
+            self.close()
+            raise ZipFormatError(f"{path}: {e}") from None
+
+    def _locate_central_directory(self):
+        data = self.map
+        eocd = data.rfind(EOCD_SIGNATURE, max(0, self.size - EOCD_SIZE - MAX_COMMENT))
+        if eocd < 0:
+            raise ZipFormatError("end of central directory not found")
+        (_sig, _disk, _cd_disk, _disk_entries, self.entry_count,
+         self.cd_size, self.cd_offset, _comment_len) = struct.unpack_from('<IHHHHIIH', data, eocd)
+        self.zip64 = False
+        locator = eocd - ZIP64_LOCATOR_SIZE
+        if locator >= 0 and struct.unpack_from('<I', data, locator)[0] == ZIP64_LOCATOR_SIGNATURE:
+            _sig, _disk, eocd64, _disks = struct.unpack_from('<IIQI', data, locator)
+            if eocd64 + ZIP64_EOCD_SIZE > locator or struct.unpack_from('<I', data, eocd64)[0] != ZIP64_EOCD_SIGNATURE:
+                raise ZipFormatError("ZIP64 end of central directory record not found")
+            (_sig, _record_size, _made_by, _needed, _disk, _cd_disk, _disk_entries, self.entry_count,
+             self.cd_size, self.cd_offset) = struct.unpack_from('<IQHHIIQQQQ', data, eocd64)
+            self.zip64 = True
+        elif ZIP64_MARKER in (self.cd_size, self.cd_offset) or self.entry_count == ZIP64_COUNT_MARKER:
+            raise ZipFormatError("ZIP64 archive without a ZIP64 end of central directory locator")
+        if self.cd_offset + self.cd_size > self.size:
+            raise ZipFormatError(f"central directory at {self.cd_offset:#x} runs past the end of the file")
+
+    def __iter__(self):
+        """Yield a ZipEntry per central directory record; nothing is kept between entries"""
+        data = self.map
+        pos = self.cd_offset
+        end = self.cd_offset + self.cd_size
+        for index in range(self.entry_count):
+            if pos + 46 > end:
+                raise ZipFormatError(f"{self.path}: central directory ends after {index} of {self.entry_count} entries")
+            try:
+                (signature, _made_by, _needed, flags, method, _time, _date, crc, csize, usize,
+                 name_len, extra_len, comment_len, _disk, _internal, _external,
+                 header_offset) = struct.unpack_from('<IHHHHHHIIIHHHHHII', data, pos)
+                if signature != CENTRAL_SIGNATURE:
+                    raise ZipFormatError(f"bad central directory entry at {pos:#x}")
+                name_end = pos + 46 + name_len
+                if name_end + extra_len + comment_len > end:
+                    raise ZipFormatError(f"central directory entry at {pos:#x} runs past the central directory")
+                name = data[pos + 46:name_end].decode('utf-8' if flags & FLAG_UTF8 else 'cp437')
+                if ZIP64_MARKER in (usize, csize, header_offset):
+                    usize, csize, header_offset = _zip64_extra(data[name_end:name_end + extra_len],
+                                                               (usize, csize, header_offset))
+            except (ZipFormatError, struct.error, UnicodeDecodeError) as e:
+                raise ZipFormatError(f"{self.path}: {e}") from None
+            yield ZipEntry(index, name, flags, method, crc, csize, usize, header_offset)
+            pos = name_end + extra_len + comment_len
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if getattr(self, 'map', None) is not None:
+            self.map.close()
+            self.map = None
+        self._file.close()
+
+    def entry_data_offset(self, header_offset, name=''):
+        """Absolute file offset of the (possibly compressed) data whose local header is at header_offset"""
+        if header_offset + 30 > self.size:
+            raise ZipFormatError(f"{self.path}: local header for {name} is past the end of the file")
+        signature, = struct.unpack_from('<I', self.map, header_offset)
+        if signature != LOCAL_SIGNATURE:
+            raise ZipFormatError(f"{self.path}: bad local header for {name}")
+        name_len, extra_len = struct.unpack_from('<HH', self.map, header_offset + 26)
+        return header_offset + 30 + name_len + extra_len
+
+    def iter_chunks(self, entry, chunk_size=READ_CHUNK):
+        """Yield entry's uncompressed data in pieces of at most chunk_size bytes, checking its CRC"""
+        if entry.flags & FLAG_ENCRYPTED:
+            raise ZipFormatError(f"{entry.name} is encrypted")
+        if entry.method not in (METHOD_STORED, METHOD_DEFLATED):
+            raise ZipFormatError(f"{entry.name} uses unsupported compression method {entry.method}")
+        offset = self.entry_data_offset(entry.header_offset, entry.name)
+        remaining = entry.compressed_size
+        if offset + remaining > self.size:
+            raise ZipFormatError(f"{entry.name} runs past the end of the file")
+        inflater = zlib.decompressobj(-15) if entry.method == METHOD_DEFLATED else None
+        crc = 0
+        produced = 0
+        while remaining:
+            # Seek every time so interleaved readers of the same archive do not disturb each other
+            self._file.seek(offset)
+            raw = self._file.read(min(chunk_size, remaining))
+            if not raw:
+                raise ZipFormatError(f"{entry.name} is truncated")
+            offset += len(raw)
+            remaining -= len(raw)
+            if inflater is None:
+                pieces = (raw,)
+            else:
+                pieces = self._inflate(inflater, raw, chunk_size)
+            for piece in pieces:
+                crc = zlib.crc32(piece, crc)
+                produced += len(piece)
+                yield piece
+        if produced != entry.file_size or crc != entry.crc:
+            raise ZipFormatError(f"{entry.name}: CRC or size mismatch")
+
+    @staticmethod
+    def _inflate(inflater, raw, chunk_size):
+        while raw:
+            piece = inflater.decompress(raw, chunk_size)
+            if piece:
+                yield piece
+            raw = inflater.unconsumed_tail
+
+    def read_head(self, entry, size):
+        """First size bytes of entry (fewer if it is shorter), inflating no more than needed"""
+        head = b''
+        for piece in self.iter_chunks(entry, max(size, 4096)):
+            head += piece
+            if len(head) >= size:
+                break
+        return head[:size]
+
+    def read(self, entry, limit=READ_CHUNK * 16):
+        """Whole entry, for entries known to be small; refuses anything over limit bytes"""
+        if entry.file_size > limit:
+            raise ZipFormatError(f"{entry.name} is {entry.file_size} bytes, over the {limit} byte read limit")
+        # Filled in place: joining the chunks would briefly hold the entry twice
+        data = bytearray(entry.file_size)
+        pos = 0
+        for piece in self.iter_chunks(entry):
+            data[pos:pos + len(piece)] = piece
+            pos += len(piece)
+        return data
+
+    def contains(self, entry, needles):
+        """Subset of needles (bytes) found in entry's data, matching across chunk boundaries"""
+        pending = set(needles)
+        found = set()
+        keep = max(map(len, pending), default=1) - 1
+        tail = b''
+        for piece in self.iter_chunks(entry):
+            window = tail + piece
+            for needle in [needle for needle in pending if needle in window]:
+                pending.discard(needle)
+                found.add(needle)
+            if not pending:
+                break
+            tail = window[-keep:] if keep else b''
+        return found
+
+
+class ZipEntryTable(ZipArchive):
+    def __init__(self, path):
+        super().__init__(path)
+        self.names = []
+        self.method = array('H')
+        self.flags = array('H')
+        self.crc = array('I')
+        self.compressed_size = array('Q')
+        self.file_size = array('Q')
+        self.header_offset = array('Q')
+        self._data_offsets = {}
+        self._index = None
+        try:
+            self._read_central_directory()
+        except (ZipFormatError, struct.error, UnicodeDecodeError):
+            self.close()
+            raise
+
+    def _read_central_directory(self):
+        for entry in ZipArchive.__iter__(self):
+            self.names.append(entry.name)
+            self.method.append(entry.method)
+            self.flags.append(entry.flags)
+            self.crc.append(entry.crc)
+            self.compressed_size.append(entry.compressed_size)
+            self.file_size.append(entry.file_size)
+            self.header_offset.append(entry.header_offset)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for i in range(len(self.names)):
+            yield self.entry(i)
+
+    def entry(self, i):
+        return ZipEntry(i, self.names[i], self.flags[i], self.method[i], self.crc[i],
+                        self.compressed_size[i], self.file_size[i], self.header_offset[i])
+
+    def index(self, name):
+        """Entry number for name, or -1"""
+        if self._index is None:
+            self._index = {entry_name: i for i, entry_name in enumerate(self.names)}
+        return self._index.get(name, -1)
+
+    def data_offset(self, i):
+        """Absolute file offset of entry i's (possibly compressed) data"""
+        offset = self._data_offsets.get(i)
+        if offset is None:
+            offset = self._data_offsets[i] = self.entry_data_offset(self.header_offset[i], self.names[i])
+        return offset
+
+
+class ZipEntryMap(Mapping):
+    """Read-only {name: ZipEntry} view of a ZipEntryTable; entries are built on lookup"""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __getitem__(self, name):
+        i = self.table.index(name)
+        if i < 0:
+            raise KeyError(name)
+        return self.table.entry(i)
+
+    def __contains__(self, name):
+        return self.table.index(name) >= 0
+
+    def __iter__(self):
+        return iter(self.table.names)
+
+    def __len__(self):
+        return len(self.table)
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+ZIP64 / Large Archive Stress Test
+Generates synthetic APK-shaped archives locally and runs the validators' ZIP layer over
+them under tracemalloc: more than 65535 entries (ZIP64 end of central directory), a
+central directory rewritten so every entry carries ZIP64 size/offset extras, a large
+deflated classes.dex searched by streaming, and optionally an entry past 4 GiB. The
+test_ttstest_app and test_launch_simulation suites, which index the APK through ApkIndex,
+get the same ceiling plus the size of the DEX they parse.
+
+    python3 zip_stress.py --entries 70000 --dex-mb 64
+    python3 zip_stress.py --huge-gb 4.5 --workdir /mnt/scratch
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import struct
+import sys
+import tempfile
+import time
+import tracemalloc
+import zipfile
+
+import validate_apk
+from ndjson_report import NullReporter
+from test_launch_simulation import APKLaunchSimulator
+from test_ttstest_app import TTSTestAppValidator
+from zip_alignment_audit import audit
+from zip_entries import (CENTRAL_SIGNATURE, ZIP64_EOCD_SIGNATURE, ZIP64_EXTRA_ID,
+                         ZIP64_LOCATOR_SIGNATURE, ZIP64_MARKER, ZipArchive)
+
+MB = 1 << 20
+# Peak Python allocations allowed while walking and streaming one archive
+MEMORY_CEILING = 16 * MB
+NEEDLE = b'Lcom/example/stress/NeedleActivity;'
+WRITE_CHUNK = 4 * MB
+
+
+def write_synthetic_apk(path, entries, dex_mb, huge_gb=0):
+    """APK-shaped archive: manifest, resources.arsc, a dex_mb MB classes.dex and entries small files"""
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as z:
+        z.writestr('AndroidManifest.xml', b'\x03\x00\x08\x00' + b'\x00' * 1020)
+        z.writestr(zipfile.ZipInfo('resources.arsc'), b'\x02\x00\x0c\x00' + b'\x00' * 4092)
+        # Streamed in, so writing a large DEX does not need it in memory either
+        with z.open('classes.dex', 'w', force_zip64=True) as dex:
+            dex.write(b'dex\n035\x00')
+            block = bytes(range(256)) * (WRITE_CHUNK // 256)
+            written = 8
+            target = dex_mb * MB
+            while written < target - WRITE_CHUNK:
+                dex.write(block)
+                written += len(block)
+            # Put the needle across a 1 MB boundary of the uncompressed data
+            dex.write(b'\x00' * ((-written - len(NEEDLE) // 2) % MB))
+            dex.write(NEEDLE)
+        if huge_gb:
+            # Written before the small entries so their local headers sit past 4 GiB
+            info = zipfile.ZipInfo('assets/huge.bin')
+            info.compress_type = zipfile.ZIP_STORED
+            with z.open(info, 'w', force_zip64=True) as huge:
+                zero = bytes(WRITE_CHUNK)
+                remaining = int(huge_gb * 1024 * MB)
+                while remaining:
+                    huge.write(zero[:min(remaining, len(zero))])
+                    remaining -= min(remaining, len(zero))
+        for i in range(entries):
+            z.writestr(f'res/raw/item_{i:06d}.txt', f'synthetic entry {i}\n')
+
+
+def force_zip64_extras(path):
+    """Rewrite the central directory so every size and offset lives in a ZIP64 extra field"""
+    with ZipArchive(path) as archive:
+        cd_offset, cd_size, count = archive.cd_offset, archive.cd_size, archive.entry_count
+    with open(path, 'r+b') as f:
+        f.seek(cd_offset)
+        directory = f.read(cd_size)
+        records = []
+        pos = 0
+        for _ in range(count):
+            fields = list(struct.unpack_from('<IHHHHHHIIIHHHHHII', directory, pos))
+            if fields[0] != CENTRAL_SIGNATURE:
+                raise ValueError(f"bad central directory record at {pos:#x}")
+            name_len, extra_len, comment_len = fields[10:13]
+            name = directory[pos + 46:pos + 46 + name_len]
+            extra = directory[pos + 46 + name_len:pos + 46 + name_len + extra_len]
+            comment = directory[pos + 46 + name_len + extra_len:pos + 46 + name_len + extra_len + comment_len]
+            pos += 46 + name_len + extra_len + comment_len
+            # Drop any existing ZIP64 extra, keep the rest
+            kept = b''
+            extra_pos = 0
+            while extra_pos + 4 <= len(extra):
+                tag, size = struct.unpack_from('<HH', extra, extra_pos)
+                if tag != ZIP64_EXTRA_ID:
+                    kept += extra[extra_pos:extra_pos + 4 + size]
+                extra_pos += 4 + size
+            usize, csize, offset = _resolve(fields, extra)
+            extra = struct.pack('<HHQQQ', ZIP64_EXTRA_ID, 24, usize, csize, offset) + kept
+            fields[7:10] = [fields[7], ZIP64_MARKER, ZIP64_MARKER]
+            fields[10:13] = [name_len, len(extra), comment_len]
+            fields[16] = ZIP64_MARKER
+            records.append(struct.pack('<IHHHHHHIIIHHHHHII', *fields) + name + extra + comment)
+        f.seek(cd_offset)
+        f.truncate()
+        for record in records:
+            f.write(record)
+        new_size = f.tell() - cd_offset
+        eocd64 = f.tell()
+        f.write(struct.pack('<IQHHIIQQQQ', ZIP64_EOCD_SIGNATURE, 44, 45, 45, 0, 0, count, count, new_size, cd_offset))
+        f.write(struct.pack('<IIQI', ZIP64_LOCATOR_SIGNATURE, 0, eocd64, 1))
+        f.write(struct.pack('<IHHHHIIH', 0x06054B50, 0, 0, 0xFFFF, 0xFFFF, ZIP64_MARKER, ZIP64_MARKER, 0))
+
+
+def _resolve(fields, extra):
+    usize, csize, offset = fields[9], fields[8], fields[16]
+    extra_pos = 0
+    while extra_pos + 4 <= len(extra):
+        tag, size = struct.unpack_from('<HH', extra, extra_pos)
+        if tag == ZIP64_EXTRA_ID:
+            values = iter(struct.unpack_from(f'<{size // 8}Q', extra, extra_pos + 4))
+            usize = next(values) if usize == ZIP64_MARKER else usize
+            csize = next(values) if csize == ZIP64_MARKER else csize
+            offset = next(values) if offset == ZIP64_MARKER else offset
+        extra_pos += 4 + size
+    return usize, csize, offset
+
+
+def measured(label, function, ceiling=MEMORY_CEILING):
+    """Run function under tracemalloc; return (result, ok)"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        result = function()
+    finally:
+        _current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    elapsed = time.perf_counter() - started
+    ok = peak <= ceiling
+    print(f"  {'✅' if ok else '❌'} {label:<44}{elapsed:>7.2f} s  peak {peak / MB:6.2f} MB")
+    return result, ok
+
+
+def stress(path, entries, expected_dex_bytes, expect_zip64):
+    """Walk, stream and validate one archive; return True when every check held"""
+    ok = True
+    print(f"\n{os.path.basename(path)}: {os.path.getsize(path) / MB:,.1f} MB")
+
+    def walk():
+        with ZipArchive(path) as archive:
+            return archive.zip64, sum(1 for _entry in archive)
+    (zip64, count), within = measured("walk central directory", walk)
+    ok &= within
+    if zip64 != expect_zip64 or count != entries:
+        print(f"  ❌ expected zip64={expect_zip64} with {entries} entries, got zip64={zip64} entries={count}")
+        ok = False
+
+    def search():
+        with ZipArchive(path) as archive:
+            dex = next(entry for entry in archive if entry.name == 'classes.dex')
+            return dex.file_size, archive.read_head(dex, 4), archive.contains(dex, [NEEDLE])
+    (dex_size, magic, found), within = measured("stream classes.dex for a class descriptor", search)
+    ok &= within
+    if dex_size != expected_dex_bytes or magic != b'dex\n' or NEEDLE not in found:
+        print(f"  ❌ classes.dex: {dex_size} bytes, magic {magic!r}, descriptor found: {NEEDLE in found}")
+        ok = False
+
+    def validate():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return validate_apk.validate(path, NullReporter())
+    valid, within = measured("validate_apk.validate", validate)
+    ok &= within and valid
+    if not valid:
+        print("  ❌ validate_apk rejected the archive")
+
+    def alignment():
+        with ZipArchive(path) as archive:
+            return audit(archive)
+    _findings, within = measured("zip_alignment_audit.audit", alignment)
+    ok &= within
+
+    def suites():
+        # The synthetic entries fail most checks; only the memory the suites need is measured here
+        with contextlib.redirect_stdout(io.StringIO()):
+            TTSTestAppValidator(path, NullReporter()).run_all_tests()
+            APKLaunchSimulator(path, NullReporter()).run_all_tests()
+    # ApkIndex inflates each DEX whole to parse it, so those suites may also hold classes.dex
+    _result, within = measured("test_ttstest_app + test_launch_simulation", suites,
+                               MEMORY_CEILING + expected_dex_bytes)
+    ok &= within
+
+    # Cross-check sizes and offsets against zipfile (outside the measured sections: it keeps every ZipInfo)
+    with zipfile.ZipFile(path) as reference, ZipArchive(path) as archive:
+        for info, entry in zip(reference.infolist(), archive):
+            if (info.filename, info.file_size, info.compress_size, info.header_offset) != \
+                    (entry.name, entry.file_size, entry.compressed_size, entry.header_offset):
+                print(f"  ❌ {entry.name}: differs from zipfile's reading")
+                ok = False
+                break
+        else:
+            print("  ✅ entries match zipfile's reading")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--entries', type=int, default=70000, help='small entries to add (>65535 forces ZIP64)')
+    parser.add_argument('--dex-mb', type=int, default=64, help='size of the synthetic classes.dex in MB')
+    parser.add_argument('--huge-gb', type=float, default=0,
+                        help='also add a stored entry of this many GiB (4+ exercises 64-bit offsets; needs the disk space)')
+    parser.add_argument('--workdir', help='directory for the generated archives (default: a temporary directory)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        path = os.path.join(workdir, 'stress.apk')
+        print(f"Generating {args.entries} entries, {args.dex_mb} MB classes.dex"
+              + (f", {args.huge_gb} GiB stored entry" if args.huge_gb else "") + " ...")
+        write_synthetic_apk(path, args.entries, args.dex_mb, args.huge_gb)
+        with zipfile.ZipFile(path) as z:
+            dex_bytes = z.getinfo('classes.dex').file_size
+        total = args.entries + 3 + (1 if args.huge_gb else 0)
+
+        # zipfile only writes ZIP64 end records once the entry count or offsets need them
+        ok = stress(path, total, dex_bytes, total > 0xFFFF or os.path.getsize(path) > ZIP64_MARKER)
+        force_zip64_extras(path)
+        os.rename(path, os.path.join(workdir, 'stress-zip64-extras.apk'))
+        ok &= stress(os.path.join(workdir, 'stress-zip64-extras.apk'), total, dex_bytes, True)
+
+    print()
+    if ok:
+        print(f"✅ ZIP64 archives handled within the {MEMORY_CEILING // MB} MB ceiling (plus classes.dex for ApkIndex)")
+        return 0
+    print("❌ Stress test failed")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())